@@ -1,42 +1,131 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Request, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
+from werkzeug.utils import secure_filename
 import os
 import json
+import tempfile
 import threading
 import time
 import uuid
 
 # Import your existing modules
-from feature_builder.feature_builder import build_features
-from extraction.extractor import parse_disk_image
-from backend.db_router import insert_to_db
-from backend.plot_builder import (
-    generate_histogram,
-    generate_bar_chart,
-    generate_pie_chart,
-    generate_line_chart
+from utils.hashing import HashingWriter
+from backend.db_router import insert_all
+from database.connection_manager import get_manager
+from backend import pipeline
+from backend.job_store import ExtractionJob, JobStore
+from backend.chunked_upload import UploadManager
+from backend.batch_ingest import discover_evidence
+from backend.job_scheduler import (
+    JobScheduler, JobCancelled, device_of, DEFAULT_WORKERS, QUEUED, RUNNING, PAUSED, CANCELLED
 )
+from backend.plot_cache import PlotCache, PLOT_GENERATORS, GZIP_MIN_SIZE
 
-app = Flask(__name__)
-CORS(app)
-last_features = {}
 UPLOAD_FOLDER = 'uploads'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Server state (the job database) lives next to the code, where uploads and batch ingest never write
+DATA_FOLDER = os.environ.get("FORENSIC_DATA_DIR",
+                             os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data"))
+os.makedirs(DATA_FOLDER, exist_ok=True)
+
+JOB_EVENT_INTERVAL = 0.2    # /job-events sends at most 5 updates per second
+JOB_EVENT_KEEPALIVE = 15    # seconds between keep-alive comments on an idle stream
+JOB_DB_PATH = os.environ.get("FORENSIC_JOB_DB", os.path.join(DATA_FOLDER, "jobs.db"))
+JOB_TTL = int(os.environ.get("FORENSIC_JOB_TTL", 7 * 24 * 3600))  # seconds finished jobs are kept
+UPLOAD_TTL = int(os.environ.get("FORENSIC_UPLOAD_TTL", 24 * 3600))  # seconds an idle chunked upload is kept
+# Server-side directories batch ingest may read from (os.pathsep separated; unset: the upload folder only)
+INGEST_ROOTS = [os.path.realpath(p) for p in os.environ.get("FORENSIC_INGEST_ROOTS", "").split(os.pathsep) if p]
+INGEST_ROOTS = INGEST_ROOTS or [os.path.realpath(UPLOAD_FOLDER)]
+
+
+class HashingRequest(Request):
+    """
+    Request that streams uploaded files straight into the upload folder,
+    computing the evidence digests while the body is being received.
+
+    Every .part file created is remembered in `part_files`; the ones a view
+    did not move into place are removed when the request ends (see
+    discard_part_files), whether the view returned early, raised, or the
+    client disconnected while the body was being parsed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.part_files = []
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        fd, path = tempfile.mkstemp(dir=UPLOAD_FOLDER, suffix=".part")
+        os.close(fd)
+        writer = HashingWriter(path)
+        self.part_files.append(writer)
+        return writer
+
+
+app = Flask(__name__)
+app.request_class = HashingRequest
+CORS(app)
+
+@app.teardown_request
+def discard_part_files(exc=None):
+    """Remove the .part files of this request that were not moved into place"""
+    for writer in getattr(request, "part_files", ()):
+        try:
+            writer.close()  # deletes the file if it is still at its .part path
+        except Exception as e:
+            print(f"Could not discard {writer.path}: {e}")
+            if os.path.exists(writer.path):
+                os.remove(writer.path)
+
+
+# Generated plot payloads, per job and plot type
+plot_cache = PlotCache()
 
-# Store job status and results
-jobs = {}
+# Store job status, results and features (persisted, with finished jobs expiring after JOB_TTL
+# together with their cached plots)
+jobs = JobStore(JOB_DB_PATH, ttl=JOB_TTL, on_evict=plot_cache.discard)
+job_events = threading.Condition()  # notified whenever any job changes
 
-class ExtractionJob:
-    def __init__(self, job_id, filename):
-        self.job_id = job_id
-        self.filename = filename
-        self.status = "uploading"  # uploading, processing, completed, error
-        self.progress = 0
-        self.message = "Uploading file..."
-        self.result = None
-        self.error = None
+# Chunked uploads in progress (resumable across restarts, discarded after UPLOAD_TTL without a chunk)
+uploads = UploadManager(UPLOAD_FOLDER, ttl=UPLOAD_TTL)
 
-def process_extraction(job_id, image_path, databases):
+
+def publish_job(job):
+    """Persist status changes and wake /job-events streams after a job changed"""
+    jobs.save(job)
+    with job_events:
+        job.version += 1
+        job_events.notify_all()
+
+
+def on_job_state(job_id, state):
+    """Mirror scheduler state changes into the job record shown to the client"""
+    job = jobs.get(job_id)
+    if job is None or job.status in ("completed", "error"):
+        return
+    if state == QUEUED:
+        job.status = "queued"
+        job.message = "Waiting in queue..."
+    elif state == PAUSED:
+        job.status = "paused"
+        job.message = "Paused"
+        pipeline.set_paused(job_id, True)
+    elif state == RUNNING and job.status in ("queued", "paused"):
+        job.status = "processing"
+        pipeline.set_paused(job_id, False)
+    elif state == CANCELLED:
+        job.status = "cancelled"
+        job.message = "Extraction cancelled"
+    publish_job(job)
+
+
+# Extractions run on a bounded pool instead of one thread per upload; each
+# scheduler thread drives one worker process of the extraction pipeline
+JOB_WORKERS = int(os.environ.get("FORENSIC_JOB_WORKERS", DEFAULT_WORKERS))
+pipeline.configure(JOB_WORKERS)
+scheduler = JobScheduler(workers=JOB_WORKERS, on_state_change=on_job_state).start()
+
+def process_extraction(job_id, image_path, databases, digests=None, force_verify=False, block_index=False,
+                       entropy_map=False):
     """Background task to process file extraction"""
     job = jobs[job_id]
     
@@ -45,40 +134,42 @@ def process_extraction(job_id, image_path, databases):
         job.status = "processing"
         job.progress = 10
         job.message = "Calculating file hashes..."
+        publish_job(job)
         
-        # Extract data using extractor.py
+        # Parse the image and build features in a worker process (extractor.py + feature_builder.py)
         print(f"Parsing disk image: {image_path}")
-        parsed_data = parse_disk_image(image_path, progress_callback=lambda p, m: update_progress(job_id, p, m))
+        outcome = pipeline.run_extraction(
+            job_id,
+            image_path,
+            progress_callback=lambda p, m: update_progress(job_id, p, m),
+            artifact_databases=databases,
+            digests=digests,
+            force_verify=force_verify,
+            block_index=block_index,
+            entropy_map=entropy_map
+        )
         
-        if "error" in parsed_data:
+        if "error" in outcome:
             job.status = "error"
-            job.error = parsed_data["error"]
+            job.error = outcome["error"]
             return
         
-        job.progress = 70
-        job.message = "Building features..."
-        
-        # Build features
-        features = build_features(parsed_data)
+        features = outcome["features"]
         
-        # Save features globally so plots can use them
-        global last_features
-        last_features = features
+        # Keep features with the job so plots can use them
+        jobs.save_features(job_id, features)
         
         job.progress = 80
         job.message = "Storing in databases..."
+        publish_job(job)
         
-        # Insert into selected databases
-        for db in databases:
-            try:
-                print(f"Inserting data into {db}")
-                insert_to_db(db, features)
-            except Exception as e:
-                print(f"Error inserting to {db}: {str(e)}")
-        
-        job.progress = 100
-        job.status = "completed"
-        job.message = "Extraction completed!"
+        # Insert into the selected databases concurrently (each with its own deadline and retries)
+        storage = insert_all(databases, features, key=job_id)
+        for db, status in storage.items():
+            if status["status"] == "ok":
+                print(f"Inserted data into {db} ({status['latency_ms']} ms)")
+            else:
+                print(f"Error inserting to {db}: {status['error']}")
         
         # Prepare result
         job.result = {
@@ -91,19 +182,102 @@ def process_extraction(job_id, image_path, databases):
                 "keys": features.get("keys", []),
                 "totalFiles": features.get("total_files", 0)
             },
-            "recentFiles": features.get("recent_files", [])
+            "recentFiles": features.get("recent_files", []),
+            "artifactIngest": outcome.get("artifacts", {}),
+            "storage": storage
         }
         
+        # Completed only once the result is in place, so status readers never see one without the other
+        job.progress = 100
+        job.status = "completed"
+        job.message = "Extraction completed!"
+        
+    except JobCancelled:
+        print(f"Extraction cancelled: {job_id}")
+        job.status = "cancelled"
+        job.message = "Extraction cancelled"
+        
     except Exception as e:
         print(f"Error in process_extraction: {str(e)}")
         job.status = "error"
         job.error = str(e)
+        
+    finally:
+        publish_job(job)
 
 def update_progress(job_id, progress, message):
-    """Update job progress"""
-    if job_id in jobs:
-        jobs[job_id].progress = progress
-        jobs[job_id].message = message
+    """Update job progress (None values only check for pause/cancel)"""
+    job = jobs.get(job_id) if progress is not None else None
+    if job is not None:
+        job.progress = progress
+        job.message = message
+        publish_job(job)
+    # Progress updates double as the points where a job can be paused or cancelled
+    scheduler.checkpoint(job_id)
+
+
+def submit_job(job):
+    """Queue a job's extraction on the scheduler using its stored submission parameters"""
+    params = job.params
+    scheduler.submit(
+        job.job_id, process_extraction, job.job_id, params["image_path"], params["databases"],
+        params.get("digests"), params.get("force_verify", False), params.get("block_index", False),
+        params.get("entropy_map", False),
+        priority=params.get("priority", 0), examiner=params.get("examiner", "default"),
+        device=device_of(params["image_path"])
+    )
+
+
+def recover_jobs():
+    """Queue again the jobs that had not finished when the server last stopped"""
+    for job in jobs.recover():
+        if os.path.exists(job.params.get("image_path", "")):
+            print(f"Recovered job {job.job_id} ({job.filename})")
+            submit_job(job)
+        else:
+            job.status = "error"
+            job.error = "Image no longer available after restart"
+            publish_job(job)
+
+
+recover_jobs()
+
+def extraction_options(values):
+    """Extraction options from upload form fields (or a JSON body with the same keys)"""
+    def flag(name):
+        return str(values.get(name, 'false')).lower() in ('1', 'true', 'yes')
+
+    # Get selected databases
+    databases = values.get('databases', '[]')
+    if isinstance(databases, str):
+        databases = json.loads(databases)
+
+    return {
+        "databases": databases,
+        # Chain-of-custody runs re-read the evidence instead of trusting cached digests
+        "force_verify": flag('force_verify'),
+        "block_index": flag('block_index'),
+        "entropy_map": flag('entropy_map'),
+        "examiner": values.get('examiner') or "default",
+        "priority": int(values.get('priority') or 0)
+    }
+
+
+def queue_extraction(filename, image_path, digests, options):
+    """Create a job for an image already in the upload folder and queue its extraction"""
+    # Create unique job ID
+    job_id = str(uuid.uuid4())
+    
+    # Create job
+    job = ExtractionJob(job_id, filename, params=dict(options, image_path=image_path, digests=digests))
+    job.status = "queued"
+    job.message = "Waiting in queue..."
+    jobs.add(job)
+    
+    # Queue background processing
+    submit_job(job)
+    return job
+
 
 @app.route('/upload-image', methods=['POST'])
 def upload_image():
@@ -119,45 +293,214 @@ def upload_image():
         if image.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        # Get selected databases
-        databases_json = request.form.get('databases', '[]')
-        databases = json.loads(databases_json)
-        
-        # Create unique job ID
-        job_id = str(uuid.uuid4())
+        options = extraction_options(request.form)
         
-        # Save uploaded file
-        image_path = os.path.join(UPLOAD_FOLDER, image.filename)
-        image.save(image_path)
+        filename = secure_filename(image.filename)
+        if not filename:
+            return jsonify({"error": "Invalid file name"}), 400
         
-        # Create job
-        job = ExtractionJob(job_id, image.filename)
-        jobs[job_id] = job
+        # Save uploaded file. The body was already streamed to disk and hashed
+        # by HashingRequest, so it only needs to be moved into place.
+        image_path = os.path.join(UPLOAD_FOLDER, filename)
+        digests = None
+        if isinstance(image.stream, HashingWriter):
+            digests = image.stream.finish()
+            os.replace(image.stream.path, image_path)
+        else:
+            image.save(image_path)
         
-        # Start background processing
-        thread = threading.Thread(target=process_extraction, args=(job_id, image_path, databases))
-        thread.daemon = True
-        thread.start()
+        job = queue_extraction(filename, image_path, digests, options)
         
         # Return job ID immediately
         return jsonify({
             "success": True,
-            "job_id": job_id,
-            "message": "Upload successful, processing started"
+            "job_id": job.job_id,
+            "queue_position": scheduler.queue_position(job.job_id),
+            "message": "Upload successful, extraction queued"
         })
     
     except Exception as e:
         print(f"Error in upload_image: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+
+@app.route('/uploads', methods=['POST'])
+def create_upload():
+    """
+    Start a chunked upload: {"filename", "size", "chunk_size" (optional)}.
+    Returns the upload id and chunk geometry.
+    """
+    body = request.get_json(silent=True) or {}
+    if not body.get('filename') or body.get('size') is None:
+        return jsonify({"error": "filename and size are required"}), 400
+    try:
+        upload = uploads.create(body['filename'], int(body['size']), body.get('chunk_size'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(upload.status())
+
+
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Which chunks of an upload have been received (used to resume a transfer)"""
+    try:
+        return jsonify(uploads.get(upload_id).status())
+    except KeyError:
+        return jsonify({"error": "Upload not found"}), 404
+
+
+@app.route('/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """
+    Receive one chunk as the raw request body. An optional X-Chunk-SHA256
+    header is checked against the data before the chunk is accepted.
+    """
+    try:
+        upload = uploads.get(upload_id)
+    except KeyError:
+        return jsonify({"error": "Upload not found"}), 404
+    try:
+        digest = upload.write_chunk(index, request.stream, request.headers.get('X-Chunk-SHA256'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"chunk": index, "sha256": digest})
+
+
+@app.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    """
+    Assemble a complete chunked upload and start its extraction. Takes the
+    same options as /upload-image (form fields or JSON).
+    """
+    try:
+        upload = uploads.get(upload_id)
+        options = extraction_options(request.get_json(silent=True) or request.form)
+        image_path = os.path.join(UPLOAD_FOLDER, upload.filename)
+        manifest = uploads.finalize(upload_id, image_path)
+    except KeyError:
+        return jsonify({"error": "Upload not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    
+    # Whole-image digests are computed by the extraction's hashing pass
+    job = queue_extraction(upload.filename, image_path, None, options)
+    return jsonify({
+        "success": True,
+        "job_id": job.job_id,
+        "queue_position": scheduler.queue_position(job.job_id),
+        "chunk_manifest_sha256": manifest,
+        "message": "Upload complete, extraction queued"
+    })
+
+def ingest_allowed(path):
+    """Whether batch ingest may read `path` (see INGEST_ROOTS)"""
+    real = os.path.realpath(path)
+    return any(real == root or real.startswith(root + os.sep) for root in INGEST_ROOTS)
+
+
+@app.route('/batch-ingest', methods=['POST'])
+def batch_ingest():
+    """
+    Queue every evidence set found in a server-side directory, manifest or path list.
+
+    Body (JSON): one of "directory", "manifest" or "paths", plus the same
+    extraction options as /upload-image. Segmented sets (E01/E02..., .001/.002...)
+    become one job each. Jobs share the scheduler's worker and per-device I/O
+    limits, so sets on different disks are read concurrently.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        body = {}
+    key = next((k for k in ('directory', 'manifest', 'paths') if body.get(k)), None)
+    if key is None:
+        return jsonify({"error": "directory, manifest or paths is required"}), 400
+    source = body[key]
+    if key == 'paths':
+        if not isinstance(source, list) or not all(isinstance(p, str) and p for p in source):
+            return jsonify({"error": "paths must be a list of non-empty strings"}), 400
+    elif not isinstance(source, str):
+        return jsonify({"error": f"{key} must be a string"}), 400
+    
+    try:
+        if not all(ingest_allowed(p) for p in (source if isinstance(source, list) else [source])):
+            return jsonify({"error": "Path outside the allowed ingest roots"}), 403
+        options = extraction_options(body)
+        sets, skipped = discover_evidence(source)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    entries = []
+    for evidence in sets:
+        if not ingest_allowed(evidence["path"]):
+            skipped.append({"path": evidence["path"], "reason": "Outside the allowed ingest roots"})
+            continue
+        job = queue_extraction(os.path.basename(evidence["path"]), evidence["path"], None, options)
+        entries.append(dict(evidence, job_id=job.job_id))
+    
+    batch_id = str(uuid.uuid4())
+    jobs.save_batch(batch_id, json.dumps(source) if isinstance(source, list) else source, entries)
+    print(f"Batch {batch_id}: queued {len(entries)} evidence set(s), skipped {len(skipped)}")
+    
+    return jsonify({
+        "success": True,
+        "batch_id": batch_id,
+        "jobs": entries,
+        "skipped": skipped,
+        "message": f"Queued {len(entries)} evidence set(s)"
+    })
+
+
+@app.route('/batch-status/<batch_id>', methods=['GET'])
+def batch_status(batch_id):
+    """Aggregate status of a batch: job counts by status, size-weighted progress and per-job detail"""
+    batch = jobs.batch(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
+    
+    counts = {}
+    details = []
+    total_size = sum(entry["size"] or 1 for entry in batch["entries"])
+    weighted = 0
+    for entry in batch["entries"]:
+        job = jobs.get(entry["job_id"])
+        status = job.status if job else "expired"
+        progress = job.progress if job else 100
+        counts[status] = counts.get(status, 0) + 1
+        weighted += progress * (entry["size"] or 1)
+        details.append({"job_id": entry["job_id"], "path": entry["path"], "status": status, "progress": progress})
+    
+    unfinished = sum(n for status, n in counts.items() if status not in ("completed", "error", "cancelled", "expired"))
+    if unfinished:
+        state = "running"
+    elif counts.get("completed", 0) == len(details):
+        state = "completed"
+    else:
+        state = "completed_with_errors"
+    
+    return jsonify({
+        "batch_id": batch_id,
+        "source": batch["source"],
+        "status": state,
+        "progress": int(weighted / total_size) if details else 100,
+        "counts": counts,
+        "jobs": details
+    })
+
+
 @app.route('/job-status/<job_id>', methods=['GET'])
 def job_status(job_id):
     """Get the status of an extraction job"""
     if job_id not in jobs:
         return jsonify({"error": "Job not found"}), 404
     
-    job = jobs[job_id]
-    
+    return jsonify(job_snapshot(jobs[job_id]))
+
+
+def job_snapshot(job):
+    """Current state of a job as reported by /job-status and /job-events"""
+    job_id = job.job_id
     response = {
         "job_id": job_id,
         "status": job.status,
@@ -165,41 +508,144 @@ def job_status(job_id):
         "message": job.message
     }
     
-    if job.status == "completed" and job.result:
+    if job.status == "queued":
+        position = scheduler.queue_position(job_id)
+        response["queue_position"] = position
+        if position:
+            response["message"] = f"Waiting in queue (position {position})"
+    elif job.status == "completed" and job.result:
         response["result"] = job.result
     elif job.status == "error":
         response["error"] = job.error
     
-    return jsonify(response)
+    return response
+
+
+@app.route('/job-events/<job_id>', methods=['GET'])
+def job_events_stream(job_id):
+    """
+    Stream a job's progress as Server-Sent Events.
+
+    Sends a "progress" event with the same fields as /job-status whenever
+    the job changes (coalesced to at most one per JOB_EVENT_INTERVAL, so
+    only the latest state is sent), and a final "done" event with the
+    result or error before closing.
+    """
+    if job_id not in jobs:
+        return jsonify({"error": "Job not found"}), 404
+    job = jobs[job_id]
+
+    def stream():
+        sent = None
+        while True:
+            with job_events:
+                job_events.wait_for(lambda: job.version != sent, timeout=JOB_EVENT_KEEPALIVE)
+                version = job.version
+            if version == sent:
+                yield ": keep-alive\n\n"
+                continue
+            sent = version
+            snapshot = job_snapshot(job)
+            finished = job.status in ("completed", "error", "cancelled")
+            yield f"event: {'done' if finished else 'progress'}\ndata: {json.dumps(snapshot)}\n\n"
+            if finished:
+                return
+            time.sleep(JOB_EVENT_INTERVAL)
+
+    return Response(stream_with_context(stream()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.route('/job-cancel/<job_id>', methods=['POST'])
+def job_cancel(job_id):
+    """Cancel a queued job, or stop a running one at its next progress update"""
+    if job_id not in jobs:
+        return jsonify({"error": "Job not found"}), 404
+    if not scheduler.cancel(job_id):
+        return jsonify({"error": "Job already finished"}), 409
+    return jsonify({"success": True, "job_id": job_id})
+
+
+@app.route('/job-pause/<job_id>', methods=['POST'])
+def job_pause(job_id):
+    """Pause a queued or running job"""
+    if job_id not in jobs:
+        return jsonify({"error": "Job not found"}), 404
+    if not scheduler.pause(job_id):
+        return jsonify({"error": "Job cannot be paused"}), 409
+    return jsonify({"success": True, "job_id": job_id})
+
+
+@app.route('/job-resume/<job_id>', methods=['POST'])
+def job_resume(job_id):
+    """Resume a paused job"""
+    if job_id not in jobs:
+        return jsonify({"error": "Job not found"}), 404
+    if not scheduler.resume(job_id):
+        return jsonify({"error": "Job is not paused"}), 409
+    return jsonify({"success": True, "job_id": job_id})
+
+
+@app.route('/health/databases', methods=['GET'])
+def database_health():
+    """Round-trip check of the pooled database connections"""
+    checks = get_manager().health()
+    status = 200 if all(check["ok"] for check in checks.values()) else 503
+    return jsonify(checks), status
 
 
 @app.route('/plots', methods=['GET'])
 def plots():
     """
     Generate plot data based on extracted features
+
+    ?job_id= selects the case (default: the most recent extraction). Payloads
+    are generated once per job and plot type, sent with a strong ETag (304 on
+    a matching If-None-Match) and gzip-compressed when the client accepts it.
     """
     plot_type = request.args.get('type')
-    global last_features
+    job_id = request.args.get('job_id') or jobs.latest_features_job()
 
-    if not last_features or not last_features.get("file_types"):
-        return jsonify({
-            "error": "No data available. Please upload a disk image first."
-        }), 400
+    if plot_type not in PLOT_GENERATORS:
+        return jsonify({"error": "Invalid plot type"}), 400
 
-    try:
-        if plot_type == "histogram":
-            return jsonify(generate_histogram(last_features))
-        elif plot_type == "bar":
-            return jsonify(generate_bar_chart(last_features))
-        elif plot_type == "pie":
-            return jsonify(generate_pie_chart(last_features))
-        elif plot_type == "line":
-            return jsonify(generate_line_chart(last_features))
-        else:
-            return jsonify({"error": "Invalid plot type"}), 400
-    except Exception as e:
-        print(f"Error generating plot: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+    payload = plot_cache.peek(job_id, plot_type) if job_id else None
+    if payload is None:
+        features = jobs.features(job_id) if job_id else None
+        # The entropy map needs no filesystem: it is what is left to look at for an encrypted container
+        if plot_type == "entropy":
+            if not features or not features.get("entropy"):
+                return jsonify({
+                    "error": "No entropy map for this image. Re-run the extraction with the entropy map enabled."
+                }), 400
+        elif not features or not features.get("file_types"):
+            return jsonify({
+                "error": "No data available. Please upload a disk image first."
+            }), 400
+
+        try:
+            payload = plot_cache.get(job_id, plot_type, lambda: features)
+        except Exception as e:
+            print(f"Error generating plot: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+
+    # Each encoding is its own representation, so the gzip body gets its own strong ETag
+    compress = len(payload.body) >= GZIP_MIN_SIZE and "gzip" in request.accept_encodings
+    etag = payload.etag + "-gz" if compress else payload.etag
+    headers = {
+        "ETag": f'"{etag}"',
+        "Vary": "Accept-Encoding",
+        # A job's plots never change; the latest-case URL must be revalidated
+        "Cache-Control": "private, max-age=86400" if request.args.get('job_id') else "no-cache"
+    }
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+
+    body = payload.body
+    if compress:
+        body = payload.gzipped()
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, mimetype="application/json", headers=headers)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,148 @@
+"""
+Batch intake of evidence that is already on the server.
+
+discover_evidence() turns a directory (searched recursively), a manifest
+file or a list of paths into evidence sets. The segments of an EWF set
+(image.E01, image.E02, ...) or of a split raw set (image.001, image.002,
+...) are grouped under their first segment, which is what the extractor
+opens; other images stand alone. Each set becomes one extraction job, and
+the images are read in place, never copied. The job hashes a set as one
+image: split raw sets concatenated, EWF sets over their decompressed media.
+
+A manifest is either a JSON list (of paths, or of objects with a "path")
+or a text file with one path per line; relative paths are resolved against
+the manifest's directory, and "#" starts a comment line.
+"""
+import json
+import os
+import re
+
+from extraction.split_raw import SEGMENT_PATTERN, segment_paths
+
+RAW_EXTENSIONS = (".dd", ".img", ".raw")
+EWF_SEGMENT = re.compile(r"^(?P<base>.*)\.[Ee](?P<number>\d{2}|[A-Za-z]{2})$")
+
+
+def _ewf_order(path):
+    """Sort key for EWF segment extensions: E01..E99, then EAA, EAB, ..."""
+    number = EWF_SEGMENT.match(path).group("number").upper()
+    if number.isdigit():
+        return int(number)
+    return 100 + (ord(number[0]) - ord("A")) * 26 + (ord(number[1]) - ord("A"))
+
+
+def _ewf_segments(path, listings=None):
+    """
+    All segments of the EWF set `path` belongs to, in order. `listings`
+    caches {directory: {base: [segment paths]}} across calls.
+    """
+    base = EWF_SEGMENT.match(path).group("base")
+    directory = os.path.dirname(path) or "."
+    listings = {} if listings is None else listings
+    if directory not in listings:
+        by_base = listings[directory] = {}
+        for name in os.listdir(directory):
+            candidate = os.path.join(directory, name)
+            match = EWF_SEGMENT.match(candidate)
+            if match and os.path.isfile(candidate):
+                by_base.setdefault(match.group("base"), []).append(candidate)
+    return sorted(listings[directory].get(base, []), key=_ewf_order)
+
+
+def _evidence_set(path, image_format, segments):
+    return {
+        "path": path,
+        "format": image_format,
+        "segments": len(segments),
+        "size": sum(os.path.getsize(s) for s in segments)
+    }
+
+
+def group_evidence(paths):
+    """
+    Group image files into evidence sets.
+
+    Returns (sets, skipped): sets are dicts with "path" (the file to
+    extract), "format", "segments" and "size"; skipped lists
+    {"path", "reason"} for incomplete sets.
+    """
+    sets = {}
+    skipped = []
+    paths = sorted(set(paths))
+    # Split raw segments by set, grouped once: {base: [segment paths given]}
+    raw_siblings = {}
+    for path in paths:
+        match = SEGMENT_PATTERN.match(path)
+        if match:
+            raw_siblings.setdefault(match.group("base"), []).append(path)
+
+    seen = set()  # (format, base) of every set already grouped or skipped
+    listings = {}  # directory listings shared by the EWF sets
+    for path in paths:
+        ewf = EWF_SEGMENT.match(path)
+        raw = SEGMENT_PATTERN.match(path)
+        if ewf:
+            if ("ewf", ewf.group("base")) in seen:
+                continue
+            seen.add(("ewf", ewf.group("base")))
+            segments = _ewf_segments(path, listings)
+            first = segments[0] if segments else path
+            if not first.lower().endswith(".e01"):
+                # Letter extensions (EAA, ...) only count as segments next to an .E01; "x.exe" is not evidence
+                if any(EWF_SEGMENT.match(s).group("number").isdigit() for s in segments):
+                    skipped.append({"path": first, "reason": "EWF set without its .E01 segment"})
+                continue
+            sets[first] = _evidence_set(first, "ewf", segments)
+        elif raw:
+            if ("raw", raw.group("base")) in seen:
+                continue
+            seen.add(("raw", raw.group("base")))
+            siblings = raw_siblings[raw.group("base")]
+            try:
+                segments = segment_paths(path)
+            except FileNotFoundError:
+                segments = []
+            first = segments[0] if segments else min(siblings)
+            if not segments or len(segments) < len(siblings):
+                skipped.append({"path": first, "reason": "Split raw set with missing segments"})
+                continue
+            sets[first] = _evidence_set(first, "split_raw", segments)
+        elif path.lower().endswith(RAW_EXTENSIONS):
+            sets[path] = _evidence_set(path, "raw", [path])
+    return list(sets.values()), skipped
+
+
+def read_manifest(manifest_path):
+    """Paths listed in a manifest file, made absolute."""
+    directory = os.path.dirname(os.path.abspath(manifest_path))
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        entries = json.loads(text)
+        paths = [e["path"] if isinstance(e, dict) else e for e in entries]
+    except ValueError:
+        paths = [line.strip() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    return [os.path.normpath(os.path.join(directory, p)) for p in paths]
+
+
+def discover_evidence(source):
+    """
+    Evidence sets in a directory, a manifest file, or a list of image paths.
+    Returns (sets, skipped) as group_evidence does.
+    """
+    if isinstance(source, (list, tuple)):
+        paths = [os.path.abspath(p) for p in source]
+    elif os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths.extend(os.path.join(root, name) for name in files)
+        paths = [os.path.abspath(p) for p in paths]
+    elif os.path.isfile(source):
+        paths = read_manifest(source)
+    else:
+        raise FileNotFoundError(f"No such directory or manifest: {source}")
+
+    missing = [p for p in paths if not os.path.isfile(p)]
+    sets, skipped = group_evidence([p for p in paths if os.path.isfile(p)])
+    skipped.extend({"path": p, "reason": "File not found"} for p in missing)
+    return sets, skipped
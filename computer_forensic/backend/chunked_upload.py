@@ -0,0 +1,290 @@
+"""
+Resumable chunked uploads for large disk images.
+
+An upload is created with the file's name and size and then sent as
+numbered fixed-size chunks, in any order and over several connections at
+once. Each chunk is written with os.pwrite straight to its offset in a
+preallocated <upload_id>.part file and hashed as it arrives. A chunk counts
+as received only once its data is synced and its receipt has been appended
+to <upload_id>.receipts (JSON lines; the first line describes the upload).
+Resending a received chunk first appends a revocation for it, so a resend
+that fails validation leaves the chunk missing rather than trusting bytes
+that were partly overwritten. Finalizing re-hashes every chunk against its
+receipt.
+
+An interrupted transfer asks which chunks are missing and sends only those.
+Receipts are read back from disk, so uploads survive a server restart.
+Uploads that see no chunk for `ttl` seconds are abandoned: their sparse
+part file and receipts are deleted the next time an upload is created.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from werkzeug.utils import secure_filename
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_CHUNK_SIZE = 256 * 1024 * 1024
+CHUNK_ALGORITHM = "sha256"
+READ_SIZE = 1024 * 1024  # bytes read from the request body per pwrite
+DEFAULT_UPLOAD_TTL = 24 * 3600  # seconds an upload may go without a chunk before it is discarded
+RESERVED_SUFFIXES = (".part", ".receipts")  # names of the upload bookkeeping files
+
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+def safe_upload_name(filename):
+    """The client's file name reduced to a safe basename; ValueError if nothing usable is left."""
+    name = secure_filename(os.path.basename(filename or ""))
+    if not name or name.lower().endswith(RESERVED_SUFFIXES):
+        raise ValueError("Invalid file name")
+    return name
+
+
+class ChunkedUpload:
+    """One upload in progress: its part file, chunk geometry and received chunks."""
+
+    def __init__(self, upload_id, directory, filename, size, chunk_size, received=None):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.size = size
+        self.chunk_size = chunk_size
+        self.chunk_count = max(1, -(-size // chunk_size))
+        self.part_path = os.path.join(directory, f"{upload_id}.part")
+        self.receipts_path = os.path.join(directory, f"{upload_id}.receipts")
+        self.received = received or {}  # chunk index -> hex digest
+        self.finalized = False
+        self._lock = threading.Lock()
+
+    def chunk_length(self, index):
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def missing(self):
+        with self._lock:
+            return [i for i in range(self.chunk_count) if i not in self.received]
+
+    @property
+    def complete(self):
+        return len(self.received) == self.chunk_count
+
+    def status(self):
+        missing = self.missing()
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "chunk_count": self.chunk_count,
+            "received": self.chunk_count - len(missing),
+            "missing": missing
+        }
+
+    def write_chunk(self, index, stream, expected_digest=None):
+        """
+        Write chunk `index` from a binary stream at its offset; returns its hex digest.
+
+        Raises ValueError for an out-of-range index, a body of the wrong
+        length or a digest mismatch; the chunk is then not recorded and can
+        simply be sent again.
+        """
+        if not 0 <= index < self.chunk_count:
+            raise ValueError(f"Chunk {index} out of range (0-{self.chunk_count - 1})")
+        with self._lock:
+            # Checked together with the revocation: once finalize has seen the upload complete,
+            # no chunk can be rewritten under it, and a chunk being rewritten keeps it incomplete
+            if self.finalized:
+                raise ValueError("Upload already finalized")
+            # The old receipt no longer describes what is on disk once the first byte is overwritten
+            self._revoke_locked([index])
+        length = self.chunk_length(index)
+        offset = index * self.chunk_size
+        hasher = hashlib.new(CHUNK_ALGORITHM)
+
+        fd = os.open(self.part_path, os.O_WRONLY)
+        try:
+            done = 0
+            while done < length:
+                data = stream.read(min(READ_SIZE, length - done))
+                if not data:
+                    break
+                hasher.update(data)
+                os.pwrite(fd, data, offset + done)
+                done += len(data)
+            if done != length or stream.read(1):
+                raise ValueError(f"Chunk {index} must be exactly {length} bytes")
+            digest = hasher.hexdigest()
+            if expected_digest and expected_digest.lower() != digest:
+                raise ValueError(f"Chunk {index} {CHUNK_ALGORITHM} mismatch")
+            # The receipt is only written once the data is on disk
+            getattr(os, "fdatasync", os.fsync)(fd)
+        finally:
+            os.close(fd)
+
+        with self._lock:
+            self._append_receipts([{"chunk": index, "digest": digest}])
+            self.received[index] = digest
+        return digest
+
+    def _append_receipts(self, entries):
+        with open(self.receipts_path, "a") as receipts:
+            receipts.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            receipts.flush()
+            os.fsync(receipts.fileno())
+
+    def _revoke(self, indexes):
+        """Forget received chunks (durably), so they are reported missing and must be sent again."""
+        with self._lock:
+            self._revoke_locked(indexes)
+
+    def _revoke_locked(self, indexes):
+        indexes = [i for i in indexes if i in self.received]
+        if indexes:
+            self._append_receipts([{"chunk": i, "revoked": True} for i in indexes])
+            for i in indexes:
+                del self.received[i]
+
+    def verify(self):
+        """Re-hash every chunk on disk against its receipt; mismatching chunks are revoked and returned."""
+        bad = []
+        with open(self.part_path, "rb") as f:
+            for index, expected in sorted(self.received.items()):
+                f.seek(index * self.chunk_size)
+                hasher = hashlib.new(CHUNK_ALGORITHM)
+                remaining = self.chunk_length(index)
+                while remaining:
+                    data = f.read(min(READ_SIZE, remaining))
+                    if not data:
+                        break
+                    hasher.update(data)
+                    remaining -= len(data)
+                if remaining or hasher.hexdigest() != expected:
+                    bad.append(index)
+        self._revoke(bad)
+        return bad
+
+    def manifest_digest(self):
+        """Digest over all chunk digests in order, identifying exactly what was received."""
+        manifest = hashlib.new(CHUNK_ALGORITHM)
+        for i in range(self.chunk_count):
+            manifest.update(bytes.fromhex(self.received[i]))
+        return manifest.hexdigest()
+
+
+class UploadManager:
+    """Creates, finds and finalizes chunked uploads kept in one directory."""
+
+    def __init__(self, directory, default_chunk_size=DEFAULT_CHUNK_SIZE, ttl=DEFAULT_UPLOAD_TTL):
+        self.directory = directory
+        self.default_chunk_size = default_chunk_size
+        self.ttl = ttl
+        self._uploads = {}
+        self._lock = threading.Lock()
+        self.expire_abandoned()
+
+    def create(self, filename, size, chunk_size=None):
+        """
+        Start an upload. The file name is reduced to a safe basename; ValueError
+        if none is left, if it would collide with the bookkeeping files, or for
+        an invalid size or chunk size.
+        """
+        filename = safe_upload_name(filename)
+        chunk_size = int(chunk_size or self.default_chunk_size)
+        if size < 0 or not 0 < chunk_size <= MAX_CHUNK_SIZE:
+            raise ValueError("Invalid upload size or chunk size")
+        self.expire_abandoned()
+        upload = ChunkedUpload(uuid.uuid4().hex, self.directory, filename, size, chunk_size)
+        # Sparse preallocation, so chunks can land at their offsets in any order
+        with open(upload.part_path, "wb") as f:
+            f.truncate(size)
+        with open(upload.receipts_path, "w") as f:
+            f.write(json.dumps({"filename": upload.filename, "size": size, "chunk_size": chunk_size}) + "\n")
+        with self._lock:
+            self._uploads[upload.upload_id] = upload
+        return upload
+
+    def get(self, upload_id):
+        """The upload with this id, reloaded from its receipts if needed; KeyError if unknown."""
+        if not _UPLOAD_ID.match(upload_id or ""):
+            raise KeyError(upload_id)
+        with self._lock:
+            upload = self._uploads.get(upload_id)
+            if upload is None:
+                upload = self._load(upload_id)
+                self._uploads[upload_id] = upload
+            return upload
+
+    def _load(self, upload_id):
+        receipts_path = os.path.join(self.directory, f"{upload_id}.receipts")
+        if not os.path.exists(receipts_path):
+            raise KeyError(upload_id)
+        received = {}
+        with open(receipts_path) as f:
+            header = json.loads(f.readline())
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # a torn last line from an interrupted write
+                if entry.get("revoked"):
+                    received.pop(entry["chunk"], None)
+                else:
+                    received[entry["chunk"]] = entry["digest"]
+        try:
+            filename = safe_upload_name(header["filename"])
+        except ValueError:
+            raise KeyError(upload_id)  # written before names were checked; left to expire
+        return ChunkedUpload(upload_id, self.directory, filename, header["size"], header["chunk_size"], received)
+
+    def expire_abandoned(self):
+        """Delete uploads whose receipts have not changed for `ttl` seconds; returns how many."""
+        cutoff = time.time() - self.ttl
+        expired = 0
+        for name in os.listdir(self.directory):
+            upload_id, ext = os.path.splitext(name)
+            if ext != ".receipts" or not _UPLOAD_ID.match(upload_id):
+                continue
+            receipts_path = os.path.join(self.directory, name)
+            with self._lock:
+                upload = self._uploads.get(upload_id)
+                try:
+                    if (upload is not None and upload.finalized) or os.path.getmtime(receipts_path) >= cutoff:
+                        continue
+                    os.remove(receipts_path)
+                except FileNotFoundError:
+                    continue
+                self._uploads.pop(upload_id, None)
+            try:
+                os.remove(os.path.join(self.directory, f"{upload_id}.part"))
+            except FileNotFoundError:
+                pass
+            expired += 1
+        return expired
+
+    def finalize(self, upload_id, destination):
+        """
+        Move a complete upload to `destination` and forget it.
+
+        Returns the manifest digest. Raises ValueError if chunks are still
+        missing, or if a chunk on disk no longer matches its receipt (that
+        chunk is then reported missing and has to be sent again).
+        """
+        upload = self.get(upload_id)
+        with upload._lock:
+            if not upload.complete:
+                raise ValueError(f"{upload.chunk_count - len(upload.received)} chunk(s) still missing")
+            upload.finalized = True
+        bad = upload.verify()
+        if bad:
+            with upload._lock:
+                upload.finalized = False
+            raise ValueError(f"Chunk(s) {', '.join(map(str, bad))} do not match their receipts; send them again")
+        manifest = upload.manifest_digest()
+        os.replace(upload.part_path, destination)
+        os.remove(upload.receipts_path)
+        with self._lock:
+            self._uploads.pop(upload_id, None)
+        return manifest
@@ -1,16 +1,93 @@
+import os
+import threading
+import time
+import uuid
+
 from database.mongo_handler import insert_mongodb
 from database.postgres_handler import insert_postgres
 from database.neo4j_handler import insert_neo4j
 from database.vector_handler import insert_vector
 
-def insert_to_db(db_type, features):
-    if db_type == 'mongodb':
-        insert_mongodb(features)
-    elif db_type == 'postgres':
-        insert_postgres(features)
-    elif db_type == 'neo4j':
-        insert_neo4j(features)
-    elif db_type == 'vector':
-        insert_vector(features)
-    else:
-        print(f"Unknown DB type: {db_type}")
+WRITERS = {
+    'mongodb': insert_mongodb,
+    'postgres': insert_postgres,
+    'neo4j': insert_neo4j,
+    'vector': insert_vector
+}
+
+WRITE_TIMEOUT = float(os.environ.get("FORENSIC_DB_WRITE_TIMEOUT", 30))  # seconds per backend, retries included
+WRITE_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5  # seconds before the first retry, doubled after each failure
+
+
+def _write_with_retry(writer, features, key, start, deadline, attempts, backoff, outcome):
+    delay = backoff
+    try:
+        for attempt in range(1, attempts + 1):
+            outcome["attempts"] = attempt
+            try:
+                writer(features, key)
+                outcome["ok"] = True
+                outcome.pop("error", None)
+                return
+            except Exception as e:
+                outcome["error"] = str(e)
+            if attempt == attempts or time.monotonic() + delay >= deadline:
+                return
+            time.sleep(delay)
+            delay *= 2
+    finally:
+        outcome["latency_ms"] = round((time.monotonic() - start) * 1000, 2)
+
+
+def insert_all(databases, features, key=None, timeout=WRITE_TIMEOUT, attempts=WRITE_ATTEMPTS,
+               backoff=RETRY_BACKOFF):
+    """
+    Write `features` to every backend in `databases` at the same time.
+
+    `key` (e.g. the job id; a random one if omitted) identifies the write.
+    Handlers store it as the record's key and replace an existing record
+    with that key, so a retry after a write that committed but whose
+    acknowledgement was lost neither fails nor leaves a duplicate.
+
+    Each backend gets `timeout` seconds for up to `attempts` tries, with
+    exponential backoff between them, so the whole call takes about as long
+    as the slowest backend. A write still running at its deadline is
+    abandoned and reported as timed out. It may still commit: its daemon
+    thread finishes or fails on its own, bounded for PostgreSQL by the
+    pool's acquire and statement timeouts (database.connection_manager).
+
+    Returns {db: {"status": "ok" | "error" | "timeout", "attempts",
+    "latency_ms", "error"?}}.
+    """
+    key = key or uuid.uuid4().hex
+    start = time.monotonic()
+    deadline = start + timeout
+    outcomes = {}
+    threads = {}
+    for db in dict.fromkeys(databases):
+        writer = WRITERS.get(db)
+        if writer is None:
+            outcomes[db] = {"status": "error", "attempts": 0, "latency_ms": 0, "error": "Unknown DB type"}
+            continue
+        outcome = outcomes[db] = {"ok": False, "attempts": 0}
+        # Each backend gets its own copy, so no handler sees fields another one added
+        thread = threading.Thread(
+            target=_write_with_retry,
+            args=(writer, dict(features), key, start, deadline, attempts, backoff, outcome),
+            name=f"db-write-{db}",
+            daemon=True
+        )
+        thread.start()
+        threads[db] = thread
+
+    for db, thread in threads.items():
+        thread.join(max(0, deadline - time.monotonic()))
+        outcome = outcomes[db]
+        if thread.is_alive():
+            outcomes[db] = {"status": "timeout", "attempts": outcome["attempts"],
+                            "latency_ms": round((time.monotonic() - start) * 1000, 2),
+                            "error": f"No response within {timeout:g}s (may have committed)"}
+        else:
+            outcomes[db] = {"status": "ok" if outcome.pop("ok") else "error", **outcome}
+    return outcomes
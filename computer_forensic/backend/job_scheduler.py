@@ -0,0 +1,314 @@
+"""
+Bounded job scheduler for extraction jobs.
+
+A fixed pool of worker threads takes jobs from a shared queue. The next job
+is the highest-priority runnable one; among equal priorities, the examiner
+with the fewest running jobs goes first, then the one served least
+recently (oldest job first within an examiner). Examiners therefore take
+turns, and one examiner's burst of uploads cannot starve the others.
+
+A job that reads an image holds an I/O slot on the device the image lives
+on; with one slot per device, two full-image passes never compete for the
+same disk, while jobs on other devices keep running.
+
+Running jobs are paused and cancelled cooperatively: the job calls
+checkpoint() (the extraction does so on every progress update), which
+raises JobCancelled or blocks while the job is paused. A paused job gives
+its I/O slot back until it is resumed.
+
+State changes are recorded under the scheduler lock and reported to
+on_state_change only after it is released, in the order they happened,
+so the callback may call back into the scheduler.
+"""
+import itertools
+import os
+import threading
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_IO_SLOTS_PER_DEVICE = 1
+
+QUEUED = "queued"
+RUNNING = "running"
+PAUSED = "paused"
+CANCELLED = "cancelled"
+FINISHED = "finished"
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a job by checkpoint() once the job has been cancelled.
+
+    Like asyncio.CancelledError it is not an Exception, so the many
+    `except Exception` blocks in the extraction code do not swallow it.
+    """
+
+
+def device_of(path):
+    """Identifier of the storage device holding `path` (used for I/O slots)."""
+    try:
+        return os.stat(path).st_dev
+    except OSError:
+        return None
+
+
+class _Entry:
+    __slots__ = ("job_id", "fn", "args", "kwargs", "priority", "examiner", "device", "seq", "state",
+                 "paused", "cancelled", "holds_slot")
+
+    def __init__(self, job_id, fn, args, kwargs, priority, examiner, device, seq):
+        self.job_id = job_id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.examiner = examiner
+        self.device = device
+        self.seq = seq
+        self.state = QUEUED
+        self.paused = False
+        self.cancelled = False
+        self.holds_slot = False
+
+
+class JobScheduler:
+    """Fixed-size worker pool with priorities, per-examiner fairness and per-device I/O slots."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, io_slots_per_device=DEFAULT_IO_SLOTS_PER_DEVICE,
+                 on_state_change=None):
+        self.workers = workers
+        self.io_slots_per_device = io_slots_per_device
+        self.on_state_change = on_state_change  # callback(job_id, state)
+        self._cond = threading.Condition()
+        self._entries = {}
+        self._queue = []
+        self._io_in_use = {}
+        self._running_per_examiner = {}
+        self._last_served = {}  # examiner -> dispatch counter value of their last started job
+        self._dispatches = itertools.count()
+        self._seq = itertools.count()
+        self._threads = []
+        self._stopping = False
+        self._transitions = []  # (job_id, state) not yet reported to on_state_change
+        self._notifying = False
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+
+    # ---------------------------
+    # Submission and control
+    # ---------------------------
+    def submit(self, job_id, fn, *args, priority=0, examiner="default", device=None, **kwargs):
+        """
+        Queue fn(*args, **kwargs) as job `job_id`.
+
+        Higher `priority` runs first. `device` is the I/O slot the job needs
+        (see device_of); None means the job does no heavy I/O.
+        """
+        with self._cond:
+            entry = _Entry(job_id, fn, args, kwargs, priority, examiner, device, next(self._seq))
+            self._entries[job_id] = entry
+            self._queue.append(entry)
+            self._cond.notify_all()
+        self._notify()
+
+    def cancel(self, job_id):
+        """Cancel a queued job at once, or ask a running one to stop. False if the job is already done."""
+        with self._cond:
+            entry = self._entries.get(job_id)
+            if entry is None or entry.state in (FINISHED, CANCELLED):
+                return False
+            entry.cancelled = True
+            entry.paused = False
+            if entry in self._queue:
+                self._queue.remove(entry)
+                self._set_state(entry, CANCELLED)
+                self._forget(entry)
+            self._cond.notify_all()
+        self._notify()
+        return True
+
+    def pause(self, job_id):
+        with self._cond:
+            entry = self._entries.get(job_id)
+            if entry is None or entry.state not in (QUEUED, RUNNING):
+                return False
+            entry.paused = True
+            if entry.state == QUEUED:
+                self._set_state(entry, PAUSED)
+            self._cond.notify_all()
+        self._notify()
+        return True
+
+    def resume(self, job_id):
+        with self._cond:
+            entry = self._entries.get(job_id)
+            if entry is None or not entry.paused:
+                return False
+            entry.paused = False
+            if entry in self._queue:
+                self._set_state(entry, QUEUED)
+            self._cond.notify_all()
+        self._notify()
+        return True
+
+    def checkpoint(self, job_id):
+        """
+        Called from inside a running job: raise JobCancelled if it was cancelled,
+        and block while it is paused (releasing its I/O slot meanwhile).
+        """
+        with self._cond:
+            entry = self._entries.get(job_id)
+            if entry is None or entry.state not in (RUNNING, PAUSED):
+                return
+            paused = entry.paused and not entry.cancelled
+            if paused:
+                self._release_slot(entry)
+                self._set_state(entry, PAUSED)
+                self._cond.notify_all()  # another job may take the device meanwhile
+        if paused:
+            # Report the pause before blocking on the resume
+            self._notify()
+            with self._cond:
+                while entry.paused and not entry.cancelled:
+                    self._cond.wait()
+                # Wait for the device again before continuing
+                while not entry.cancelled and not self._slot_free(entry):
+                    self._cond.wait()
+                if not entry.cancelled:
+                    self._take_slot(entry)
+                    self._set_state(entry, RUNNING)
+            self._notify()
+        if entry.cancelled:
+            raise JobCancelled(job_id)
+
+    def queue_position(self, job_id):
+        """
+        Estimated 1-based position among jobs waiting to start, or None.
+
+        Assumes the jobs running now are still running when the queue drains.
+        """
+        with self._cond:
+            entry = self._entries.get(job_id)
+            if entry is None or entry not in self._queue:
+                return None
+            if entry.paused:
+                return None
+            # Replay dispatch order: each start moves its examiner to the back of the rotation
+            waiting = [e for e in self._queue if not e.paused]
+            served = dict(self._last_served)
+            counter = max(served.values(), default=-1)
+            position = 0
+            while waiting:
+                position += 1
+                nxt = min(waiting, key=lambda e: self._dispatch_key(e, served))
+                if nxt is entry:
+                    return position
+                waiting.remove(nxt)
+                counter += 1
+                served[nxt.examiner] = counter
+            return None
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "queued": sum(1 for e in self._queue if not e.paused),
+                "paused": sum(1 for e in self._entries.values() if e.state == PAUSED),
+                "running": sum(1 for e in self._entries.values() if e.state == RUNNING),
+                "busy_devices": sum(1 for n in self._io_in_use.values() if n)
+            }
+
+    # ---------------------------
+    # Dispatch
+    # ---------------------------
+    def _dispatch_key(self, entry, last_served=None):
+        served = self._last_served if last_served is None else last_served
+        return (-entry.priority, self._running_per_examiner.get(entry.examiner, 0),
+                served.get(entry.examiner, -1), entry.seq)
+
+    def _slot_free(self, entry):
+        return entry.device is None or self._io_in_use.get(entry.device, 0) < self.io_slots_per_device
+
+    def _take_slot(self, entry):
+        if entry.device is not None:
+            self._io_in_use[entry.device] = self._io_in_use.get(entry.device, 0) + 1
+            entry.holds_slot = True
+
+    def _release_slot(self, entry):
+        if entry.holds_slot:
+            self._io_in_use[entry.device] -= 1
+            entry.holds_slot = False
+
+    def _next_runnable(self):
+        runnable = [e for e in self._queue if not e.paused and self._slot_free(e)]
+        return min(runnable, key=self._dispatch_key) if runnable else None
+
+    def _set_state(self, entry, state):
+        # Called with the lock held; _notify() reports the change once it is released
+        entry.state = state
+        if self.on_state_change:
+            self._transitions.append((entry.job_id, state))
+
+    def _notify(self):
+        """Report recorded state changes; call without holding the lock."""
+        with self._cond:
+            if self._notifying or not self._transitions:
+                return  # the thread already reporting picks these up too, keeping their order
+            self._notifying = True
+        while True:
+            with self._cond:
+                if not self._transitions:
+                    self._notifying = False
+                    return
+                transitions, self._transitions = self._transitions, []
+            for job_id, state in transitions:
+                try:
+                    self.on_state_change(job_id, state)
+                except Exception as e:
+                    print(f"State callback for job {job_id} failed: {e}")
+
+    def _forget(self, entry):
+        # Keep finished entries out of memory; callers track results themselves
+        self._entries.pop(entry.job_id, None)
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                entry = self._next_runnable()
+                while entry is None and not self._stopping:
+                    self._cond.wait()
+                    entry = self._next_runnable()
+                if self._stopping:
+                    return
+                self._queue.remove(entry)
+                self._take_slot(entry)
+                self._running_per_examiner[entry.examiner] = self._running_per_examiner.get(entry.examiner, 0) + 1
+                self._last_served[entry.examiner] = next(self._dispatches)
+                self._set_state(entry, RUNNING)
+            self._notify()
+
+            try:
+                entry.fn(*entry.args, **entry.kwargs)
+            except JobCancelled:
+                pass
+            except Exception as e:
+                print(f"Job {entry.job_id} failed: {e}")
+            finally:
+                with self._cond:
+                    self._release_slot(entry)
+                    self._running_per_examiner[entry.examiner] -= 1
+                    self._set_state(entry, CANCELLED if entry.cancelled else FINISHED)
+                    self._forget(entry)
+                    self._cond.notify_all()
+                self._notify()
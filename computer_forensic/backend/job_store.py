@@ -0,0 +1,288 @@
+"""
+Durable registry of extraction jobs.
+
+Jobs live in an SQLite database (WAL mode, so status reads never wait for
+a writer). In memory the store keeps only:
+
+    - every unfinished job (worker threads update these objects in place)
+    - a bounded LRU of recently used finished jobs
+    - a small LRU of feature sets, which are much larger than job records
+
+Everything else is loaded from disk on demand by primary key, so lookups
+stay O(1) and memory stays flat however many jobs have run. Finished jobs
+and their features are deleted once they are older than the TTL.
+
+Rows are written on status changes, not on every progress update. After a
+restart, recover() returns the jobs that had not finished so they can be
+queued again.
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+DEFAULT_HOT_JOBS = 256                  # finished jobs kept in memory
+DEFAULT_HOT_FEATURES = 8                # feature sets kept in memory
+DEFAULT_JOB_TTL = 7 * 24 * 3600         # seconds a finished job is kept
+EVICTION_INTERVAL = 3600                # seconds between TTL sweeps
+
+FINISHED_STATES = ("completed", "error", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id   TEXT PRIMARY KEY,
+    filename TEXT,
+    status   TEXT,
+    progress INTEGER,
+    message  TEXT,
+    result   TEXT,
+    error    TEXT,
+    params   TEXT,
+    created  REAL,
+    updated  REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_updated ON jobs (status, updated);
+CREATE TABLE IF NOT EXISTS features (
+    job_id   TEXT PRIMARY KEY,
+    data     BLOB,
+    updated  REAL
+);
+CREATE INDEX IF NOT EXISTS features_updated ON features (updated);
+CREATE TABLE IF NOT EXISTS batches (
+    batch_id TEXT PRIMARY KEY,
+    source   TEXT,
+    entries  TEXT,
+    created  REAL
+);
+"""
+
+
+class ExtractionJob:
+    __slots__ = ("job_id", "filename", "status", "progress", "message", "result", "error", "params",
+                 "created", "version", "saved_status")
+
+    def __init__(self, job_id, filename, params=None):
+        self.job_id = job_id
+        self.filename = filename
+        self.status = "uploading"  # uploading, queued, processing, paused, completed, cancelled, error
+        self.progress = 0
+        self.message = "Uploading file..."
+        self.result = None
+        self.error = None
+        self.params = params or {}  # submission arguments, kept so unfinished jobs can be re-queued
+        self.created = time.time()
+        self.version = 0  # bumped on every change, so event streams can tell what they have sent
+        self.saved_status = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+
+class JobStore:
+    """SQLite-backed job registry with in-memory hot sets."""
+
+    def __init__(self, path, hot_size=DEFAULT_HOT_JOBS, hot_features=DEFAULT_HOT_FEATURES, ttl=DEFAULT_JOB_TTL,
+                 on_evict=None):
+        self.path = path
+        self.hot_size = hot_size
+        self.hot_features = hot_features
+        self.ttl = ttl
+        self.on_evict = on_evict  # called with the ids of expired jobs, to drop anything derived from them
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._active = {}
+        self._hot = OrderedDict()
+        self._features = OrderedDict()
+        self._last_sweep = 0.0
+        self.evict_expired()
+
+    # ---------------------------
+    # Jobs
+    # ---------------------------
+    def add(self, job):
+        with self._lock:
+            self._active[job.job_id] = job
+            self._write(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._active.get(job_id)
+            if job is not None:
+                return job
+            job = self._hot.get(job_id)
+            if job is not None:
+                self._hot.move_to_end(job_id)
+                return job
+            row = self._db.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = self._from_row(row)
+            if job.finished:
+                self._remember(job)
+            else:
+                self._active[job_id] = job
+            return job
+
+    def __getitem__(self, job_id):
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        return job
+
+    def __contains__(self, job_id):
+        return self.get(job_id) is not None
+
+    def save(self, job, force=False):
+        """
+        Persist a job if its status changed since it was last written (or if `force`).
+        Finished jobs move from the active set to the LRU.
+        """
+        with self._lock:
+            if not force and job.status == job.saved_status:
+                return
+            self._write(job)
+            if job.finished:
+                self._active.pop(job.job_id, None)
+                self._remember(job)
+                if time.time() - self._last_sweep > EVICTION_INTERVAL:
+                    self.evict_expired()
+
+    def recover(self):
+        """Unfinished jobs from an earlier run, reset to queued, oldest first."""
+        placeholders = ",".join("?" * len(FINISHED_STATES))
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT * FROM jobs WHERE status NOT IN ({placeholders}) ORDER BY created", FINISHED_STATES
+            ).fetchall()
+            recovered = []
+            for row in rows:
+                job = self._from_row(row)
+                if job.job_id in self._active:
+                    continue
+                job.status = "queued"
+                job.progress = 0
+                job.message = "Recovered after restart, waiting in queue..."
+                self._active[job.job_id] = job
+                self._write(job)
+                recovered.append(job)
+            return recovered
+
+    def _remember(self, job):
+        self._hot[job.job_id] = job
+        self._hot.move_to_end(job.job_id)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def _write(self, job):
+        self._db.execute(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job.job_id, job.filename, job.status, job.progress, job.message,
+             json.dumps(job.result) if job.result is not None else None, job.error,
+             json.dumps(job.params), job.created, time.time())
+        )
+        job.saved_status = job.status
+
+    @staticmethod
+    def _from_row(row):
+        job_id, filename, status, progress, message, result, error, params, created, _ = row
+        job = ExtractionJob(job_id, filename, json.loads(params) if params else {})
+        job.status = status
+        job.progress = progress
+        job.message = message
+        job.result = json.loads(result) if result else None
+        job.error = error
+        job.created = created
+        job.saved_status = status
+        return job
+
+    # ---------------------------
+    # Features
+    # ---------------------------
+    def save_features(self, job_id, features):
+        data = zlib.compress(json.dumps(features, default=str).encode(), 6)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO features VALUES (?, ?, ?)", (job_id, data, time.time()))
+            self._cache_features(job_id, features)
+
+    def latest_features_job(self):
+        """Id of the job whose features were stored last, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT job_id FROM features ORDER BY updated DESC LIMIT 1").fetchone()
+            return row[0] if row else None
+
+    def features(self, job_id=None):
+        """Features of a job, or of the most recently finished extraction if job_id is None."""
+        with self._lock:
+            if job_id is None:
+                job_id = self.latest_features_job()
+                if job_id is None:
+                    return None
+            features = self._features.get(job_id)
+            if features is not None:
+                self._features.move_to_end(job_id)
+                return features
+            row = self._db.execute("SELECT data FROM features WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            features = json.loads(zlib.decompress(row[0]))
+            self._cache_features(job_id, features)
+            return features
+
+    def _cache_features(self, job_id, features):
+        self._features[job_id] = features
+        self._features.move_to_end(job_id)
+        while len(self._features) > self.hot_features:
+            self._features.popitem(last=False)
+
+    # ---------------------------
+    # Batches
+    # ---------------------------
+    def save_batch(self, batch_id, source, entries):
+        """Record a batch: its source (directory or manifest) and one entry per submitted job."""
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?)",
+                             (batch_id, source, json.dumps(entries), time.time()))
+
+    def batch(self, batch_id):
+        """{"batch_id", "source", "entries", "created"} or None."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM batches WHERE batch_id = ?", (batch_id,)).fetchone()
+        if row is None:
+            return None
+        return {"batch_id": row[0], "source": row[1], "entries": json.loads(row[2]), "created": row[3]}
+
+    # ---------------------------
+    # Eviction
+    # ---------------------------
+    def evict_expired(self):
+        """Delete finished jobs (and their features) last updated more than `ttl` seconds ago, and older batches."""
+        cutoff = time.time() - self.ttl
+        placeholders = ",".join("?" * len(FINISHED_STATES))
+        with self._lock:
+            expired = [row[0] for row in self._db.execute(
+                f"SELECT job_id FROM jobs WHERE status IN ({placeholders}) AND updated < ?",
+                (*FINISHED_STATES, cutoff)
+            )]
+            if expired:
+                self._db.execute("BEGIN")
+                self._db.executemany("DELETE FROM jobs WHERE job_id = ?", ((j,) for j in expired))
+                self._db.executemany("DELETE FROM features WHERE job_id = ?", ((j,) for j in expired))
+                self._db.execute("COMMIT")
+                for job_id in expired:
+                    self._hot.pop(job_id, None)
+                    self._features.pop(job_id, None)
+            self._db.execute("DELETE FROM batches WHERE created < ?", (cutoff,))
+            self._last_sweep = time.time()
+        if expired and self.on_evict is not None:
+            self.on_evict(expired)
+        return len(expired)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
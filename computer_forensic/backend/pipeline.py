@@ -0,0 +1,175 @@
+"""
+Runs the CPU-heavy part of an extraction (parsing and feature building) in
+worker processes, so it never holds the API process's GIL.
+
+The scheduler's worker threads stay in the API process and call
+run_extraction(), which submits the job to a shared process pool and then
+relays progress from the worker to the caller's progress callback. Each job
+gets a channel of manager-backed objects:
+
+    events     progress updates (percent, message) from the worker
+    running    cleared while the job is paused; the worker waits on it
+    cancelled  set to stop the worker at its next progress update
+
+Only the finished features cross back into the API process.
+"""
+import multiprocessing as mp
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from backend.job_scheduler import JobCancelled, DEFAULT_WORKERS
+
+POLL_INTERVAL = 0.5   # seconds between pause/cancel checks while a worker is quiet
+
+_lock = threading.Lock()
+_pool = None
+_manager = None
+_pool_workers = DEFAULT_WORKERS
+_channels = {}
+
+
+def configure(workers):
+    """Set the pool size; call before the first job (normally the scheduler's worker count)."""
+    global _pool_workers
+    _pool_workers = workers
+
+
+def _get_pool():
+    global _pool, _manager
+    with _lock:
+        if _manager is None:
+            _manager = mp.get_context("spawn").Manager()
+        if _pool is None:
+            # Spawned (not forked): the API process has threads and open image handles
+            _pool = ProcessPoolExecutor(max_workers=_pool_workers, mp_context=mp.get_context("spawn"))
+        return _pool, _manager
+
+
+def _reset_pool(pool):
+    global _pool
+    with _lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown():
+    global _pool, _manager
+    with _lock:
+        pool, manager, _pool, _manager = _pool, _manager, None, None
+    if pool:
+        pool.shutdown(cancel_futures=True)
+    if manager:
+        manager.shutdown()
+
+
+class _Channel:
+    def __init__(self, manager):
+        self.events = manager.Queue()
+        self.running = manager.Event()
+        self.cancelled = manager.Event()
+        self.running.set()
+
+
+def set_paused(job_id, paused):
+    """Pause or resume the worker process of a running job (no-op for unknown jobs)."""
+    channel = _channels.get(job_id)
+    if channel is None:
+        return
+    if paused:
+        channel.running.clear()
+    else:
+        channel.running.set()
+
+
+def _extract(job_id, image_path, options, artifact_databases, events, running, cancelled):
+    """Worker process: parse the image, build its features and bulk-load its file table."""
+    from extraction.extractor import parse_disk_image
+    from feature_builder.feature_builder import build_features
+
+    def progress(percent, message):
+        running.wait()
+        if cancelled.is_set():
+            raise JobCancelled()
+        events.put((percent, message))
+
+    parsed_data = parse_disk_image(image_path, progress_callback=progress, **options)
+    if "error" in parsed_data:
+        return parsed_data
+    progress(70, "Building features...")
+    outcome = {"features": build_features(parsed_data)}
+
+    table = parsed_data.get("file_table")
+    if artifact_databases and table is not None and len(table):
+        from database.bulk_ingest import ingest_artifacts
+
+        progress(72, "Loading file artifacts...")
+        outcome["artifacts"] = ingest_artifacts(
+            table, job_id, artifact_databases,
+            progress_callback=lambda db, done, total: progress(
+                72 + int(7 * done / total), f"Loading file artifacts into {db} ({done}/{total})..."
+            )
+        )
+    return outcome
+
+
+def _drain(events, progress_callback):
+    # Updates put just before the worker returned
+    while True:
+        try:
+            percent, message = events.get_nowait()
+        except queue.Empty:
+            return
+        progress_callback(percent, message)
+
+
+def run_extraction(job_id, image_path, progress_callback, artifact_databases=(), **options):
+    """
+    Parse `image_path` in a worker process and return {"features": ...} or {"error": ...}.
+
+    The file table is bulk-loaded (with `job_id` as case id) into each of
+    `artifact_databases` that database.bulk_ingest supports; the per-database
+    load statistics are returned under "artifacts".
+
+    progress_callback(percent, message) runs in the calling thread for every
+    update from the worker, and additionally every POLL_INTERVAL seconds with
+    None arguments while the worker is quiet, so the caller can check for
+    pause and cancel requests. If it raises JobCancelled the worker is
+    stopped and the exception propagates.
+    """
+    pool, manager = _get_pool()
+    channel = _Channel(manager)
+    _channels[job_id] = channel
+    try:
+        future = pool.submit(_extract, job_id, image_path, options, list(artifact_databases),
+                             channel.events, channel.running, channel.cancelled)
+        try:
+            while True:
+                try:
+                    percent, message = channel.events.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    if future.done():
+                        _drain(channel.events, progress_callback)
+                        break
+                    progress_callback(None, None)
+                    continue
+                progress_callback(percent, message)
+        except JobCancelled:
+            channel.cancelled.set()
+            channel.running.set()
+            try:
+                future.result()
+            except (JobCancelled, Exception):
+                pass
+            raise
+
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A worker died (e.g. a crash in a native image library); start a fresh pool for later jobs
+            _reset_pool(pool)
+            raise RuntimeError("Extraction worker process terminated unexpectedly")
+    finally:
+        _channels.pop(job_id, None)
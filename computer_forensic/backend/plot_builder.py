@@ -171,3 +171,56 @@ def generate_line_chart(features):
             }
         }
     }
+
+
+def _offset_label(offset):
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if offset < 1024:
+            return f"{offset:.0f} {unit}" if unit == "B" else f"{offset:.1f} {unit}"
+        offset /= 1024
+    return f"{offset:.1f} PB"
+
+
+def generate_entropy_chart(features):
+    """Generate line chart data from the per-block entropy map"""
+    profile = features.get("entropy", {}).get("profile", [])
+
+    labels = [_offset_label(point["offset"]) for point in profile]
+    values = [point["entropy"] for point in profile]
+
+    return {
+        'chartData': {
+            'labels': labels,
+            'datasets': [{
+                'label': 'Max Entropy (bits/byte)',
+                'data': values,
+                'backgroundColor': 'rgba(255, 99, 132, 0.2)',
+                'borderColor': '#FF6384',
+                'borderWidth': 1,
+                'fill': True,
+                'tension': 0,
+                'pointRadius': 0
+            }]
+        },
+        'chartOptions': {
+            'responsive': True,
+            'maintainAspectRatio': True,
+            'plugins': {
+                'legend': {'display': True, 'position': 'top'},
+                'title': {'display': True, 'text': 'Image Entropy Map (≥ 7.5 suggests encrypted or compressed data)'}
+            },
+            'scales': {
+                'y': {
+                    'min': 0,
+                    'max': 8,
+                    'title': {'display': True, 'text': 'Entropy (bits/byte)'}
+                },
+                'x': {
+                    'title': {'display': True, 'text': 'Image Offset'},
+                    'grid': {
+                        'display': False
+                    }
+                }
+            }
+        }
+    }
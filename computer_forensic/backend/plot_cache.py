@@ -0,0 +1,99 @@
+"""
+Memoized Chart.js payloads per job and plot type.
+
+A finished job's features never change, so each plot is generated and
+serialized once; later requests reuse the encoded body, its gzip form and
+its ETag (a digest of the body). The cache is a bounded LRU.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from backend.plot_builder import (
+    generate_histogram,
+    generate_bar_chart,
+    generate_pie_chart,
+    generate_line_chart,
+    generate_entropy_chart
+)
+
+DEFAULT_CACHE_ENTRIES = 512
+GZIP_MIN_SIZE = 1024  # smaller bodies are sent uncompressed
+
+PLOT_GENERATORS = {
+    "histogram": generate_histogram,
+    "bar": generate_bar_chart,
+    "pie": generate_pie_chart,
+    "line": generate_line_chart,
+    "entropy": generate_entropy_chart
+}
+
+
+class PlotPayload:
+    __slots__ = ("body", "etag", "_gzipped")
+
+    def __init__(self, body):
+        self.body = body
+        self.etag = hashlib.sha256(body).hexdigest()[:32]  # unquoted, as werkzeug expects
+        self._gzipped = None
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, 6)
+        return self._gzipped
+
+
+class PlotCache:
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def peek(self, job_id, plot_type):
+        """Cached payload or None, without generating anything."""
+        with self._lock:
+            payload = self._entries.get((job_id, plot_type))
+            if payload is not None:
+                self._entries.move_to_end((job_id, plot_type))
+                self.hits += 1
+            return payload
+
+    def get(self, job_id, plot_type, load_features):
+        """
+        Payload for `plot_type` of job `job_id`, generating it on first use.
+
+        load_features() is only called on a miss. Raises KeyError for an
+        unknown plot type.
+        """
+        generator = PLOT_GENERATORS[plot_type]
+        key = (job_id, plot_type)
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        body = json.dumps(generator(load_features()), separators=(",", ":")).encode()
+        payload = PlotPayload(body)
+        with self._lock:
+            self._entries[key] = payload
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def discard(self, job_ids):
+        """Drop every cached plot of these jobs."""
+        job_ids = set(job_ids)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in job_ids]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,102 @@
+"""
+Benchmark the bulk $MFT parser against the pytsk3 directory walk.
+
+Usage:
+    python bench_mft.py [image_path] [--files N] [--per-dir N] [--repeat N]
+
+Without an image path a temporary NTFS volume with --files files spread over
+directories of --per-dir entries is generated (tests/ntfs_image.py). Both
+paths must yield the same set of (path, inode) pairs; the fast path is also
+run without NumPy to show what the array parse contributes, and the $MFT
+parse is timed on its own (the record dicts cost the same on both paths).
+
+The generated image sits in the page cache, where pytsk3 loads each MFT
+entry cheaply; on a disk image that is not cached, the directory walk also
+pays a random read per entry while $MFT is read sequentially.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from extraction import mft_parser
+from extraction.fs_walker import iter_filesystems, open_image, walk_filesystem
+from tests.ntfs_image import NtfsImage
+
+
+def make_test_image(files, per_dir):
+    image = NtfsImage()
+    directory = None
+    for i in range(files):
+        if i % per_dir == 0:
+            directory = image.add_file(f"dir{i // per_dir:05d}", is_dir=True)
+        image.add_file(f"file{i:07d}.{('txt', 'dll', 'jpg', 'exe')[i % 4]}", directory, size=i % 700)
+    fd, path = tempfile.mkstemp(suffix=".img")
+    os.close(fd)
+    image.build(path)
+    return path
+
+
+def timed(label, records, repeat):
+    """Best of `repeat` runs over a record iterator factory; returns ({(path, inode)}, seconds)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = list(records())
+        elapsed = time.perf_counter() - start
+        # Keep only the keys so earlier results do not inflate the garbage collector's work in later runs
+        keys = {(r["path"], r["inode"]) for r in result}
+        del result
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<24}: {best:7.2f} s  {len(keys) / best:10.0f} records/s")
+    return keys, best
+
+
+def timed_parse(label, fs, use_numpy, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mft_parser.parse_mft(fs, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {label:<24}: {best:7.2f} s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image", nargs="?", help="NTFS image (default: generated temp image)")
+    parser.add_argument("--files", type=int, default=100_000, help="Files in the generated image")
+    parser.add_argument("--per-dir", type=int, default=200, help="Files per directory in the generated image")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per method; the best is reported")
+    args = parser.parse_args()
+
+    path = args.image or make_test_image(args.files, args.per_dir)
+    try:
+        img = open_image(path)
+        for offset, fs in iter_filesystems(img):
+            if not mft_parser.is_ntfs(fs):
+                continue
+            print(f"Benchmarking NTFS volume at offset {offset} of {path}")
+            walk_keys, walk_seconds = timed("pytsk3 directory walk", lambda: walk_filesystem(fs), args.repeat)
+            fast_keys, fast_seconds = timed("$MFT records, NumPy", lambda: mft_parser.iter_mft_records(fs),
+                                            args.repeat)
+            timed("$MFT records, struct", lambda: mft_parser.iter_mft_records(fs, use_numpy=False), args.repeat)
+            parse_seconds = timed_parse("$MFT parse only, NumPy", fs, True, args.repeat)
+            timed_parse("$MFT parse only, struct", fs, False, args.repeat)
+            print(f"  speedup (records)       : {walk_seconds / fast_seconds:.1f}x")
+            print(f"  speedup (parse only)    : {walk_seconds / parse_seconds:.1f}x")
+
+            missing = walk_keys - fast_keys
+            extra = {k for k in fast_keys - walk_keys if not k[0].startswith(mft_parser.ORPHAN_DIR + "/")}
+            if missing or extra:
+                print(f"  ✗ Record mismatch: {len(missing)} missing, {len(extra)} extra")
+            else:
+                print(f"  ✓ Same {len(walk_keys)} records")
+    finally:
+        if not args.image:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,14 @@
+import argparse
 import os
 import pyewf
 import pytsk3
 from tqdm import tqdm
 
+from extraction.image_adapter import EWFImgInfo
+from extraction.fs_walker import walk_filesystem
+from extraction.parallel_extract import iter_records_parallel
+from extraction.file_table import FileTable
+
 SAMPLE_PATH = "forensic_ir_app/data/samples/"
 IMAGE_BASENAME = "nps-2008-jean.E01"
 
@@ -20,18 +26,6 @@ def open_ewf_image(image_path):
     ewf_handle = pyewf.handle()
     ewf_handle.open(segment_files)
 
-    class EWFImgInfo(pytsk3.Img_Info):
-        def __init__(self, ewf_handle):
-            self._ewf_handle = ewf_handle
-            super(EWFImgInfo, self).__init__(url="", type=pytsk3.TSK_IMG_TYPE_EXTERNAL)
-
-        def read(self, offset, size):
-            self._ewf_handle.seek(offset)
-            return self._ewf_handle.read(size)
-
-        def get_size(self):
-            return self._ewf_handle.get_media_size()
-
     return EWFImgInfo(ewf_handle)
 
 def get_partition_offsets(img):
@@ -48,51 +42,56 @@ def get_partition_offsets(img):
         offsets.append(start)
     return offsets
 
-def extract_sample_metadata(img, offset):
+def extract_sample_metadata(img, offset, limit=None):
     """
-    Extracts metadata from the filesystem at given offset.
+    Extracts metadata from the filesystem at given offset into a FileTable.
+    Walks the whole directory tree unless `limit` is given.
     """
     print(f"🧠 Attempting to open filesystem at offset {offset}...")
     fs = pytsk3.FS_Info(img, offset=offset)
-    root_dir = fs.open_dir(path="/")
 
-    metadata = []
-    count = 0
+    table = FileTable()
     print("📂 Extracting sample metadata from filesystem...")
-    for entry in tqdm(root_dir, desc="Reading files"):
-        if not hasattr(entry, "info") or not hasattr(entry.info, "name"):
-            continue
-
-        name = entry.info.name.name.decode("utf-8", errors="ignore")
-        if name in [".", ".."]:
-            continue
-
-        try:
-            size = entry.info.meta.size if entry.info.meta else 0
-            created = entry.info.meta.crtime if entry.info.meta else 0
-            modified = entry.info.meta.mtime if entry.info.meta else 0
-            accessed = entry.info.meta.atime if entry.info.meta else 0
-
-            metadata.append({
-                "file_name": name,
-                "size": size,
-                "created": created,
-                "modified": modified,
-                "accessed": accessed
-            })
-        except Exception:
+    for record in tqdm(walk_filesystem(fs), desc="Reading files"):
+        if record["is_dir"]:
             continue
-
-        count += 1
-        if count >= 50:  # Only read 50 files for testing
+        table.append(record)
+        if limit and len(table) >= limit:
             break
 
-    print(f"✅ Extracted {len(metadata)} entries successfully.")
-    return metadata
+    print(f"✅ Extracted {len(table)} entries successfully.")
+    return table
 
-def main():
+def summarize_parallel(image_path, workers):
+    """
+    Walks every partition at once, one worker process per partition/subtree,
+    and prints a per-partition summary.
+    """
+    print(f"⚡ Walking all partitions with {workers} workers...")
+    per_partition = {}
+    samples = []
+    for record in iter_records_parallel(image_path, workers=workers, split_subtrees=True):
+        if record["is_dir"]:
+            continue
+        per_partition[record["partition_offset"]] = per_partition.get(record["partition_offset"], 0) + 1
+        if len(samples) < 5:
+            samples.append(record)
+
+    for offset, count in sorted(per_partition.items()):
+        print(f"📦 Partition at offset {offset}: {count} files")
+    if samples:
+        print("\n🧾 Sample Extracted Files:")
+        for i, m in enumerate(samples):
+            print(f"{i+1}. {m['path']} — {m['size']} bytes")
+
+def main(workers=1):
     print("🚀 Checking EnCase image...")
-    img = open_ewf_image(os.path.join(SAMPLE_PATH, IMAGE_BASENAME))
+    image_path = os.path.join(SAMPLE_PATH, IMAGE_BASENAME)
+    if workers > 1:
+        summarize_parallel(image_path, workers)
+        return
+
+    img = open_ewf_image(image_path)
 
     # Step 1: Find all partitions
     offsets = get_partition_offsets(img)
@@ -102,14 +101,19 @@ def main():
     # Step 2: Try to extract from first valid partition
     for offset in offsets:
         try:
-            metadata = extract_sample_metadata(img, offset)
-            if metadata:
+            table = extract_sample_metadata(img, offset)
+            if len(table):
                 print("\n🧾 Sample Extracted Files:")
-                for i, m in enumerate(metadata[:5]):
-                    print(f"{i+1}. {m['file_name']} — {m['size']} bytes")
+                for i in range(min(5, len(table))):
+                    m = table.record(i)
+                    print(f"{i+1}. {m['path']} — {m['size']} bytes")
+                print(f"📊 File types: {table.type_counts()}")
                 break
         except Exception as e:
             print(f"⚠️ Failed to open partition at {offset}: {e}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Check an EnCase image and list sample files")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Walk every partition in parallel using this many processes")
+    main(parser.parse_args().workers)
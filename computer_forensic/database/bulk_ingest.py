@@ -0,0 +1,283 @@
+"""
+Bulk loading of per-file artifacts from a FileTable.
+
+The table is cut into batches of `batch_size` rows. A writer thread takes
+batches through a queue holding at most MAX_PENDING_BATCHES, so a slow
+database throttles the producer instead of letting rows pile up in memory.
+
+PostgreSQL: ids for a batch are reserved from the artifacts sequence in one
+query, then the artifact rows and their timeline events (created, modified,
+accessed and changed times, referencing those ids) are sent with
+COPY ... FROM STDIN (CSV), one statement per table per batch. Deleting the
+rows of an earlier load of the case and every batch share one transaction,
+so a rerun replaces them instead of adding duplicates, and a load that fails
+part-way leaves the previous rows exactly as they were.
+
+MongoDB: batches go to the artifacts collection with unordered insert_many,
+which the server can apply without stopping at the first failed document.
+Every document carries the load's "load_id"; only once all batches are in
+are the case's documents from other loads deleted. A failed load deletes
+its own documents instead, so the previous load stays in place.
+
+Progress is reported as the writer finishes each batch, not as batches are
+queued.
+"""
+import csv
+import io
+import queue
+import threading
+import time
+import uuid
+from array import array
+from datetime import datetime, timedelta
+
+from database.connection_manager import get_manager
+from extraction.file_table import FLAG_ALLOCATED, FLAG_DIR, FLAG_HASHED, FLAG_KNOWN
+
+DEFAULT_BATCH_SIZE = 50_000
+MAX_PENDING_BATCHES = 2
+
+ARTIFACT_COLUMNS = ("id", "filename", "filepath", "size", "sha256", "created", "modified", "accessed",
+                    "owner", "deleted", "file_type", "case_id")
+TIMELINE_COLUMNS = ("timestamp", "event_type", "description", "artifact_id", "case_id")
+# FileTable time column -> timeline event type
+TIMELINE_EVENTS = (("crtime", "created"), ("mtime", "modified"), ("atime", "accessed"), ("ctime", "changed"))
+
+# VARCHAR widths from setup_databases.py; longer values are cut rather than failing the whole COPY
+FILENAME_WIDTH = 255
+FILEPATH_WIDTH = 1024
+FILE_TYPE_WIDTH = 50
+
+_EPOCH = datetime(1970, 1, 1)
+_MAX_TIME = 253402300799  # 9999-12-31 23:59:59
+_SECONDS_PER_DAY = 86400
+
+_day_prefixes = {}
+_times_of_day = []
+
+
+def _format_times(values):
+    """Unix seconds -> ISO timestamps for COPY; 0 (unknown) and corrupt values become None (NULL)."""
+    # A datetime per value costs more than the COPY itself; build each string from a cached
+    # "YYYY-MM-DDT" prefix and a precomputed "HH:MM:SS" suffix instead
+    if not _times_of_day:
+        _times_of_day.extend(f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}" for s in range(_SECONDS_PER_DAY))
+    days = _day_prefixes
+    out = []
+    for v in values:
+        if 0 < v <= _MAX_TIME:
+            day, second = divmod(v, _SECONDS_PER_DAY)
+            prefix = days.get(day)
+            if prefix is None:
+                prefix = days[day] = (_EPOCH + timedelta(days=day)).strftime("%Y-%m-%dT")
+            out.append(prefix + _times_of_day[second])
+        else:
+            out.append(None)
+    return out
+
+
+def _text(path):
+    # FileTable keeps undecodable name bytes as surrogates, which the database encoding rejects
+    if path.isascii():
+        return path
+    return path.encode("utf-8", "surrogateescape").decode("utf-8", "replace")
+
+
+class _Batch:
+    """Column values of the file rows in table[start:stop] (directories are skipped)."""
+
+    def __init__(self, table, start, stop):
+        self.stop = stop
+        c = table.columns
+        flags = c["flags"]
+        self.rows = [i for i in range(start, stop) if not flags[i] & FLAG_DIR]
+        self.paths = [_text(table.path(i)) for i in self.rows]
+        self.names = [p.rsplit("/", 1)[-1] for p in self.paths]
+        self.sizes = [c["size"][i] for i in self.rows]
+        self.deleted = [not flags[i] & FLAG_ALLOCATED for i in self.rows]
+        self.known = [bool(flags[i] & FLAG_KNOWN) if flags[i] & FLAG_HASHED else None for i in self.rows]
+        self.types = [table.extensions[c["ext"][i]] for i in self.rows]
+        self.raw_times = {name: [c[name][i] for i in self.rows] for name, _ in TIMELINE_EVENTS}
+        self.times = {name: _format_times(values) for name, values in self.raw_times.items()}
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class _BatchWriter:
+    """
+    Writer thread fed through a bounded queue; put() blocks while the queue is full.
+    on_written(batch) is called from the writer thread after each batch is written.
+    """
+
+    def __init__(self, write_batch, max_pending=MAX_PENDING_BATCHES, on_written=None):
+        self._write_batch = write_batch
+        self._on_written = on_written
+        self._queue = queue.Queue(max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._queue.get()
+            if batch is None:
+                return
+            if self._error is None:  # after a failure, keep draining so put() never blocks forever
+                try:
+                    self._write_batch(batch)
+                    if self._on_written is not None:
+                        self._on_written(batch)
+                except BaseException as e:
+                    self._error = e
+
+    def put(self, batch):
+        if self._error is not None:
+            raise self._error
+        self._queue.put(batch)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+
+def _copy(cur, table_name, columns, rows):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cur.copy_expert(f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def _run_batches(table, write_batch, batch_size, progress_callback):
+    total = len(table)
+    on_written = (lambda batch: progress_callback(batch.stop, total)) if progress_callback else None
+    writer = _BatchWriter(write_batch, on_written=on_written)
+    try:
+        for start in range(0, total, batch_size):
+            writer.put(_Batch(table, start, min(start + batch_size, total)))
+    finally:
+        writer.close()
+
+
+def _delete_case_postgres(cur, case_id):
+    # Timeline events reference the artifacts, so they go first
+    cur.execute("DELETE FROM timeline_events WHERE case_id = %s "
+                "OR artifact_id IN (SELECT id FROM artifacts WHERE case_id = %s)", (case_id, case_id))
+    cur.execute("DELETE FROM artifacts WHERE case_id = %s", (case_id,))
+
+
+def copy_artifacts_postgres(table, case_id, batch_size=DEFAULT_BATCH_SIZE, timeline=True, progress_callback=None,
+                            manager=None):
+    """
+    Load the files of a FileTable into artifacts (and timeline_events) with COPY,
+    replacing the rows of an earlier load for the same case_id.
+
+    Returns {"ids", "rows", "events", "seconds", "rows_per_s"}; "ids" holds
+    the artifact id of every loaded file, in table order.
+    """
+    manager = manager or get_manager()
+    ids = array("q")
+    counts = {"rows": 0, "events": 0}
+
+    def write_batch(cur, batch):
+        if not len(batch):
+            return
+        cur.execute("SELECT nextval(pg_get_serial_sequence('artifacts', 'id')) FROM generate_series(1, %s)",
+                    (len(batch),))
+        batch_ids = [row[0] for row in cur.fetchall()]
+        times = batch.times
+        _copy(cur, "artifacts", ARTIFACT_COLUMNS, zip(
+            batch_ids,
+            [name[:FILENAME_WIDTH] for name in batch.names],
+            [path[:FILEPATH_WIDTH] for path in batch.paths],
+            batch.sizes, [None] * len(batch),
+            times["crtime"], times["mtime"], times["atime"], [None] * len(batch),
+            batch.deleted,
+            [file_type[:FILE_TYPE_WIDTH] for file_type in batch.types],
+            [case_id] * len(batch)
+        ))
+        if timeline:
+            events = [
+                (stamp, event_type, path, artifact_id, case_id)
+                for name, event_type in TIMELINE_EVENTS
+                for stamp, path, artifact_id in zip(times[name], batch.paths, batch_ids)
+                if stamp is not None
+            ]
+            _copy(cur, "timeline_events", TIMELINE_COLUMNS, events)
+            counts["events"] += len(events)
+        ids.extend(batch_ids)
+        counts["rows"] += len(batch)
+
+    start = time.perf_counter()
+    # One transaction for the whole load: it commits when the block exits, or rolls back on any error.
+    # Only the writer thread uses the cursor once the old rows are deleted.
+    with manager.postgres_connection() as conn:
+        with conn.cursor() as cur:
+            _delete_case_postgres(cur, case_id)
+            _run_batches(table, lambda batch: write_batch(cur, batch), batch_size, progress_callback)
+    seconds = time.perf_counter() - start
+    return {"ids": ids, **counts, "seconds": seconds,
+            "rows_per_s": counts["rows"] / seconds if seconds > 0 else 0.0}
+
+
+def insert_artifacts_mongodb(table, case_id, batch_size=DEFAULT_BATCH_SIZE, progress_callback=None, manager=None):
+    """
+    Load the files of a FileTable into the artifacts collection, replacing the
+    documents of an earlier load for the same case_id.
+
+    Returns {"rows", "seconds", "rows_per_s"}.
+    """
+    manager = manager or get_manager()
+    collection = manager.mongo_db()["artifacts"]
+    counts = {"rows": 0}
+    load_id = uuid.uuid4().hex
+
+    def write_batch(batch):
+        if not len(batch):
+            return
+        raw = batch.raw_times
+        documents = [
+            {"case_id": case_id, "load_id": load_id, "filename": name, "filepath": path, "size": size, "file_type": file_type,
+             "deleted": deleted, "known": known, "created": crtime, "modified": mtime, "accessed": atime,
+             "changed": ctime}
+            for name, path, size, file_type, deleted, known, crtime, mtime, atime, ctime in zip(
+                batch.names, batch.paths, batch.sizes, batch.types, batch.deleted, batch.known,
+                raw["crtime"], raw["mtime"], raw["atime"], raw["ctime"])
+        ]
+        result = collection.insert_many(documents, ordered=False)
+        counts["rows"] += len(result.inserted_ids)
+
+    start = time.perf_counter()
+    try:
+        _run_batches(table, write_batch, batch_size, progress_callback)
+    except BaseException:
+        collection.delete_many({"case_id": case_id, "load_id": load_id})
+        raise
+    # Swap: the earlier load of the case goes only once this one is complete
+    collection.delete_many({"case_id": case_id, "load_id": {"$ne": load_id}})
+    seconds = time.perf_counter() - start
+    return {**counts, "seconds": seconds, "rows_per_s": counts["rows"] / seconds if seconds > 0 else 0.0}
+
+
+def ingest_artifacts(table, case_id, databases, progress_callback=None):
+    """
+    Bulk-load a FileTable into every selected database that supports it.
+    Returns {database: stats}; a database that fails reports {"error": ...}.
+    """
+    loaders = {"postgres": copy_artifacts_postgres, "mongodb": insert_artifacts_mongodb}
+    results = {}
+    for db in databases:
+        loader = loaders.get(db)
+        if loader is None:
+            continue
+        callback = (lambda done, total, db=db: progress_callback(db, done, total)) if progress_callback else None
+        try:
+            stats = loader(table, case_id, progress_callback=callback)
+            stats.pop("ids", None)
+            results[db] = stats
+        except Exception as e:
+            print(f"Bulk artifact load into {db} failed: {e}")
+            results[db] = {"error": str(e)}
+    return results
@@ -0,0 +1,194 @@
+"""
+Shared database connections for every handler.
+
+Settings come from config/db_config.yaml (or the file named by
+FORENSIC_DB_CONFIG). Nothing connects until first use. After that:
+
+    postgres  a psycopg2 ThreadedConnectionPool; borrow a connection with
+              `with manager.postgres_connection() as conn:` (commit on
+              success, rollback on error, broken connections are discarded).
+              Waiting for a free connection gives up after acquire_timeout
+              seconds, and the server cancels any statement running longer
+              than statement_timeout, so a caller that stopped waiting (see
+              backend.db_router.insert_all) cannot hold a connection for
+              long.
+    mongodb   one MongoClient per process, which pools its own sockets
+
+An insert therefore costs one round trip instead of a TCP connect plus
+authentication. Pools are per process: a forked or spawned child builds
+its own on first use.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_CONFIG_PATH = os.environ.get(
+    "FORENSIC_DB_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "db_config.yaml")
+)
+DEFAULT_PG_POOL_MIN = 1
+DEFAULT_PG_POOL_MAX = 8
+DEFAULT_MONGO_POOL_MAX = 50
+CONNECT_TIMEOUT = 5  # seconds
+DEFAULT_PG_ACQUIRE_TIMEOUT = 30  # seconds to wait for a free pooled connection
+DEFAULT_PG_STATEMENT_TIMEOUT = 30  # seconds before the server cancels a statement
+
+
+class ConnectionManager:
+    def __init__(self, config_path=DEFAULT_CONFIG_PATH):
+        self.config_path = config_path
+        self._config = None
+        self._pg_pool = None
+        self._pg_slots = None
+        self._pg_acquire_timeout = DEFAULT_PG_ACQUIRE_TIMEOUT
+        self._mongo_client = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    @property
+    def config(self):
+        if self._config is None:
+            import yaml
+
+            with open(self.config_path, "r") as f:
+                self._config = yaml.safe_load(f) or {}
+        return self._config
+
+    def _check_process(self):
+        # Connections must not be shared with a child process; start afresh after a fork
+        if os.getpid() != self._pid:
+            self._pg_pool = None
+            self._pg_slots = None
+            self._mongo_client = None
+            self._pid = os.getpid()
+
+    # ---------------------------
+    # PostgreSQL
+    # ---------------------------
+    def postgres_pool(self):
+        self._check_process()
+        if self._pg_pool is None:
+            with self._lock:
+                if self._pg_pool is None:
+                    from psycopg2.pool import ThreadedConnectionPool
+
+                    cfg = self.config["postgres"]
+                    pool_max = cfg.get("pool_max", DEFAULT_PG_POOL_MAX)
+                    # The pool raises when exhausted; callers wait for a free connection instead
+                    self._pg_slots = threading.BoundedSemaphore(pool_max)
+                    self._pg_acquire_timeout = cfg.get("acquire_timeout", DEFAULT_PG_ACQUIRE_TIMEOUT)
+                    statement_timeout = cfg.get("statement_timeout", DEFAULT_PG_STATEMENT_TIMEOUT)
+                    self._pg_pool = ThreadedConnectionPool(
+                        cfg.get("pool_min", DEFAULT_PG_POOL_MIN),
+                        pool_max,
+                        host=cfg["host"],
+                        port=cfg["port"],
+                        user=cfg["user"],
+                        password=cfg["password"],
+                        dbname=cfg["database"],
+                        connect_timeout=CONNECT_TIMEOUT,
+                        options=f"-c statement_timeout={int(statement_timeout * 1000)}"
+                    )
+        return self._pg_pool
+
+    @contextmanager
+    def postgres_connection(self):
+        """Borrow a pooled connection; commits on success and rolls back on error."""
+        import psycopg2
+
+        pool = self.postgres_pool()
+        slots = self._pg_slots
+        if not slots.acquire(timeout=self._pg_acquire_timeout):
+            raise TimeoutError(f"No PostgreSQL connection free within {self._pg_acquire_timeout:g}s")
+        try:
+            conn = pool.getconn()
+            if conn.closed:
+                # Dropped by the server while idle in the pool
+                pool.putconn(conn, close=True)
+                conn = pool.getconn()
+            broken = False
+            try:
+                yield conn
+                conn.commit()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                pool.putconn(conn, close=broken or bool(conn.closed))
+        finally:
+            slots.release()
+
+    # ---------------------------
+    # MongoDB
+    # ---------------------------
+    def mongo_client(self):
+        self._check_process()
+        if self._mongo_client is None:
+            with self._lock:
+                if self._mongo_client is None:
+                    from pymongo import MongoClient
+
+                    cfg = self.config["mongodb"]
+                    self._mongo_client = MongoClient(
+                        cfg["uri"],
+                        maxPoolSize=cfg.get("pool_max", DEFAULT_MONGO_POOL_MAX),
+                        serverSelectionTimeoutMS=CONNECT_TIMEOUT * 1000
+                    )
+        return self._mongo_client
+
+    def mongo_db(self):
+        return self.mongo_client()[self.config["mongodb"]["database"]]
+
+    # ---------------------------
+    # Health and shutdown
+    # ---------------------------
+    def health(self):
+        """Round-trip check of each configured backend: {name: {"ok", "latency_ms" | "error"}}."""
+        checks = {}
+        if "postgres" in self.config:
+            checks["postgres"] = self._timed(self._ping_postgres)
+        if "mongodb" in self.config:
+            checks["mongodb"] = self._timed(lambda: self.mongo_client().admin.command("ping"))
+        return checks
+
+    def _ping_postgres(self):
+        with self.postgres_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+
+    @staticmethod
+    def _timed(check):
+        start = time.perf_counter()
+        try:
+            check()
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    def close(self):
+        with self._lock:
+            if self._pg_pool is not None:
+                self._pg_pool.closeall()
+                self._pg_pool = None
+            if self._mongo_client is not None:
+                self._mongo_client.close()
+                self._mongo_client = None
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """The process-wide ConnectionManager."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager()
+    return _manager
@@ -1,7 +1,7 @@
-from pymongo import MongoClient
+from database.connection_manager import get_manager
 
-def insert_mongodb(features):
-    client = MongoClient("mongodb://localhost:27017/")
-    db = client["forensics"]
-    collection = db["cases"]
-    collection.insert_one(features)
+def insert_mongodb(features, key):
+    # Shared client: the connection pool is reused across inserts. The document is keyed
+    # by `key` and replaced if present, so a retried write cannot fail or duplicate it
+    collection = get_manager().mongo_db()["cases"]
+    collection.replace_one({"_id": key}, {**features, "_id": key}, upsert=True)
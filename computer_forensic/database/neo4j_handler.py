@@ -1,4 +1,4 @@
-def insert_neo4j(features):
+def insert_neo4j(features, key):
     # connect to MongoDB
     # insert features dict into a collection
     pass
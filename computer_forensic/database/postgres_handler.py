@@ -1,19 +1,15 @@
-import psycopg2
+from database.connection_manager import get_manager
 
-def insert_postgres(features):
-    conn = psycopg2.connect(
-        dbname="forensics",
-        user="postgres",
-        password="yourpassword",
-        host="localhost",
-        port="5432"
-    )
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO cases (space, file_system, hash, total_files, keys) VALUES (%s, %s, %s, %s, %s)",
-        (features.get("space"), features.get("file_system"), features.get("hash"),
-         features.get("total_files"), str(features.get("keys")))
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+def insert_postgres(features, key):
+    # Borrow a pooled connection (configured in config/db_config.yaml); commits on exit.
+    # One row per write key, so a retry after a lost commit acknowledgement updates it in place
+    with get_manager().postgres_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO cases (job_id, space, file_system, hash, total_files, keys) "
+                "VALUES (%s, %s, %s, %s, %s, %s) "
+                "ON CONFLICT (job_id) DO UPDATE SET space = EXCLUDED.space, file_system = EXCLUDED.file_system, "
+                "hash = EXCLUDED.hash, total_files = EXCLUDED.total_files, keys = EXCLUDED.keys",
+                (key, features.get("space"), features.get("file_system"), features.get("hash"),
+                 features.get("total_files"), str(features.get("keys")))
+            )
@@ -1,4 +1,4 @@
-def insert_vector(features):
+def insert_vector(features, key):
     # connect to MongoDB
     # insert features dict into a collection
     pass
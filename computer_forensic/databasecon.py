@@ -1,23 +1,18 @@
-from psycopg2 import connect
-from pymongo import MongoClient
 from neo4j import GraphDatabase
 from pymilvus import connections
 from pymilvus import connections, utility
 
-# PostgreSQL
-pg_conn = connect(
-    dbname="forensics",
-    user="dhanush",
-    password="dkarcher",
-    host="localhost",
-    port=5432
-)
-print("PostgreSQL connected")
-
-# MongoDB
-mongo_client = MongoClient("mongodb://localhost:27017/")
-mongo_db = mongo_client["forensics"]
-print("MongoDB connected")
+from database.connection_manager import get_manager
+
+# PostgreSQL and MongoDB share the pooled connections used by the handlers
+manager = get_manager()
+for backend, check in manager.health().items():
+    if check["ok"]:
+        print(f"{backend} connected ({check['latency_ms']} ms round trip)")
+    else:
+        print(f"{backend} unavailable: {check['error']}")
+
+mongo_db = manager.mongo_db()
 
 # Neo4j
 # neo4j_driver = GraphDatabase.driver("bolt://localhost:7687", auth=("neo4j", "password"))
@@ -26,7 +21,7 @@ print("MongoDB connected")
 # Milvus
 
 # Connect to Milvus standalone
-connections.connect(alias="default", host="127.0.0.1", port="19530")
+connections.connect(alias="default", host=manager.config["milvus"]["host"], port=manager.config["milvus"]["port"])
 
 # Verify
 print("Connected to Milvus")
@@ -0,0 +1,201 @@
+"""
+Header/footer file carver for raw images.
+
+Split raw sets (.001, .002, ...) are carved as one image, so a file that
+crosses into the next segment is carved whole.
+
+Usage:
+    python -m extraction.carver image.dd carved/ [--workers N] [--types jpeg,png]
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from extraction.signatures import SIGNATURES
+from extraction.signature_scanner import SignatureScanner, split_ranges
+from extraction.split_raw import SplitRawImage, image_size
+
+CARVE_BLOCK_SIZE = 1024 * 1024  # bytes per read/write while carving one file
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def _zip_trailer(image, footer_offset):
+    """Bytes after the end-of-central-directory signature: 18 fixed + comment length."""
+    eocd = image.read(footer_offset, 22)
+    if len(eocd) < 22:
+        return 18
+    return 18 + int.from_bytes(eocd[20:22], "little")
+
+
+# Carving rules. Headers are full magic values (longer than the SIGNATURES
+# prefixes where that cuts false positives); a file ends after its footer
+# plus any trailer, or is abandoned once it reaches max_size.
+CARVE_RULES = {
+    "jpeg": {"headers": [b"\xFF\xD8\xFF"], "footer": b"\xFF\xD9", "extension": "jpg",
+             "max_size": 20 * 1024 * 1024},
+    "png": {"headers": [b"\x89PNG\r\n\x1a\n"], "footer": b"IEND\xAE\x42\x60\x82", "extension": "png",
+            "max_size": 20 * 1024 * 1024},
+    "pdf": {"headers": [b"%PDF-"], "footer": b"%%EOF", "extension": "pdf",
+            "max_size": 100 * 1024 * 1024},
+    "zip": {"headers": [b"PK\x03\x04"], "footer": b"PK\x05\x06", "extension": "zip",
+            "max_size": 500 * 1024 * 1024, "trailer": _zip_trailer},
+    "gif": {"headers": [b"GIF89a", b"GIF87a"], "footer": b"\x00\x3B", "extension": "gif",
+            "max_size": 20 * 1024 * 1024},
+}
+
+
+def describe(header):
+    """Human-readable type from the shared SIGNATURES table."""
+    for sig, desc in SIGNATURES.items():
+        if header.startswith(sig):
+            return desc
+    return "Unknown"
+
+
+def carve_one(image, offset, rule_name, output_dir, image_size, keep_truncated=False):
+    """
+    Stream one file starting at `offset` of a SplitRawImage into output_dir, hashing it on the way.
+
+    Only CARVE_BLOCK_SIZE bytes (plus a footer-sized tail) are held in memory.
+    Returns a manifest entry, or None if no footer was found and
+    keep_truncated is False.
+    """
+    rule = CARVE_RULES[rule_name]
+    footer = rule["footer"]
+    limit = min(offset + rule["max_size"], image_size)
+    path = os.path.join(output_dir, f"{offset:014d}.{rule['extension']}")
+    md5, sha256 = hashlib.md5(), hashlib.sha256()
+
+    pos = offset
+    tail = b""
+    end = None
+    with open(path, "wb") as out:
+        while pos < limit and end is None:
+            data = image.read(pos, min(CARVE_BLOCK_SIZE, limit - pos))
+            if not data:
+                break
+            # Search the carried tail too, so a footer split across reads is found
+            window = tail + data
+            window_start = pos - len(tail)
+            search_from = max(0, offset + len(rule["headers"][0]) - window_start)
+            idx = window.find(footer, search_from)
+            if idx != -1:
+                end = window_start + idx + len(footer)
+                if "trailer" in rule:
+                    end = min(end + rule["trailer"](image, window_start + idx), limit)
+                # Footers (and trailers) can run past this read; fetch the rest directly
+                if end > pos + len(data):
+                    data += image.read(pos + len(data), end - pos - len(data))
+                data = data[:end - pos]
+            out.write(data)
+            md5.update(data)
+            sha256.update(data)
+            pos += len(data)
+            tail = window[-(len(footer) - 1):] if len(footer) > 1 else b""
+
+    if end is None and not keep_truncated:
+        os.remove(path)
+        return None
+
+    header = image.read(offset, 16)
+    return {
+        "offset": offset,
+        "type": rule_name,
+        "description": describe(header),
+        "length": pos - offset,
+        "path": path,
+        "md5": md5.hexdigest(),
+        "sha256": sha256.hexdigest(),
+        "truncated": end is None
+    }
+
+
+def _carve_piece(args):
+    """Worker: scan one byte range for headers and carve every hit that starts in it."""
+    image_path, piece, output_dir, types, keep_truncated = args
+    signatures = {h: name for name in types for h in CARVE_RULES[name]["headers"]}
+    scanner = SignatureScanner(signatures)
+
+    entries = []
+    covered_until = {}  # rule -> end of the last carved file of that type
+    with SplitRawImage(image_path) as image:
+        for offset, rule_name in scanner.scan(image_path, [piece]):
+            # Skip headers inside a file we already carved (e.g. ZIP local headers)
+            if offset < covered_until.get(rule_name, -1):
+                continue
+            entry = carve_one(image, offset, rule_name, output_dir, image.size, keep_truncated)
+            if entry:
+                entries.append(entry)
+                covered_until[rule_name] = offset + entry["length"]
+    return entries
+
+
+def carve_image(image_path, output_dir, ranges=None, types=None, workers=None, keep_truncated=False):
+    """
+    Carve files of the given types out of `ranges` of a raw image.
+
+    The ranges (default: the whole image, or pass unallocated regions) are
+    split into pieces handled by a process pool; each worker streams carved
+    files straight to output_dir. A file that runs past the end of its piece
+    is also found again from the headers inside it by the following pieces
+    (e.g. ZIP local headers); those carves are dropped and their files
+    deleted. Every artifact is written to output_dir/manifest.jsonl with its
+    offset, length and hashes, replacing the manifest of an earlier run.
+
+    Returns {"carved": n, "by_type": {...}, "manifest": path}.
+    """
+    types = list(types or CARVE_RULES)
+    unknown = [t for t in types if t not in CARVE_RULES]
+    if unknown:
+        raise ValueError(f"No carving rule for: {', '.join(unknown)}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    if ranges is None:
+        ranges = [(0, image_size(image_path))]
+    pieces = split_ranges(sorted(ranges))
+    workers = workers or os.cpu_count() or 1
+
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    by_type = {}
+    tasks = [(image_path, piece, output_dir, types, keep_truncated) for piece in pieces]
+    with open(manifest_path, "w") as manifest:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(_carve_piece, tasks)
+                _write_manifest(results, manifest, by_type)
+        else:
+            _write_manifest(map(_carve_piece, tasks), manifest, by_type)
+
+    return {"carved": sum(by_type.values()), "by_type": by_type, "manifest": manifest_path}
+
+
+def _write_manifest(results, manifest, by_type):
+    # Results arrive in piece order, so offsets only grow; covered_until spans pieces here
+    covered_until = {}  # rule -> end of the last kept file of that type
+    for entries in results:
+        for entry in entries:
+            if entry["offset"] < covered_until.get(entry["type"], -1):
+                os.remove(entry["path"])
+                continue
+            covered_until[entry["type"]] = entry["offset"] + entry["length"]
+            manifest.write(json.dumps(entry) + "\n")
+            by_type[entry["type"]] = by_type.get(entry["type"], 0) + 1
+        manifest.flush()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carve files out of a raw disk image")
+    parser.add_argument("image")
+    parser.add_argument("output_dir")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--types", default=",".join(CARVE_RULES), help="Comma-separated rule names")
+    parser.add_argument("--keep-truncated", action="store_true",
+                        help="Keep files whose footer was not found within max_size")
+    args = parser.parse_args()
+
+    summary = carve_image(args.image, args.output_dir, types=args.types.split(","),
+                          workers=args.workers, keep_truncated=args.keep_truncated)
+    print(f"✅ Carved {summary['carved']} files: {summary['by_type']}")
+    print(f"🧾 Manifest: {summary['manifest']}")
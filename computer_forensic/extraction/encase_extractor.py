@@ -3,32 +3,33 @@ import pytsk3
 import json
 import os
 
-class EWFImgInfo(pytsk3.Img_Info):
-    def __init__(self, ewf_handle):
-        self._ewf_handle = ewf_handle
-        super().__init__(url="", type=pytsk3.TSK_IMG_TYPE_EXTERNAL)
+from extraction.image_adapter import EWFImgInfo, EWFMediaStream
+from extraction.export import export_ranges
 
-    def close(self):
-        self._ewf_handle.close()
 
-    def read(self, offset, size):
-        self._ewf_handle.seek(offset)
-        return self._ewf_handle.read(size)
-
-    def get_size(self):
-        return self._ewf_handle.get_media_size()
-
-def open_ewf_image(image_path):
-    """Open a multi-segment EWF image safely."""
+def ewf_segment_paths(image_path):
+    """All segment files of the EWF set `image_path` belongs to."""
     segment_files = pyewf.glob(image_path)
     if not segment_files:
         raise FileNotFoundError(f"No EWF segments found for {image_path}")
+    return segment_files
 
+
+def open_ewf_image(image_path):
+    """Open a multi-segment EWF image safely."""
+    segment_files = ewf_segment_paths(image_path)
     ewf_handle = pyewf.handle()
     ewf_handle.open(segment_files)
     print(f"Found {len(segment_files)} segment(s): {segment_files}")
     return EWFImgInfo(ewf_handle)
 
+
+def open_ewf_media(image_path):
+    """The decompressed media of an EWF set as a seekable binary stream (for hashing)."""
+    ewf_handle = pyewf.handle()
+    ewf_handle.open(ewf_segment_paths(image_path))
+    return EWFMediaStream(ewf_handle)
+
 def extract_metadata(image_path, output_json="metadata.json"):
     print(f"Opening image: {image_path}")
     img = open_ewf_image(image_path)
@@ -63,32 +64,22 @@ def extract_metadata(image_path, output_json="metadata.json"):
     with open(output_json, "w") as f:
         json.dump(metadata, f, indent=4)
     print(f"Metadata extracted to {output_json}")
+    print(f"Read cache: {img.cache_stats()}")
     
-def extract_partial_data(image_path, output_file="sample_raw.bin", bytes_to_read=100 * 1024 * 1024):
+def extract_partial_data(image_path, output_file="sample_raw.bin", bytes_to_read=100 * 1024 * 1024, workers=None):
     """
-    Extract a small portion of the EnCase image (default: 100MB).
+    Extract the first `bytes_to_read` bytes of the EnCase image (default: 100MB).
+    Runs through extraction.export, so the copy is parallel, verified and resumable.
     """
     print(f"Extracting {bytes_to_read / (1024*1024)} MB from {image_path} ...")
 
-    ewf_handle = pyewf.handle()
-    segment_files = pyewf.glob(image_path)
-    ewf_handle.open(segment_files)
-    img = EWFImgInfo(ewf_handle)
-
-    total_size = img.get_size()
-    read_size = min(bytes_to_read, total_size)
-
-    with open(output_file, "wb") as f:
-        offset = 0
-        chunk_size = 1024 * 1024  # 1MB
-        while offset < read_size:
-            data = img.read(offset, chunk_size)
-            f.write(data)
-            offset += len(data)
-            if offset % (10 * chunk_size) == 0:
-                print(f"   ... {offset / (1024*1024):.1f} MB written")
+    result = export_ranges(
+        image_path, output_file, ranges=[(0, bytes_to_read)], workers=workers, packed=True,
+        progress_callback=lambda done, total: print(f"   ... {done / (1024*1024):.1f} MB written")
+    )
 
-    print(f"Extracted {read_size / (1024*1024):.2f} MB to {output_file}")
+    print(f"Extracted {result['bytes'] / (1024*1024):.2f} MB to {output_file}")
+    return result
 
 
 if __name__ == "__main__":
@@ -0,0 +1,302 @@
+"""
+Per-block Shannon entropy map ("sidecar") for disk images.
+
+Encrypted containers and compressed blobs show up as long runs of blocks
+with entropy close to 8 bits/byte. The map is computed in one read pass,
+split into byte ranges that are processed by a pool of worker processes;
+each worker writes its part of the map straight into the sidecar file.
+
+Layout of a .entropy file (little endian):
+    header   magic "FENTRPY1", version, block size, image size, block count
+    values   block_count float16 values (bits per byte, 0..8), block i at
+             HEADER_SIZE + 2 * i
+
+The map covers the media: EWF sets (.E01) are read decompressed through
+pyewf, since their container bytes are compressed and look uniformly
+random; split raw sets are read as one concatenated image.
+
+With NumPy a whole batch of blocks is counted with one bincount call; the
+pure Python fallback counts each block with collections.Counter.
+"""
+import math
+import mmap
+import os
+import struct
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from extraction.signature_scanner import split_ranges
+from extraction.split_raw import image_size, open_raw
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"FENTRPY1"
+VERSION = 1
+HEADER_FORMAT = "<8sHIQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+DEFAULT_BLOCK_SIZE = 4096
+BATCH_BLOCKS = 1024                       # blocks per read / bincount call
+SPLIT_SIZE = 256 * 1024 * 1024            # bytes per parallel work item
+SIDECAR_SUFFIX = ".entropy"
+
+HIGH_ENTROPY_THRESHOLD = 7.5              # bits/byte; encrypted data is ~7.99
+MIN_REGION_SIZE = 1024 * 1024
+PROFILE_POINTS = 512
+
+
+def sidecar_path(image_path):
+    return image_path + SIDECAR_SUFFIX
+
+
+def _is_ewf(image_path):
+    return image_path.lower().endswith(".e01")
+
+
+def _open_ewf(image_path):
+    from extraction.encase_extractor import open_ewf_image
+    return open_ewf_image(image_path)
+
+
+def media_size(image_path):
+    """Size of the media the map covers: the decompressed EWF media, else the (split) raw image."""
+    if not _is_ewf(image_path):
+        return image_size(image_path)
+    img = _open_ewf(image_path)
+    try:
+        return img.get_size()
+    finally:
+        img.close()
+
+
+def _read_batches(image_path, start, end, batch_bytes):
+    """Yield (offset, data) for consecutive batches of the media bytes in [start, end)."""
+    if _is_ewf(image_path):
+        img = _open_ewf(image_path)
+        try:
+            pos = start
+            while pos < end:
+                data = img.read(pos, min(batch_bytes, end - pos))
+                if not data:
+                    break
+                yield pos, data
+                pos += len(data)
+        finally:
+            img.close()
+        return
+
+    buf = bytearray(batch_bytes)
+    view = memoryview(buf)
+    with open_raw(image_path) as f:
+        f.seek(start)
+        pos = start
+        while pos < end:
+            n = f.readinto(view[:min(batch_bytes, end - pos)])
+            if not n:
+                break
+            yield pos, view[:n]
+            pos += n
+
+
+def _entropy_python(block):
+    length = len(block)
+    if not length:
+        return 0.0
+    return 0.0 - sum(n / length * math.log2(n / length) for n in Counter(block).values())
+
+
+def block_entropies(data, block_size=DEFAULT_BLOCK_SIZE):
+    """Entropy of every block_size block of `data` (the last block may be short)."""
+    full = len(data) // block_size
+    if np is None:
+        view = memoryview(data)
+        return [_entropy_python(view[i:i + block_size]) for i in range(0, len(data), block_size)]
+
+    values = []
+    if full:
+        blocks = np.frombuffer(data, dtype=np.uint8, count=full * block_size).reshape(full, block_size)
+        # One bincount for the whole batch: row r, byte b counts into bin r * 256 + b
+        bins = (np.arange(full, dtype=np.intp) * 256)[:, None] + blocks
+        counts = np.bincount(bins.ravel(), minlength=full * 256).reshape(full, 256)
+        values.append(_entropy_numpy(counts, block_size))
+    if len(data) > full * block_size:
+        tail = np.frombuffer(data, dtype=np.uint8, offset=full * block_size)
+        values.append(_entropy_numpy(np.bincount(tail, minlength=256)[None, :], len(tail)))
+    return np.concatenate(values) if values else np.zeros(0)
+
+
+def _entropy_numpy(counts, length):
+    p = counts / float(length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(counts > 0, p * np.log2(p), 0.0)
+    return 0.0 - terms.sum(axis=1)
+
+
+def _pack(values):
+    if np is not None:
+        return np.asarray(values, dtype="<f2").tobytes()
+    return struct.pack(f"<{len(values)}e", *values)
+
+
+def _map_range(args):
+    """Worker: compute entropies for one block-aligned byte range and write them into the sidecar."""
+    image_path, map_path, start, end, block_size = args
+    done = 0
+    with open(map_path, "r+b", buffering=0) as out:
+        for pos, data in _read_batches(image_path, start, end, BATCH_BLOCKS * block_size):
+            values = _pack(block_entropies(data, block_size))
+            os.pwrite(out.fileno(), values, HEADER_SIZE + 2 * (pos // block_size))
+            done += len(data)
+    return done
+
+
+def build_entropy_map(image_path, map_path=None, block_size=DEFAULT_BLOCK_SIZE, workers=None,
+                      progress_callback=None):
+    """
+    Compute the entropy map of an image and write the sidecar.
+
+    progress_callback(bytes_done, total) is called as byte ranges complete.
+    Returns the path of the sidecar file.
+    """
+    map_path = map_path or sidecar_path(image_path)
+    size = media_size(image_path)
+    block_count = -(-size // block_size)
+    with open(map_path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, block_size, size, block_count))
+        f.truncate(HEADER_SIZE + 2 * block_count)
+
+    # Work items must start on block boundaries
+    split = max(block_size, SPLIT_SIZE // block_size * block_size)
+    tasks = [(image_path, map_path, start, end, block_size)
+             for start, end in split_ranges([(0, size)], split)]
+    workers = workers or os.cpu_count() or 1
+
+    done = 0
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            for n in pool.map(_map_range, tasks):
+                done += n
+                if progress_callback:
+                    progress_callback(done, size)
+    else:
+        for task in tasks:
+            done += _map_range(task)
+            if progress_callback:
+                progress_callback(done, size)
+    return map_path
+
+
+class EntropyMap:
+    """Read-only, memory-mapped view of an entropy sidecar."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise ValueError(f"Not an entropy map: {path}")
+            magic, version, self.block_size, self.image_size, self.block_count = struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not an entropy map (or unsupported version): {path}")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.block_count else None
+
+    def __len__(self):
+        return self.block_count
+
+    def values(self, first=0, last=None):
+        """Entropies of blocks [first, last): a float32 array with NumPy, else a list."""
+        last = self.block_count if last is None else min(last, self.block_count)
+        if first >= last:
+            return np.zeros(0, dtype=np.float32) if np is not None else []
+        if np is not None:
+            return np.frombuffer(self._mmap, dtype="<f2", count=last - first,
+                                 offset=HEADER_SIZE + 2 * first).astype(np.float32)
+        return list(struct.unpack_from(f"<{last - first}e", self._mmap, HEADER_SIZE + 2 * first))
+
+    def profile(self, points=PROFILE_POINTS):
+        """Downsample to at most `points` (offset, max entropy) pairs for plotting."""
+        if not self.block_count:
+            return []
+        step = -(-self.block_count // points)
+        profile = []
+        for first in range(0, self.block_count, step):
+            values = self.values(first, first + step)
+            peak = values.max() if np is not None else max(values)
+            profile.append((first * self.block_size, float(peak)))
+        return profile
+
+    def high_entropy_regions(self, threshold=HIGH_ENTROPY_THRESHOLD, min_size=MIN_REGION_SIZE, limit=100):
+        """The `limit` largest runs of blocks at or above `threshold`: [(offset, length)], by offset."""
+        runs = []
+        run_start = None
+        chunk = 1024 * 1024  # blocks per values() call
+        for first in range(0, self.block_count, chunk):
+            values = self.values(first, first + chunk)
+            if np is not None:
+                # Edges of the above-threshold mask, continuing the run state from the previous chunk
+                high = np.concatenate(([run_start is not None], values >= threshold)).astype(np.int8)
+                edges = np.diff(high)
+                events = sorted([(int(i), True) for i in np.flatnonzero(edges == 1)] +
+                                [(int(i), False) for i in np.flatnonzero(edges == -1)])
+            else:
+                events = []
+                is_high = run_start is not None
+                for i, value in enumerate(values):
+                    if (value >= threshold) != is_high:
+                        is_high = not is_high
+                        events.append((i, is_high))
+            for i, starts in events:
+                if starts:
+                    run_start = first + i
+                else:
+                    runs.append((run_start, first + i))
+                    run_start = None
+        if run_start is not None:
+            runs.append((run_start, self.block_count))
+
+        regions = []
+        for start, end in runs:
+            offset = start * self.block_size
+            length = min(end * self.block_size, self.image_size) - offset
+            if length >= min_size:
+                regions.append((offset, length))
+        regions = sorted(regions, key=lambda r: r[1], reverse=True)[:limit]
+        return sorted(regions)
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_current(image_path, map_path=None):
+    """True if the sidecar exists, matches the media size and is newer than the image."""
+    map_path = map_path or sidecar_path(image_path)
+    if not os.path.exists(map_path):
+        return False
+    try:
+        with EntropyMap(map_path) as entropy:
+            if entropy.image_size != media_size(image_path):
+                return False
+    except ValueError:
+        return False
+    return os.path.getmtime(map_path) >= os.path.getmtime(image_path)
+
+
+def summarize(map_path, points=PROFILE_POINTS):
+    """Compact summary stored with the case features."""
+    with EntropyMap(map_path) as entropy:
+        return {
+            "block_size": entropy.block_size,
+            "profile": [{"offset": offset, "entropy": round(value, 3)} for offset, value in entropy.profile(points)],
+            "high_entropy_regions": [{"offset": offset, "length": length}
+                                     for offset, length in entropy.high_entropy_regions()]
+        }
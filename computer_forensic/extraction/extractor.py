@@ -1,8 +1,169 @@
 import os
-import hashlib
 import random
+import time
 
-def parse_disk_image(image_path, progress_callback=None):
+from utils.hashing import DEFAULT_ALGORITHMS, hash_stream, format_digests
+from utils.digest_cache import file_identity, get_default_cache, set_identity
+from utils.block_index import BlockIndexWriter, build_block_index, is_current, sidecar_path
+from utils.known_hashes import KnownHashSet, get_default_known_set
+
+from extraction.file_table import FileTable
+from extraction import entropy_map as entropy
+from extraction.split_raw import image_size, is_split_raw, open_raw, segment_paths
+
+try:
+    from extraction.fs_walker import iter_filesystems, open_image, tag_known_files, walk_filesystem
+    from extraction.mft_parser import iter_fs_records
+    from extraction.parallel_extract import iter_records_parallel
+except ImportError:  # pytsk3 not installed: images are hashed but not walked
+    walk_filesystem = None
+
+PROGRESS_INTERVAL = 0.5  # seconds between metadata progress updates
+SPLIT_READ_WORKERS = 4   # concurrent segment reads while hashing split raw sets
+
+
+def _is_ewf(image_path):
+    return image_path.lower().endswith(".e01")
+
+
+def _segment_paths(image_path):
+    """Every file of a segmented (EWF or split raw) image set."""
+    if _is_ewf(image_path):
+        from extraction.encase_extractor import ewf_segment_paths
+        return ewf_segment_paths(image_path)
+    return segment_paths(image_path)
+
+
+def _open_media(image_path):
+    """Binary stream of the bytes the image digests cover: EWF media decompressed, split raw sets joined."""
+    if _is_ewf(image_path):
+        from extraction.encase_extractor import open_ewf_media
+        return open_ewf_media(image_path)
+    return open_raw(image_path, workers=SPLIT_READ_WORKERS)
+
+
+def compute_image_digests(image_path, algorithms=DEFAULT_ALGORITHMS, digests=None, force_verify=False,
+                          use_cache=True, progress_callback=None, block_index=False):
+    """
+    Return the whole-image digests, reading the image only when necessary.
+
+    Digests supplied by the caller (computed during upload) are used first, then
+    the persistent digest cache. With force_verify the image is always re-read
+    and the result is compared against any cached value.
+
+    With block_index, a per-block sidecar (see utils.block_index) is written next
+    to the image: in the same pass when the image is hashed, otherwise by a
+    separate parallel pass if the sidecar is missing or stale. Split raw sets
+    (.001, .002, ...) are hashed as one concatenated image and EWF sets (.E01,
+    .E02, ...) over their decompressed media, the evidence hash EWF records;
+    the cache identity covers every segment, and their sidecar is only
+    written by the hashing pass.
+    """
+    ewf = _is_ewf(image_path)
+    segmented = ewf or is_split_raw(image_path)
+    if ewf:
+        digests = None  # computed over the uploaded container file, not the media
+    size = entropy.media_size(image_path) if ewf else image_size(image_path)
+    cache = get_default_cache() if use_cache else None
+    identity = None
+    if cache:
+        identity = set_identity(_segment_paths(image_path)) if segmented else file_identity(image_path)
+    cached = cache.get(identity, algorithms) if cache else None
+
+    if not force_verify:
+        if digests and all(a in digests for a in algorithms):
+            # Digests were computed while the file was written; no second read needed
+            result = {"digests": {a: digests[a] for a in algorithms}, "source": "upload"}
+            if cache:
+                cache.put(identity, digests)
+        elif cached:
+            result = {"digests": cached, "source": "cache"}
+        else:
+            result = None
+        if result and block_index and not is_current(image_path, image_size=size):
+            if segmented:
+                result = None  # fall through to the hashing pass, which writes the sidecar
+            else:
+                if progress_callback:
+                    progress_callback(20, "Building block hash index...")
+                build_block_index(image_path)
+        if result:
+            result.update({"bytes": 0, "seconds": 0.0, "mb_per_s": 0.0})
+            if block_index:
+                result["block_index"] = sidecar_path(image_path)
+            return result
+
+    if progress_callback:
+        progress_callback(20, "Reading file and calculating hashes...")
+
+    # Compute all digests in one pass; progress is throttled inside the engine
+    def hash_progress(bytes_read, total):
+        if progress_callback and size > 0:
+            progress = 20 + int((bytes_read / size) * 40)  # 20-60% for hashing
+            progress_callback(progress, f"Hashing: {bytes_read/1024/1024:.1f} MB / {size/1024/1024:.1f} MB")
+
+    block_writer = BlockIndexWriter(sidecar_path(image_path)) if block_index else None
+    try:
+        with _open_media(image_path) as f:
+            result = hash_stream(f, algorithms, total_size=size, progress_callback=hash_progress,
+                                 block_writer=block_writer)
+    finally:
+        if block_writer:
+            block_writer.close()
+    result["source"] = "image"
+    if block_writer:
+        result["block_index"] = block_writer.path
+
+    if cached:
+        result["verified"] = cached == result["digests"]
+        if not result["verified"]:
+            print(f"WARNING: digests of {image_path} differ from the cached digests")
+    if cache:
+        cache.put(identity, result["digests"])
+    return result
+
+
+def compute_entropy_summary(image_path, progress_callback=None):
+    """Build (or reuse) the entropy sidecar for an image and return its summary; progress maps to 60-65%."""
+    map_path = entropy.sidecar_path(image_path)
+
+    def entropy_progress(done, total):
+        if progress_callback and total:
+            progress_callback(60 + int(5 * done / total), f"Computing entropy map: {done * 100 // total}%")
+
+    try:
+        if not entropy.is_current(image_path, map_path):
+            entropy.build_entropy_map(image_path, map_path, progress_callback=entropy_progress)
+    except (OSError, ImportError) as e:  # ImportError: an EWF set without pyewf
+        print(f"Entropy map failed for {image_path}: {e}")
+        return None
+    return entropy.summarize(map_path)
+
+
+def _iter_image_records(img, image_path, workers, filesystems, known=None):
+    """
+    Yield file records from every filesystem, appending each partition offset to `filesystems`.
+    With a KnownHashSet, files are also tagged as known/unknown.
+    """
+    if workers > 1:
+        known_path = known.path if known is not None else None
+        for record in iter_records_parallel(image_path, workers, split_subtrees=True, known_hashes=known_path):
+            if record["partition_offset"] not in filesystems:
+                filesystems.append(record["partition_offset"])
+            yield record
+        return
+
+    for offset, fs in iter_filesystems(img):
+        filesystems.append(offset)
+        records = iter_fs_records(fs)
+        if known is not None:
+            records = tag_known_files(fs, records, known)
+        yield from records
+
+
+def parse_disk_image(image_path, progress_callback=None, algorithms=DEFAULT_ALGORITHMS, digests=None,
+                     force_verify=False, use_cache=True, block_index=False, workers=1, entropy_map=False,
+                     known_hashes=None):
     """
     Parse disk image and extract metadata.
     Supports .E01, .001, .dd, .img formats
@@ -10,38 +171,39 @@ def parse_disk_image(image_path, progress_callback=None):
     Args:
         image_path: Path to the disk image file
         progress_callback: Optional callback function(progress, message) for progress updates
+        algorithms: Digests to compute over the image (any of "md5", "sha1", "sha256")
+        digests: Optional {algorithm: hexdigest} already computed for this file (e.g. while
+            it was uploaded). If it covers every algorithm, the hashing pass is skipped.
+        force_verify: Always re-hash the image (chain-of-custody runs), ignoring
+            supplied and cached digests
+        use_cache: Look up and record digests in the persistent digest cache
+        block_index: Also write a per-block hash sidecar (<image>.blkidx) for partial
+            re-verification and acquisition diffs
+        workers: Number of worker processes for the filesystem walk. With more than
+            one, partitions and top-level directories are walked in parallel.
+        entropy_map: Also compute a per-block entropy map (<image>.entropy) to locate
+            encrypted or compressed regions. An up-to-date sidecar is reused. The map
+            covers the media, so an .E01 set is measured over its decompressed data.
+        known_hashes: Path of a known-file hash set (.khs, see utils.known_hashes). Every
+            allocated file is hashed and tagged known/unknown. Defaults to the set named
+            by FORENSIC_KNOWN_HASHES; without one, files are not hashed.
     """
     if not os.path.exists(image_path):
         return {"error": f"File not found: {image_path}"}
 
-    size = os.path.getsize(image_path)
+    size = image_size(image_path)
     filename = os.path.basename(image_path)
     ext = os.path.splitext(filename)[1].lower()
 
-    if progress_callback:
-        progress_callback(20, "Reading file and calculating hashes...")
+    hash_result = compute_image_digests(
+        image_path, algorithms, digests=digests, force_verify=force_verify,
+        use_cache=use_cache, progress_callback=progress_callback, block_index=block_index
+    )
+
+    entropy_summary = None
+    if entropy_map:
+        entropy_summary = compute_entropy_summary(image_path, progress_callback)
 
-    # Compute MD5 and SHA256 with progress tracking
-    md5_hash = hashlib.md5()
-    sha256_hash = hashlib.sha256()
-    
-    bytes_read = 0
-    chunk_size = 8192
-    
-    with open(image_path, "rb") as f:
-        while True:
-            chunk = f.read(chunk_size)
-            if not chunk:
-                break
-            md5_hash.update(chunk)
-            sha256_hash.update(chunk)
-            
-            # Update progress
-            bytes_read += len(chunk)
-            if progress_callback and size > 0:
-                progress = 20 + int((bytes_read / size) * 40)  # 20-60% for hashing
-                progress_callback(progress, f"Hashing: {bytes_read/1024/1024:.1f} MB / {size/1024/1024:.1f} MB")
-    
     if progress_callback:
         progress_callback(65, "Extracting file metadata...")
 
@@ -54,39 +216,52 @@ def parse_disk_image(image_path, progress_callback=None):
     }
     file_system = fs_map.get(ext, 'Unknown')
 
-    # Simulate file extraction (in real scenario, parse actual filesystem)
-    recent_files = [
-        f"Documents/report_{i}.pdf" for i in range(1, 6)
-    ] + [
-        f"Pictures/photo_{i}.jpg" for i in range(1, 4)
-    ] + [
-        f"Downloads/setup_{i}.exe" for i in range(1, 3)
-    ]
-
-    # Simulate file type distribution
-    file_types = {
-        "PDF": random.randint(10, 50),
-        "DOCX": random.randint(5, 30),
-        "JPG": random.randint(20, 100),
-        "PNG": random.randint(10, 50),
-        "EXE": random.randint(5, 20),
-        "TXT": random.randint(15, 40),
-        "ZIP": random.randint(3, 15),
-        "MP4": random.randint(2, 10)
-    }
-    
-    total_files = sum(file_types.values())
-    allocated_space = size * 0.7  # 70% allocated
-    unallocated_space = size * 0.3  # 30% unallocated
+    # Walk every filesystem in the image into a compact columnar table;
+    # build_features computes the aggregates from it
+    table = FileTable()
+    media_size = size
+    filesystems = []
+    if walk_filesystem is not None:
+        known = KnownHashSet(known_hashes) if known_hashes else get_default_known_set()
+        try:
+            img = open_image(image_path)
+            media_size = img.get_size()
+            last_report = time.monotonic()
+            for record in _iter_image_records(img, image_path, workers, filesystems, known):
+                table.append(record)
+                if progress_callback and time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    last_report = time.monotonic()
+                    progress_callback(65, f"Extracting file metadata: {len(table)} entries...")
+        except Exception as e:
+            print(f"Filesystem walk failed for {image_path}: {e}")
+        finally:
+            if known is not None:
+                known.close()
+
+    if filesystems:
+        allocated_space = min(table.allocated_bytes(), media_size)
+        unallocated_space = media_size - allocated_space
+        space = f"Allocated: {allocated_space/1024/1024:.2f} MB, Unallocated: {unallocated_space/1024/1024:.2f} MB"
+    else:
+        space = "N/A (no filesystem found)"
 
     return {
         "filename": filename,
-        "recent_files": recent_files[:10],  # Top 10 recent files
+        "file_table": table,
         "file_system": file_system,
-        "total_files": total_files,
-        "space": f"Allocated: {allocated_space/1024/1024:.2f} MB, Unallocated: {unallocated_space/1024/1024:.2f} MB",
-        "hash": f"MD5: {md5_hash.hexdigest()}, SHA256: {sha256_hash.hexdigest()}",
+        "total_files": table.total_files,
+        "space": space,
+        "hash": format_digests(hash_result["digests"]),
+        "hash_stats": {
+            "bytes": hash_result["bytes"],
+            "seconds": round(hash_result["seconds"], 3),
+            "mb_per_s": round(hash_result["mb_per_s"], 1),
+            "source": hash_result["source"],
+            "verified": hash_result.get("verified"),
+            "block_index": hash_result.get("block_index")
+        },
+        "entropy": entropy_summary,
         "keys": [f"case_id:{random.randint(1000, 9999)}", "examiner:Forensic_Team", f"evidence_tag:EV{random.randint(100, 999)}"],
-        "file_types": file_types,
-        "size_bytes": size
+        "size_bytes": size,
+        "media_size": media_size
     }
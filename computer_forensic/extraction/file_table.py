@@ -0,0 +1,294 @@
+"""
+Compact columnar table of file metadata.
+
+Numeric fields live in typed `array` columns (8 bytes per value instead of a
+Python int object per dict entry). Extensions and parent directories are
+dictionary-encoded, and file names are packed into one byte blob with an
+offsets column. A table can be saved to a single file and loaded back with
+every column memory-mapped.
+
+Group-by helpers use NumPy when it is installed and fall back to pure Python.
+"""
+import heapq
+import itertools
+import json
+import mmap
+import struct
+from array import array
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"FTABLE01"
+
+# (column name, array typecode)
+COLUMNS = (
+    ("inode", "Q"),
+    ("size", "q"),
+    ("mtime", "q"),
+    ("atime", "q"),
+    ("ctime", "q"),
+    ("crtime", "q"),
+    ("partition", "Q"),
+    ("ext", "I"),          # index into extensions
+    ("dir", "I"),          # index into dirs
+    ("flags", "B"),        # FLAG_* bits
+    ("name_offset", "Q"),  # start of the name in the name blob; one extra entry at the end
+)
+
+FLAG_ALLOCATED = 1
+FLAG_DIR = 2
+FLAG_HASHED = 4   # content was checked against a known-hash set
+FLAG_KNOWN = 8    # ... and found in it
+
+SECONDS_PER_DAY = 86400
+
+
+class FileTable:
+    """Append-only table of file records (see extraction.fs_walker for the record layout)."""
+
+    def __init__(self):
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        self.columns["name_offset"].append(0)
+        self.names = bytearray()
+        self.extensions = []
+        self.dirs = []
+        self._ext_index = {}
+        self._dir_index = {}
+        self._mmap = None
+
+    def __len__(self):
+        return len(self.columns["inode"])
+
+    def _intern(self, value, values, index):
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(values)
+            values.append(value)
+        return code
+
+    def append(self, record):
+        if self._mmap is not None:
+            raise ValueError("Memory-mapped tables are read-only")
+        parent, _, name = record["path"].rpartition("/")
+        c = self.columns
+        c["inode"].append(record["inode"] or 0)
+        c["size"].append(record["size"] or 0)
+        c["mtime"].append(record["mtime"] or 0)
+        c["atime"].append(record["atime"] or 0)
+        c["ctime"].append(record["ctime"] or 0)
+        c["crtime"].append(record["crtime"] or 0)
+        c["partition"].append(record.get("partition_offset", 0))
+        c["ext"].append(self._intern(record["extension"], self.extensions, self._ext_index))
+        c["dir"].append(self._intern(parent, self.dirs, self._dir_index))
+        known = record.get("known")
+        c["flags"].append((FLAG_ALLOCATED if record["allocated"] else 0) | (FLAG_DIR if record["is_dir"] else 0) |
+                          (FLAG_HASHED if known is not None else 0) | (FLAG_KNOWN if known else 0))
+        self.names += name.encode("utf-8", errors="surrogateescape")
+        c["name_offset"].append(len(self.names))
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    # ---------------------------
+    # Row access
+    # ---------------------------
+    def path(self, i):
+        offsets = self.columns["name_offset"]
+        name = bytes(self.names[offsets[i]:offsets[i + 1]]).decode("utf-8", errors="surrogateescape")
+        return f"{self.dirs[self.columns['dir'][i]]}/{name}"
+
+    def record(self, i):
+        c = self.columns
+        flags = c["flags"][i]
+        return {
+            "path": self.path(i),
+            "inode": c["inode"][i],
+            "size": c["size"][i],
+            "mtime": c["mtime"][i],
+            "atime": c["atime"][i],
+            "ctime": c["ctime"][i],
+            "crtime": c["crtime"][i],
+            "allocated": bool(flags & FLAG_ALLOCATED),
+            "is_dir": bool(flags & FLAG_DIR),
+            "known": bool(flags & FLAG_KNOWN) if flags & FLAG_HASHED else None,
+            "extension": self.extensions[c["ext"][i]],
+            "partition_offset": c["partition"][i]
+        }
+
+    def iter_records(self):
+        for i in range(len(self)):
+            yield self.record(i)
+
+    # ---------------------------
+    # Vectorized aggregates
+    # ---------------------------
+    def _np(self, name):
+        column = self.columns[name]
+        code = column.typecode if isinstance(column, array) else column.format
+        return np.frombuffer(column, dtype=np.dtype(code))
+
+    def _file_mask(self):
+        """NumPy mask (or Python selector list) of rows that are files rather than directories."""
+        if np is not None:
+            return (self._np("flags") & FLAG_DIR) == 0
+        return [not (f & FLAG_DIR) for f in self.columns["flags"]]
+
+    def _files(self, name):
+        if np is not None:
+            return self._np(name)[self._file_mask()]
+        return list(itertools.compress(self.columns[name], self._file_mask()))
+
+    @property
+    def total_files(self):
+        if np is not None:
+            return int(self._file_mask().sum())
+        return sum(self._file_mask())
+
+    def allocated_bytes(self):
+        """Sum of the sizes of allocated files."""
+        if np is not None:
+            mask = self._file_mask() & ((self._np("flags") & FLAG_ALLOCATED) != 0)
+            return int(self._np("size")[mask].sum())
+        return sum(size for size, flags in zip(self.columns["size"], self.columns["flags"])
+                   if flags & FLAG_ALLOCATED and not flags & FLAG_DIR)
+
+    def known_counts(self):
+        """{"known": n, "unknown": n} over files checked against a known-hash set."""
+        if np is not None:
+            flags = self._np("flags")
+            hashed = (flags & FLAG_HASHED) != 0
+            known = int((hashed & ((flags & FLAG_KNOWN) != 0)).sum())
+            return {"known": known, "unknown": int(hashed.sum()) - known}
+        counts = Counter(f & FLAG_KNOWN for f in self.columns["flags"] if f & FLAG_HASHED)
+        return {"known": counts[FLAG_KNOWN], "unknown": counts[0]}
+
+    def type_counts(self):
+        """{"PDF": n, ...} over files; files without an extension count as "NO EXT"."""
+        codes = self._files("ext")
+        if np is not None:
+            counts = np.bincount(codes, minlength=len(self.extensions))
+            pairs = ((self.extensions[i], int(n)) for i, n in enumerate(counts) if n)
+        else:
+            pairs = ((self.extensions[code], n) for code, n in Counter(codes).items())
+
+        result = Counter()
+        for ext, n in pairs:
+            result[ext.upper() or "NO EXT"] += n
+        return dict(result.most_common())
+
+    def size_histogram(self):
+        """File counts per power-of-two size bucket: {"0 B": n, "1 B": n, "2 B": n, "4 B": n, ...}."""
+        sizes = self._files("size")
+        if np is not None:
+            sizes = np.maximum(sizes, 0).astype(np.uint64)
+            buckets = np.zeros(len(sizes), dtype=np.int64)
+            nonzero = sizes > 0
+            buckets[nonzero] = np.floor(np.log2(sizes[nonzero].astype(np.float64))).astype(np.int64) + 1
+            counts = {int(b): int(n) for b, n in zip(*np.unique(buckets, return_counts=True))}
+        else:
+            counts = Counter(max(s, 0).bit_length() for s in sizes)
+        return {_size_label(b): counts[b] for b in sorted(counts)}
+
+    def time_buckets(self, column="mtime", bucket_seconds=SECONDS_PER_DAY):
+        """File counts per time bucket: {bucket_start_epoch: n}, skipping unset (0) times."""
+        times = self._files(column)
+        if np is not None:
+            times = times[times > 0] // bucket_seconds
+            keys, counts = np.unique(times, return_counts=True)
+            return {int(k) * bucket_seconds: int(n) for k, n in zip(keys, counts)}
+        counts = Counter(t // bucket_seconds for t in times if t > 0)
+        return {k * bucket_seconds: counts[k] for k in sorted(counts)}
+
+    def recent(self, limit=10, column="mtime"):
+        """Paths of the `limit` most recent files by `column`, newest first."""
+        flags = self.columns["flags"]
+        if np is not None and len(self):
+            times = self._np(column).astype(np.int64)
+            times = np.where(self._file_mask(), times, np.iinfo(np.int64).min)
+            limit = min(limit, len(times))
+            top = np.argpartition(times, -limit)[-limit:]
+            rows = [int(i) for i in top[np.argsort(times[top])[::-1]] if not flags[int(i)] & FLAG_DIR]
+        else:
+            times = self.columns[column]
+            rows = heapq.nlargest(limit, (i for i in range(len(self)) if not flags[i] & FLAG_DIR),
+                                  key=times.__getitem__)
+        return [self.path(i) for i in rows]
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self, path):
+        """Write the table to one file: a JSON header followed by 8-byte aligned raw columns."""
+        layout = []
+        offset = 0
+        blobs = []
+        for name, code in COLUMNS:
+            data = self.columns[name].tobytes() if isinstance(self.columns[name], array) \
+                else bytes(self.columns[name])
+            layout.append({"name": name, "type": code, "offset": offset, "length": len(data)})
+            blobs.append(data)
+            offset += _aligned(len(data))
+        layout.append({"name": "names", "type": "B", "offset": offset, "length": len(self.names)})
+        blobs.append(bytes(self.names))
+
+        header = json.dumps({
+            "rows": len(self),
+            "columns": layout,
+            "extensions": self.extensions,
+            "dirs": self.dirs
+        }).encode()
+        data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            f.write(b"\0" * (data_start - f.tell()))
+            for blob in blobs:
+                f.write(blob)
+                f.write(b"\0" * (_aligned(len(blob)) - len(blob)))
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved table; columns are zero-copy memoryviews over a read-only mmap."""
+        table = cls()
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a file table: {path}")
+            (header_len,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_len))
+            data_start = _aligned(len(MAGIC) + 8 + header_len)
+            table._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(table._mmap)
+        for column in header["columns"]:
+            start = data_start + column["offset"]
+            chunk = view[start:start + column["length"]]
+            if column["name"] == "names":
+                table.names = chunk
+            else:
+                table.columns[column["name"]] = chunk.cast(column["type"])
+        table.extensions = header["extensions"]
+        table.dirs = header["dirs"]
+        return table
+
+
+def _aligned(n, alignment=8):
+    return -(-n // alignment) * alignment
+
+
+def _size_label(bucket):
+    """Label for a size_histogram bucket: files of size [2**(b-1), 2**b)."""
+    if bucket == 0:
+        return "0 B"
+    size = 1 << (bucket - 1)
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if size < 1024:
+            return f"{size} {unit}"
+        size //= 1024
+    return f"{size} PB"
@@ -0,0 +1,150 @@
+import hashlib
+import os
+
+import pytsk3
+
+from extraction.image_adapter import SplitRawImgInfo
+from extraction.split_raw import is_split_raw
+
+
+def open_image(image_path):
+    """Open a disk image for pytsk3: EWF sets through pyewf, split raw sets in place, everything else as raw."""
+    if image_path.lower().endswith(".e01"):
+        from extraction.encase_extractor import open_ewf_image
+        return open_ewf_image(image_path)
+    if is_split_raw(image_path):
+        return SplitRawImgInfo(image_path)
+    return pytsk3.Img_Info(image_path)
+
+
+def iter_filesystems(img):
+    """
+    Yield (byte_offset, FS_Info) for every filesystem pytsk3 can open in the image.
+
+    Partitioned images are probed partition by partition; if there is no
+    partition table the whole image is tried as a single filesystem.
+    """
+    try:
+        volume = pytsk3.Volume_Info(img)
+    except Exception:
+        volume = None
+
+    if volume is None:
+        try:
+            yield 0, pytsk3.FS_Info(img)
+        except Exception as e:
+            print(f"No filesystem found: {e}")
+        return
+
+    block_size = volume.info.block_size
+    for part in volume:
+        if part.len <= 0 or part.flags & pytsk3.TSK_VS_PART_FLAG_META:
+            continue
+        offset = part.start * block_size
+        try:
+            fs = pytsk3.FS_Info(img, offset=offset)
+        except Exception:
+            continue
+        yield offset, fs
+
+
+def _make_record(entry, parent_path, name):
+    meta = entry.info.meta
+    name_info = entry.info.name
+    path = f"{parent_path}/{name}"
+
+    is_dir = False
+    if meta is not None:
+        is_dir = meta.type == pytsk3.TSK_FS_META_TYPE_DIR
+    elif name_info.type == pytsk3.TSK_FS_NAME_TYPE_DIR:
+        is_dir = True
+
+    ext = os.path.splitext(name)[1][1:].lower() if not is_dir else ""
+    return {
+        "path": path,
+        "name": name,
+        "inode": meta.addr if meta else name_info.meta_addr,
+        "size": meta.size if meta else 0,
+        "mtime": meta.mtime if meta else 0,
+        "atime": meta.atime if meta else 0,
+        "ctime": meta.ctime if meta else 0,
+        "crtime": meta.crtime if meta else 0,
+        "allocated": bool(name_info.flags & pytsk3.TSK_FS_NAME_FLAG_ALLOC),
+        "is_dir": is_dir,
+        "extension": ext
+    }
+
+
+def walk_filesystem(fs, root_inode=None, root_path="", recursive=True):
+    """
+    Recursively yield a record dict for every entry in a filesystem.
+
+    The walk is depth-first with an explicit stack of pending directories
+    (inode, path), so memory is bounded by the directories still to visit
+    rather than by the number of files. Directory inodes already visited are
+    skipped, which protects against cycles through hard links or corrupted
+    metadata. With recursive=False only the entries of the root directory
+    are yielded.
+    """
+    if root_inode is None:
+        root_inode = fs.info.root_inum
+
+    stack = [(root_inode, root_path)]
+    visited = set()
+    while stack:
+        inode, path = stack.pop()
+        if inode in visited:
+            continue
+        visited.add(inode)
+
+        try:
+            directory = fs.open_dir(inode=inode)
+        except Exception:
+            continue
+
+        for entry in directory:
+            name_info = entry.info.name
+            if name_info is None or name_info.name is None:
+                continue
+            name = name_info.name.decode("utf-8", errors="replace")
+            if name in (".", ".."):
+                continue
+
+            try:
+                record = _make_record(entry, path, name)
+            except Exception:
+                continue
+            yield record
+
+            if recursive and record["is_dir"] and record["inode"] not in visited:
+                stack.append((record["inode"], record["path"]))
+
+
+def file_digest(fs, inode, algorithm="md5", block_size=1024 * 1024):
+    """Raw digest of a file's content, read through pytsk3 in `block_size` chunks."""
+    f = fs.open_meta(inode=inode)
+    size = f.info.meta.size
+    h = hashlib.new(algorithm)
+    offset = 0
+    while offset < size:
+        data = f.read_random(offset, min(block_size, size - offset))
+        if not data:
+            break
+        h.update(data)
+        offset += len(data)
+    return h.digest()
+
+
+def tag_known_files(fs, records, known):
+    """
+    Set record["known"] for allocated regular files by hashing their content and
+    looking it up in a utils.known_hashes.KnownHashSet (None if the file could
+    not be read; directories and unallocated entries are left untagged).
+    """
+    for record in records:
+        if not record["is_dir"] and record["allocated"]:
+            try:
+                record["known"] = file_digest(fs, record["inode"], known.algorithm) in known
+            except Exception:
+                record["known"] = None
+        yield record
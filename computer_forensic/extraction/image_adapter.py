@@ -0,0 +1,212 @@
+import io
+import threading
+from collections import OrderedDict
+
+import pytsk3
+
+from extraction.split_raw import SplitRawImage
+
+DEFAULT_CHUNK_SIZE = 32 * 1024              # EWF default: 64 sectors of 512 bytes
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024     # 256MB of decompressed chunks
+DEFAULT_MAX_READAHEAD = 32                  # blocks fetched at once on sequential access
+
+
+class BlockCache:
+    """
+    Byte-bounded LRU cache of block-aligned reads.
+
+    `read_at(offset, size)` is only ever called with block-aligned offsets and
+    whole blocks (except at the end of the media). When consecutive misses walk
+    forward through the image, the number of blocks fetched per miss doubles up
+    to `max_readahead`, so sequential scans turn into a few large reads.
+    """
+
+    def __init__(self, read_at, media_size, block_size=DEFAULT_CHUNK_SIZE,
+                 max_bytes=DEFAULT_CACHE_BYTES, max_readahead=DEFAULT_MAX_READAHEAD):
+        self._read_at = read_at
+        self.media_size = media_size
+        self.block_size = block_size
+        self.max_blocks = max(1, max_bytes // block_size)
+        self.max_readahead = max(1, max_readahead)
+        self._blocks = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_block = None
+        self._readahead = 1
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_read = 0
+
+    def read(self, offset, size):
+        if offset >= self.media_size or size <= 0:
+            return b""
+        size = min(size, self.media_size - offset)
+        first = offset // self.block_size
+        last = (offset + size - 1) // self.block_size
+
+        with self._lock:
+            # Bulk reads larger than the readahead window would only flush the cache
+            if last - first >= self.max_readahead:
+                self.misses += 1
+                self.bytes_read += size
+                return self._read_at(offset, size)
+
+            parts = [self._get_block(b) for b in range(first, last + 1)]
+
+        start = offset - first * self.block_size
+        if len(parts) == 1:
+            return parts[0][start:start + size]
+        return b"".join(parts)[start:start + size]
+
+    def _get_block(self, block):
+        data = self._blocks.get(block)
+        if data is not None:
+            self.hits += 1
+            self._blocks.move_to_end(block)
+            return data
+
+        self.misses += 1
+        if block == self._next_block:
+            self._readahead = min(self._readahead * 2, self.max_readahead)
+        else:
+            self._readahead = 1
+
+        count = min(self._readahead, -(-(self.media_size - block * self.block_size) // self.block_size))
+        data = self._read_at(block * self.block_size, count * self.block_size)
+        self.bytes_read += len(data)
+        for i in range(count):
+            chunk = data[i * self.block_size:(i + 1) * self.block_size]
+            if not chunk:
+                break
+            self._blocks[block + i] = chunk
+            self._blocks.move_to_end(block + i)
+        self._next_block = block + count
+
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return self._blocks.get(block, data[:self.block_size])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "bytes_read": self.bytes_read,
+            "cached_bytes": len(self._blocks) * self.block_size
+        }
+
+
+def ewf_chunk_size(ewf_handle):
+    """Best-effort EWF chunk size; falls back to the format default."""
+    try:
+        return int(ewf_handle.get_chunk_size())
+    except Exception:
+        pass
+    try:
+        return int(ewf_handle.get_sectors_per_chunk()) * int(ewf_handle.get_bytes_per_sector())
+    except Exception:
+        return DEFAULT_CHUNK_SIZE
+
+
+class EWFImgInfo(pytsk3.Img_Info):
+    """
+    pytsk3 image backed by a pyewf handle, with a chunk-aligned read cache.
+
+    pytsk3 issues many small reads for the same EWF chunks while walking a
+    filesystem; each miss decompresses whole chunks once and serves later
+    reads from memory.
+    """
+
+    def __init__(self, ewf_handle, cache_bytes=DEFAULT_CACHE_BYTES, max_readahead=DEFAULT_MAX_READAHEAD):
+        self._ewf_handle = ewf_handle
+        self._cache = BlockCache(
+            self._read_at, ewf_handle.get_media_size(), ewf_chunk_size(ewf_handle),
+            max_bytes=cache_bytes, max_readahead=max_readahead
+        )
+        super().__init__(url="", type=pytsk3.TSK_IMG_TYPE_EXTERNAL)
+
+    def _read_at(self, offset, size):
+        if hasattr(self._ewf_handle, "read_buffer_at_offset"):
+            return self._ewf_handle.read_buffer_at_offset(size, offset)
+        self._ewf_handle.seek(offset)
+        return self._ewf_handle.read(size)
+
+    def close(self):
+        self._ewf_handle.close()
+
+    def read(self, offset, size):
+        return self._cache.read(offset, size)
+
+    def get_size(self):
+        return self._ewf_handle.get_media_size()
+
+    def cache_stats(self):
+        return self._cache.stats()
+
+
+class EWFMediaStream(io.RawIOBase):
+    """Unbuffered, seekable binary stream over the decompressed media of a pyewf handle."""
+
+    def __init__(self, ewf_handle):
+        super().__init__()
+        self._ewf_handle = ewf_handle
+        self.size = ewf_handle.get_media_size()
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buf):
+        view = memoryview(buf).cast("B")
+        size = max(0, min(len(view), self.size - self._pos))
+        if not size:
+            return 0
+        if hasattr(self._ewf_handle, "read_buffer_at_offset"):
+            data = self._ewf_handle.read_buffer_at_offset(size, self._pos)
+        else:
+            self._ewf_handle.seek(self._pos)
+            data = self._ewf_handle.read(size)
+        n = len(data)
+        view[:n] = data
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._ewf_handle.close()
+        super().close()
+
+
+class SplitRawImgInfo(pytsk3.Img_Info):
+    """pytsk3 image over a split raw set (image.001, image.002, ...) read in place."""
+
+    def __init__(self, path, workers=1):
+        self._image = SplitRawImage(path, workers)
+        super().__init__(url="", type=pytsk3.TSK_IMG_TYPE_EXTERNAL)
+
+    def close(self):
+        self._image.close()
+
+    def read(self, offset, size):
+        return self._image.read(offset, size)
+
+    def get_size(self):
+        return self._image.size
@@ -0,0 +1,583 @@
+"""
+Bulk $MFT fast path for NTFS metadata extraction.
+
+Instead of asking pytsk3 for one directory entry at a time, $MFT is read in
+large sequential blocks and its fixed-size FILE records are parsed in
+batches. When NumPy is installed the whole batch is parsed with array
+operations: record headers, update-sequence fixups, and an attribute walk
+that advances every record's attribute cursor at once, collecting
+$STANDARD_INFORMATION times, $FILE_NAME parent references and name
+locations, and $DATA / $INDEX_ROOT sizes. The name strings of a batch are
+gathered and decoded in one call. Without NumPy the same parse runs with
+struct.
+Full paths are rebuilt afterwards from an index array of parent record
+numbers.
+
+Records the batch parse cannot finish are resolved through pytsk3: records
+with an $ATTRIBUTE_LIST (attributes spread over extension records), base
+records whose name or unnamed $DATA is not in the record itself, and
+malformed ones. pytsk3 follows the attribute list, and the names it returns
+go into the same index arrays, so those files still get their full paths.
+Records pytsk3 cannot open either (torn writes) are only reachable by name
+through their parent directory's index, so for those the directory walk is
+run and its entries for them are kept.
+
+Records are yielded in the same layout as extraction.fs_walker. Like the
+walk, every Win32/POSIX name of a file (hard links included) is a separate
+record, and the DOS 8.3 alias is not reported.
+"""
+import itertools
+import os
+import struct
+from array import array
+
+import pytsk3
+
+from extraction.fs_walker import walk_filesystem
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BATCH_RECORDS = 4096
+SECTOR_SIZE = 512
+ROOT_RECORD = 5
+FIRST_USER_RECORD = 16  # records 0-15 are reserved metafiles
+ORPHAN_DIR = "/$OrphanFiles"
+MIN_ATTRIBUTE_SIZE = 0x18  # resident header; bounds the number of attributes in a record
+
+FILETIME_EPOCH_DIFF = 116444736000000000  # 100ns intervals between 1601 and 1970
+RECORD_NUMBER_MASK = 0xFFFFFFFFFFFF
+
+ATTR_STANDARD_INFORMATION = 0x10
+ATTR_ATTRIBUTE_LIST = 0x20
+ATTR_FILE_NAME = 0x30
+ATTR_DATA = 0x80
+ATTR_INDEX_ROOT = 0x90
+ATTR_END = 0xFFFFFFFF
+
+FLAG_IN_USE = 0x01
+FLAG_DIRECTORY = 0x02
+
+NAMESPACE_DOS = 2
+
+_u16 = struct.Struct("<H")
+_u32 = struct.Struct("<I")
+_u64 = struct.Struct("<Q")
+_si_times = struct.Struct("<4Q")
+
+
+def _unix_time(filetime):
+    if filetime <= FILETIME_EPOCH_DIFF:
+        return 0
+    return (filetime - FILETIME_EPOCH_DIFF) // 10000000
+
+
+def is_ntfs(fs):
+    try:
+        return bool(fs.info.ftype & pytsk3.TSK_FS_TYPE_NTFS)
+    except Exception:
+        return False
+
+
+class _MftColumns:
+    """Per-record fields collected during the parse, indexed by record number."""
+
+    def __init__(self, count):
+        self.valid = bytearray(count)        # 1 if the record parsed and has a name
+        self.flags = bytearray(count)
+        self.seq = array("H", bytes(2 * count))
+        self.parent = array("q", bytes(8 * count))
+        self.parent_seq = array("H", bytes(2 * count))
+        self.size = array("q", bytes(8 * count))
+        self.times = array("q", bytes(32 * count))  # crtime, mtime, ctime, atime
+        self.names = [None] * count
+        self.links = []     # (record, parent, parent seq, name) for each name after the first (hard links)
+        self.unparsed = []  # records left to pytsk3
+
+
+def _store_names(cols, number, names):
+    """Record the names of a file; `names` is [(namespace, parent reference, name)] in attribute order."""
+    # The 8.3 alias is only used when there is nothing else, as in the directory walk
+    kept = [n for n in names if n[0] != NAMESPACE_DOS] or names
+    _, parent_ref, name = kept[0]
+    cols.names[number] = name
+    cols.parent[number] = parent_ref & RECORD_NUMBER_MASK
+    cols.parent_seq[number] = parent_ref >> 48
+    cols.valid[number] = 1
+    seen = {(parent_ref, name)}
+    for _, parent_ref, name in kept[1:]:
+        if (parent_ref, name) not in seen:
+            seen.add((parent_ref, name))
+            cols.links.append((number, parent_ref & RECORD_NUMBER_MASK, parent_ref >> 48, name))
+
+
+def _apply_fixups(record, record_size):
+    """Apply the update sequence array in place; False if the record is torn."""
+    usa_offset = _u16.unpack_from(record, 4)[0]
+    usa_count = _u16.unpack_from(record, 6)[0]
+    if (usa_count != record_size // SECTOR_SIZE + 1 or usa_offset + 2 * usa_count > record_size
+            or usa_offset % 2):
+        return False
+    usn = record[usa_offset:usa_offset + 2]
+    for i in range(1, usa_count):
+        end = i * SECTOR_SIZE
+        if record[end - 2:end] != usn:
+            return False
+        record[end - 2:end] = record[usa_offset + 2 * i:usa_offset + 2 * i + 2]
+    return True
+
+
+# ---------------------------
+# Batch parse: struct
+# ---------------------------
+def _parse_attributes(record, number, cols):
+    """
+    Walk the attributes of one fixed-up base record into `cols`.
+
+    Returns False when pytsk3 has to resolve the record instead: malformed
+    attributes, an $ATTRIBUTE_LIST, or a name or unnamed $DATA that is not
+    in this record.
+    """
+    offset = _u16.unpack_from(record, 0x14)[0]
+    used = min(_u32.unpack_from(record, 0x18)[0], len(record))
+    times = None
+    names = []
+    size = None
+    index_size = None
+
+    while offset + 16 <= used:
+        if offset % 8:
+            return False  # attribute headers are 8-byte aligned
+        attr_type = _u32.unpack_from(record, offset)[0]
+        if attr_type == ATTR_END:
+            break
+        length = _u32.unpack_from(record, offset + 4)[0]
+        non_resident = record[offset + 8]
+        if (length < (0x40 if non_resident else MIN_ATTRIBUTE_SIZE) or offset + length > used
+                or attr_type == ATTR_ATTRIBUTE_LIST):
+            return False
+        name_length = record[offset + 9]
+
+        if not non_resident:
+            content_size = _u32.unpack_from(record, offset + 0x10)[0]
+            content = offset + _u16.unpack_from(record, offset + 0x14)[0]
+            if content + content_size > offset + length:
+                return False
+
+            if attr_type == ATTR_STANDARD_INFORMATION and times is None and content_size >= 32:
+                times = _si_times.unpack_from(record, content)
+            elif attr_type == ATTR_FILE_NAME and content_size >= 0x42:
+                name_chars = record[content + 0x40]
+                if 0x42 + 2 * name_chars > content_size:
+                    return False
+                raw = bytes(record[content + 0x42:content + 0x42 + 2 * name_chars])
+                names.append((record[content + 0x41], _u64.unpack_from(record, content)[0],
+                              raw.decode("utf-16-le", errors="replace")))
+            elif attr_type == ATTR_DATA and name_length == 0 and size is None:
+                size = content_size
+            elif attr_type == ATTR_INDEX_ROOT and index_size is None:
+                index_size = content_size
+        elif attr_type == ATTR_DATA and name_length == 0 and size is None:
+            # Only the first extent carries the sizes; a later one means the first is elsewhere
+            if _u64.unpack_from(record, offset + 0x10)[0] != 0:
+                return False
+            size = _u64.unpack_from(record, offset + 0x30)[0]
+
+        offset += length
+
+    if not names:
+        # Unused slot, or a base record whose names live in an extension record
+        return times is None
+    is_dir = cols.flags[number] & FLAG_DIRECTORY
+    if not is_dir and size is None:
+        return False
+    if times is not None:
+        cols.times[number * 4:number * 4 + 4] = array("q", map(_unix_time, times))
+    # Like TSK, a directory's size is that of its $I30 index root
+    cols.size[number] = (index_size or 0) if is_dir else size
+    _store_names(cols, number, names)
+    return True
+
+
+def _parse_batch_python(batch, first, count, record_size, cols):
+    view = memoryview(batch)
+    for i in range(count):
+        number = first + i
+        record = bytearray(view[i * record_size:(i + 1) * record_size])
+        if record[:4] != b"FILE":
+            continue
+        if _u64.unpack_from(record, 0x20)[0] != 0:
+            continue  # extension record; its base record has an $ATTRIBUTE_LIST and goes to pytsk3
+        if not _apply_fixups(record, record_size):
+            cols.unparsed.append(number)
+            continue
+        cols.flags[number] = _u16.unpack_from(record, 0x16)[0] & 0xFF
+        cols.seq[number] = _u16.unpack_from(record, 0x10)[0]
+        if not _parse_attributes(record, number, cols):
+            cols.unparsed.append(number)
+
+
+# ---------------------------
+# Batch parse: NumPy
+# ---------------------------
+def _gather(recs, rows, offsets, width, dtype):
+    """Little-endian field of `width` bytes at per-row `offsets` (clamped to the record) for `rows`."""
+    offsets = np.minimum(offsets, recs.shape[1] - width)
+    return recs[rows[:, None], offsets[:, None] + np.arange(width)].view(dtype).reshape(-1)
+
+
+def _decode_names(recs, starts, chars):
+    """UTF-16 names of `chars` code units at flat byte offsets `starts` of `recs`, decoded in one call."""
+    ends = np.cumsum(chars)
+    begins = ends - chars
+    total = int(ends[-1]) if len(ends) else 0
+    index = np.repeat(starts - 2 * begins, 2 * chars) + np.arange(2 * total)
+    text = recs.reshape(-1)[index]
+    units = text.view("<u2")
+    raw = text.tobytes()
+    bounds = zip(begins.tolist(), ends.tolist())
+    if ((units >= 0xD800) & (units < 0xE000)).any():
+        # Surrogate pairs make characters and code units differ; decode name by name
+        return [raw[2 * b:2 * e].decode("utf-16-le", errors="replace") for b, e in bounds]
+    joined = raw.decode("utf-16-le")
+    return [joined[b:e] for b, e in bounds]
+
+
+def _parse_batch_numpy(batch, first, count, record_size, cols):
+    recs = np.frombuffer(batch, dtype=np.uint8, count=count * record_size).reshape(count, record_size).copy()
+    rows = np.arange(count)
+
+    def field(offset, width, dtype):
+        """Header field at the same `offset` of every record."""
+        return np.ascontiguousarray(recs[:, offset:offset + width]).view(dtype).reshape(-1)
+
+    candidates = (recs[:, :4] == np.frombuffer(b"FILE", dtype=np.uint8)).all(axis=1)
+    candidates &= field(0x20, 8, "<u8") == 0  # skip extension records
+
+    # Update sequence fixups for all candidate records at once
+    usa_offset = field(4, 2, "<u2").astype(np.int64)
+    usa_count = field(6, 2, "<u2").astype(np.int64)
+    sectors = record_size // SECTOR_SIZE
+    torn = candidates & ((usa_count != sectors + 1) | (usa_offset + 2 * usa_count > record_size)
+                         | (usa_offset % 2 != 0))
+    ok = candidates & ~torn
+    halves = recs.view("<u2")
+    usa = halves[rows[:, None], np.where(ok, usa_offset // 2, 0)[:, None] + np.arange(sectors + 1)]
+    tail_columns = np.arange(1, sectors + 1) * (SECTOR_SIZE // 2) - 1
+    tails = halves[:, tail_columns]
+    ok &= (tails == usa[:, :1]).all(axis=1)
+    halves[:, tail_columns] = np.where(ok[:, None], usa[:, 1:], tails)
+    torn |= candidates & ~ok & ~torn
+
+    flags = recs[:, 0x16]
+    is_dir = (flags & FLAG_DIRECTORY) != 0
+    used = np.minimum(field(0x18, 4, "<u4").astype(np.int64), record_size)
+
+    # Attribute walk: one step advances every live record to its next attribute
+    fallback = np.zeros(count, dtype=bool)
+    si_found = np.zeros(count, dtype=bool)
+    si_raw = np.zeros((count, 4), dtype=np.uint64)
+    data_found = np.zeros(count, dtype=bool)
+    data_size = np.zeros(count, dtype=np.int64)
+    index_found = np.zeros(count, dtype=bool)
+    index_size = np.zeros(count, dtype=np.int64)
+    fn_parts = []  # per step: (rows, step, namespace, parent reference, name start, name chars)
+
+    # Attribute headers are 8-byte aligned, so each step reads them as three 64-bit words per record
+    words = recs.view("<u8")
+    last_word = words.shape[1] - 1
+    live = np.flatnonzero(ok)
+    offset = field(0x14, 2, "<u2").astype(np.int64)[live]
+    for step in range(record_size // MIN_ATTRIBUTE_SIZE + 1):
+        keep = offset + 16 <= used[live]
+        fallback[live[keep & (offset & 7 != 0)]] = True
+        keep &= offset & 7 == 0
+        live, offset = live[keep], offset[keep]
+        column = offset >> 3
+        word = words[live, column]
+        attr_type = word & 0xFFFFFFFF
+        keep = attr_type != ATTR_END
+        live, offset, column, attr_type, word = live[keep], offset[keep], column[keep], attr_type[keep], word[keep]
+        if not len(live):
+            break
+
+        length = (word >> 32).astype(np.int64)
+        word = words[live, column + 1]
+        resident = (word & 0xFF) == 0
+        name_length = (word >> 8) & 0xFF
+        word = words[live, np.minimum(column + 2, last_word)]
+        content_size = (word & 0xFFFFFFFF).astype(np.int64)
+        content = offset + ((word >> 32) & 0xFFFF).astype(np.int64)
+        bad = ((length < np.where(resident, MIN_ATTRIBUTE_SIZE, 0x40)) | (offset + length > used[live])
+               | (attr_type == ATTR_ATTRIBUTE_LIST) | (resident & (content + content_size > offset + length)))
+
+        si = ~bad & resident & (attr_type == ATTR_STANDARD_INFORMATION) & (content_size >= 32) & ~si_found[live]
+        if si.any():
+            si_found[live[si]] = True
+            si_raw[live[si]] = np.stack([_gather(recs, live[si], content[si] + 8 * k, 8, "<u8") for k in range(4)],
+                                        axis=1)
+
+        fn = ~bad & resident & (attr_type == ATTR_FILE_NAME) & (content_size >= 0x42)
+        if fn.any():
+            fn_rows, fn_content = live[fn], content[fn]
+            name_chars = recs[fn_rows, np.minimum(fn_content + 0x40, record_size - 1)].astype(np.int64)
+            too_long = 0x42 + 2 * name_chars > content_size[fn]
+            bad[np.flatnonzero(fn)[too_long]] = True
+            fn_ok = ~too_long
+            fn_parts.append((
+                fn_rows[fn_ok], np.full(fn_ok.sum(), step),
+                recs[fn_rows[fn_ok], np.minimum(fn_content[fn_ok] + 0x41, record_size - 1)],
+                _gather(recs, fn_rows[fn_ok], fn_content[fn_ok], 8, "<u8"),
+                fn_content[fn_ok] + 0x42, name_chars[fn_ok]
+            ))
+
+        data = ~bad & (attr_type == ATTR_DATA) & (name_length == 0) & ~data_found[live]
+        if data.any():
+            data_rows = live[data]
+            # Only the first extent carries the sizes; a later start VCN means the first is elsewhere
+            elsewhere = ~resident[data] & (word[data] != 0)
+            bad[np.flatnonzero(data)[elsewhere]] = True
+            real_size = words[data_rows, np.minimum(column[data] + 6, last_word)].astype(np.int64)
+            data_found[data_rows] = True
+            data_size[data_rows] = np.where(resident[data], content_size[data], real_size)
+
+        index = ~bad & resident & (attr_type == ATTR_INDEX_ROOT) & ~index_found[live]
+        index_found[live[index]] = True
+        index_size[live[index]] = content_size[index]
+
+        fallback[live[bad]] = True
+        live, offset = live[~bad], offset[~bad] + length[~bad]
+
+    # Names in attribute order per record; the 8.3 alias only when there is nothing else
+    if fn_parts:
+        fn_rows, fn_step, fn_space, fn_parent, fn_start, fn_chars = (np.concatenate(p) for p in zip(*fn_parts))
+        order = np.lexsort((fn_step, fn_rows))
+        fn_rows, fn_space, fn_parent, fn_start, fn_chars = (
+            a[order] for a in (fn_rows, fn_space, fn_parent, fn_start, fn_chars))
+        has_long_name = np.zeros(count, dtype=bool)
+        has_long_name[fn_rows[fn_space != NAMESPACE_DOS]] = True
+        kept = (fn_space != NAMESPACE_DOS) | ~has_long_name[fn_rows]
+        fn_rows, fn_parent, fn_start, fn_chars = fn_rows[kept], fn_parent[kept], fn_start[kept], fn_chars[kept]
+    else:
+        fn_rows = fn_parent = fn_start = fn_chars = np.zeros(0, dtype=np.int64)
+    has_names = np.zeros(count, dtype=bool)
+    has_names[fn_rows] = True
+
+    fallback |= ok & ~has_names & si_found  # names live in an extension record
+    fallback |= ok & has_names & ~is_dir & ~data_found  # unnamed $DATA lives in an extension record
+    fallback &= ok
+    emit = ok & has_names & ~fallback
+
+    # Header fields of every fixed-up record, as the struct path stores them
+    ok_numbers = first + np.flatnonzero(ok)
+    np.frombuffer(cols.flags, dtype=np.uint8)[ok_numbers] = flags[ok]
+    np.frombuffer(cols.seq, dtype=np.uint16)[ok_numbers] = field(0x10, 2, "<u2")[ok]
+
+    emit_rows = np.flatnonzero(emit)
+    numbers = first + emit_rows
+    si_rows = emit_rows[si_found[emit_rows]]
+    si_times = si_raw[si_rows].astype(np.int64)
+    si_times = np.where(si_raw[si_rows] > FILETIME_EPOCH_DIFF, (si_times - FILETIME_EPOCH_DIFF) // 10000000, 0)
+    np.frombuffer(cols.times, dtype=np.int64).reshape(-1, 4)[first + si_rows] = si_times
+    np.frombuffer(cols.size, dtype=np.int64)[numbers] = np.where(is_dir[emit_rows], index_size[emit_rows],
+                                                                   data_size[emit_rows])
+
+    # First kept name of each emitted record goes into the columns, the others become links
+    selected = emit[fn_rows]
+    fn_rows, fn_parent, fn_start, fn_chars = (a[selected] for a in (fn_rows, fn_parent, fn_start, fn_chars))
+    primary = np.ones(len(fn_rows), dtype=bool)
+    primary[1:] = fn_rows[1:] != fn_rows[:-1]
+    np.frombuffer(cols.parent, dtype=np.int64)[first + fn_rows[primary]] = \
+        (fn_parent[primary] & RECORD_NUMBER_MASK).astype(np.int64)
+    np.frombuffer(cols.parent_seq, dtype=np.uint16)[first + fn_rows[primary]] = fn_parent[primary] >> 48
+    np.frombuffer(cols.valid, dtype=np.uint8)[numbers] = 1
+
+    names = _decode_names(recs, fn_rows * record_size + fn_start, fn_chars)
+    names_column = cols.names
+    for number, name in zip((first + fn_rows[primary]).tolist(), itertools.compress(names, primary.tolist())):
+        names_column[number] = name
+    if not primary.all():
+        seen = {}
+        for row, parent_ref, name, is_primary in zip(fn_rows.tolist(), fn_parent.tolist(), names, primary.tolist()):
+            number = first + row
+            if is_primary:
+                seen = {(parent_ref, name)}
+            elif (parent_ref, name) not in seen:
+                seen.add((parent_ref, name))
+                cols.links.append((number, parent_ref & RECORD_NUMBER_MASK, parent_ref >> 48, name))
+
+    cols.unparsed.extend((first + np.flatnonzero(torn | fallback)).tolist())
+
+
+# ---------------------------
+# $MFT reading and paths
+# ---------------------------
+def _read_mft(fs):
+    """Return (file object, size, record size) for $MFT."""
+    mft = fs.open("/$MFT")
+    size = mft.info.meta.size
+    header = mft.read_random(0, 0x20)
+    if header[:4] != b"FILE":
+        raise ValueError("$MFT record 0 has no FILE signature")
+    record_size = _u32.unpack_from(header, 0x1C)[0]
+    if record_size < SECTOR_SIZE or record_size % SECTOR_SIZE:
+        raise ValueError(f"Unexpected MFT record size {record_size}")
+    return mft, size, record_size
+
+
+def parse_mft(fs, batch_records=BATCH_RECORDS, use_numpy=None):
+    """Read and parse the whole $MFT into per-record columns."""
+    mft, size, record_size = _read_mft(fs)
+    count = size // record_size
+    cols = _MftColumns(count)
+    if use_numpy is None:
+        use_numpy = np is not None
+    parse_batch = _parse_batch_numpy if use_numpy else _parse_batch_python
+
+    for first in range(0, count, batch_records):
+        n = min(batch_records, count - first)
+        batch = mft.read_random(first * record_size, n * record_size)
+        n = len(batch) // record_size
+        if n:
+            parse_batch(batch, first, n, record_size, cols)
+        if n < min(batch_records, count - first):
+            cols.unparsed.extend(range(first + n, min(first + batch_records, count)))
+    return cols
+
+
+def _resolve_with_tsk(fs, cols):
+    """
+    Fill in the records the batch parse left to pytsk3, which follows
+    $ATTRIBUTE_LIST into extension records. Returns the records pytsk3
+    cannot open either.
+    """
+    failed = []
+    for number in cols.unparsed:
+        try:
+            f = fs.open_meta(inode=number)
+            meta = f.info.meta
+            names = []
+            for attr in f:
+                if attr.info.type != pytsk3.TSK_FS_ATTR_TYPE_NTFS_FNAME:
+                    continue
+                content = f.read_random(0, attr.info.size, attr.info.type, attr.info.id)
+                if len(content) >= 0x42 and 0x42 + 2 * content[0x40] <= len(content):
+                    raw = content[0x42:0x42 + 2 * content[0x40]]
+                    names.append((content[0x41], _u64.unpack_from(content, 0)[0],
+                                  raw.decode("utf-16-le", errors="replace")))
+        except Exception:
+            failed.append(number)
+            continue
+        if not names:
+            continue
+        cols.flags[number] = ((FLAG_IN_USE if meta.flags & pytsk3.TSK_FS_META_FLAG_ALLOC else 0)
+                              | (FLAG_DIRECTORY if meta.type == pytsk3.TSK_FS_META_TYPE_DIR else 0))
+        cols.seq[number] = meta.seq
+        cols.size[number] = meta.size
+        cols.times[number * 4:number * 4 + 4] = array("q", (meta.crtime, meta.mtime, meta.ctime, meta.atime))
+        _store_names(cols, number, names)
+    return failed
+
+
+def _build_paths(cols):
+    """Yield (record number, name, full path) per name using the parent index arrays; directory paths are memoized."""
+    dir_paths = {ROOT_RECORD: ""}
+    count = len(cols.names)
+
+    def dir_path(number):
+        chain = []
+        current = number
+        while current not in dir_paths:
+            if (len(chain) > 4096 or current >= count or not cols.valid[current]
+                    or not cols.flags[current] & FLAG_DIRECTORY):
+                # Parent missing, reused or looping: treat like TSK's orphan files
+                dir_paths.setdefault(current, ORPHAN_DIR)
+                break
+            chain.append(current)
+            parent = cols.parent[current]
+            if parent >= count or (cols.parent_seq[current] and cols.seq[parent] != cols.parent_seq[current]):
+                dir_paths[current] = f"{ORPHAN_DIR}/{cols.names[current]}"
+                chain.pop()
+                break
+            current = parent
+        for node in reversed(chain):
+            dir_paths[node] = f"{dir_paths[cols.parent[node]]}/{cols.names[node]}"
+        return dir_paths[number]
+
+    def parent_path(parent, parent_seq):
+        if parent_seq and parent < count and cols.seq[parent] != parent_seq:
+            return ORPHAN_DIR
+        return dir_path(parent)
+
+    for number in range(count):
+        if not cols.valid[number] or number == ROOT_RECORD:
+            continue
+        name = cols.names[number]
+        yield number, name, f"{parent_path(cols.parent[number], cols.parent_seq[number])}/{name}"
+    for number, parent, parent_seq, name in cols.links:
+        yield number, name, f"{parent_path(parent, parent_seq)}/{name}"
+
+
+def iter_mft_records(fs, use_numpy=None):
+    """Yield a record for every name of every file and directory in the $MFT (allocated or not)."""
+    cols = parse_mft(fs, use_numpy=use_numpy)
+    failed = _resolve_with_tsk(fs, cols)
+
+    flags, size, times = cols.flags, cols.size, cols.times
+    for number, name, path in _build_paths(cols):
+        is_dir = bool(flags[number] & FLAG_DIRECTORY)
+        crtime, mtime, ctime, atime = times[number * 4:number * 4 + 4]
+        yield {
+            "path": path,
+            "name": name,
+            "inode": number,
+            "size": size[number],
+            "mtime": mtime,
+            "atime": atime,
+            "ctime": ctime,
+            "crtime": crtime,
+            "allocated": bool(flags[number] & FLAG_IN_USE),
+            "is_dir": is_dir,
+            "extension": os.path.splitext(name)[1][1:].lower() if not is_dir else ""
+        }
+
+    # TSK's virtual orphan directory, reported as the directory walk reports it (its type is VIRT_DIR, not DIR)
+    yield {
+        "path": ORPHAN_DIR,
+        "name": ORPHAN_DIR[1:],
+        "inode": fs.info.last_inum,
+        "size": 0,
+        "mtime": 0,
+        "atime": 0,
+        "ctime": 0,
+        "crtime": 0,
+        "allocated": True,
+        "is_dir": False,
+        "extension": ""
+    }
+
+    if failed:
+        # Records pytsk3 cannot open either (e.g. torn writes) are only known by name from their parent's
+        # index, so walk the directories for them
+        failed = set(failed)
+        for record in walk_filesystem(fs):
+            if record["inode"] in failed:
+                yield record
+
+
+def iter_fs_records(fs):
+    """Records for a filesystem: the $MFT fast path on NTFS, the pytsk3 walker otherwise."""
+    if is_ntfs(fs):
+        try:
+            cols_iter = iter_mft_records(fs)
+            first = next(cols_iter, None)
+        except Exception as e:
+            print(f"⚠️ $MFT fast path failed, falling back to directory walk: {e}")
+        else:
+            if first is not None:
+                yield first
+                yield from cols_iter
+            return
+    yield from walk_filesystem(fs)
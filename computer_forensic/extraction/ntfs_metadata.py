@@ -1,28 +1,15 @@
+import argparse
 import pyewf
 import pytsk3
 import json
 
+from extraction.image_adapter import EWFImgInfo
+from extraction.mft_parser import iter_fs_records
+from extraction.parallel_extract import iter_records_parallel
+
 EWF_PATH = "forensic_ir_app/data/samples/nps-2008-jean.E01"
 OUTPUT_JSON = "ntfs_metadata.json"
 
-# ---------------------------
-# Custom Img_Info wrapper
-# ---------------------------
-class EwfImgInfo(pytsk3.Img_Info):
-    def __init__(self, ewf_handle):
-        self._ewf_handle = ewf_handle
-        super(EwfImgInfo, self).__init__()
-
-    def close(self):
-        self._ewf_handle.close()
-
-    def read(self, offset, size):
-        self._ewf_handle.seek(offset)
-        return self._ewf_handle.read(size)
-
-    def get_size(self):
-        return self._ewf_handle.get_media_size()
-
 # ---------------------------
 # Helpers
 # ---------------------------
@@ -44,31 +31,49 @@ def list_partitions(img):
         print(f"⚠️ No partition table found: {e}")
         return None
 
+def write_records_json(records, output_path):
+    """
+    Stream file records into a JSON array. Memory stays flat no matter how
+    many files the volume holds. Returns the number of records written.
+    """
+    count = 0
+    with open(output_path, "w") as f:
+        f.write("[\n")
+        for record in records:
+            if count:
+                f.write(",\n")
+            entry = {
+                "name": record["path"],
+                "size": record["size"],
+                "created": str(record["crtime"]),
+                "modified": str(record["mtime"]),
+                "type": "directory" if record["is_dir"] else "file",
+                "allocated": record["allocated"]
+            }
+            if "partition_offset" in record:
+                entry["partition_offset"] = record["partition_offset"]
+            json.dump(entry, f)
+            count += 1
+        f.write("\n]\n")
+    return count
+
 def extract_ntfs_metadata(fs, output_path):
     print("🔍 Extracting NTFS metadata...")
-    metadata = []
-
     try:
-        root_dir = fs.open_dir("/")
-        for entry in root_dir:
-            if entry.info.name and entry.info.name.name.decode("utf-8") not in [".", ".."]:
-                name = entry.info.name.name.decode("utf-8")
-                meta = entry.info.meta
-                if meta:
-                    metadata.append({
-                        "name": name,
-                        "size": meta.size,
-                        "created": str(meta.crtime),
-                        "modified": str(meta.mtime),
-                        "type": str(meta.type)
-                    })
+        count = write_records_json(iter_fs_records(fs), output_path)
     except Exception as e:
         print(f"⚠️ Metadata extraction failed: {e}")
         return
 
-    with open(output_path, "w") as f:
-        json.dump(metadata, f, indent=4)
-    print(f"✅ Extracted metadata for {len(metadata)} files to {output_path}")
+    print(f"✅ Extracted metadata for {count} files to {output_path}")
+
+def extract_metadata_parallel(ewf_path, output_path, workers):
+    """Walk all partitions (split into top-level subtrees) in `workers` processes."""
+    print(f"🔍 Extracting metadata from all partitions with {workers} workers...")
+    records = iter_records_parallel(ewf_path, workers=workers, split_subtrees=True)
+    count = write_records_json(records, output_path)
+    print(f"✅ Extracted metadata for {count} files to {output_path}")
+    return count > 0
 
 def extract_image_metadata(img_info, output_path):
     print("🔍 Extracting image-level metadata...")
@@ -84,14 +89,21 @@ def extract_image_metadata(img_info, output_path):
 # Main logic
 # ---------------------------
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract NTFS metadata from an EnCase image")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Walk every partition in parallel using this many processes")
+    args = parser.parse_args()
+
     print("🧩 Opening EnCase image...")
     ewf_handle = open_image(EWF_PATH)
-    img = EwfImgInfo(ewf_handle)
+    img = EWFImgInfo(ewf_handle)
 
     volume = list_partitions(img)
     found_fs = False
 
-    if volume:
+    if args.workers > 1:
+        found_fs = extract_metadata_parallel(EWF_PATH, OUTPUT_JSON, args.workers)
+    elif volume:
         for part in volume:
             desc = part.desc.decode("utf-8")
             if "NTFS" in desc or "Basic data partition" in desc:
@@ -106,3 +118,4 @@ if __name__ == "__main__":
                     print(f"⚠️ Unable to open filesystem: {e}")
     if not found_fs:
         extract_image_metadata(img, OUTPUT_JSON)
+    print(f"📊 Read cache: {img.cache_stats()}")
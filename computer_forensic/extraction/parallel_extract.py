@@ -0,0 +1,151 @@
+import multiprocessing as mp
+import os
+import queue
+
+import pytsk3
+
+from extraction.fs_walker import iter_filesystems, open_image, tag_known_files, walk_filesystem
+from extraction.mft_parser import is_ntfs, iter_fs_records
+from utils.known_hashes import KnownHashSet
+
+DEFAULT_BATCH_SIZE = 1000  # records per message sent back to the parent
+RESULT_POLL_SECONDS = 1.0  # how often the parent checks for workers that died without reporting
+
+
+def plan_work_items(image_path, split_subtrees=False):
+    """
+    Split an image into independent walk tasks.
+
+    Each item is (partition_offset, root_inode, root_path, recursive). Without
+    split_subtrees there is one item per filesystem. With it, the root
+    directory is listed here and each top-level directory becomes its own
+    item, so one large partition can keep several workers busy. A subtree
+    item yields the directory's contents; the directory itself comes from
+    the root listing item. NTFS volumes are never split: the whole-volume
+    item reads $MFT sequentially, which beats several subtree walks.
+    """
+    img = open_image(image_path)
+    items = []
+    for offset, fs in iter_filesystems(img):
+        if not split_subtrees or is_ntfs(fs):
+            items.append((offset, None, "", True))
+            continue
+
+        root = fs.info.root_inum
+        items.append((offset, root, "", False))  # files directly in the root
+        for record in walk_filesystem(fs, root, "", recursive=False):
+            if record["is_dir"] and record["inode"] != root:
+                items.append((offset, record["inode"], record["path"], True))
+    return items
+
+
+def _worker(image_path, tasks, results, batch_size, known_hashes=None):
+    """
+    Worker process: opens its own image handles and walks the items it is given.
+
+    Always posts ("done", None) on the way out, including when the image or
+    the known-hash set cannot be opened, so the parent never waits on it.
+    """
+    try:
+        try:
+            img = open_image(image_path)
+            known = KnownHashSet(known_hashes) if known_hashes else None
+        except Exception as e:
+            results.put(("error", f"worker could not open {image_path}: {e}"))
+            return
+
+        filesystems = {}
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+
+            offset, inode, path, recursive = item
+            batch = []
+            try:
+                if offset not in filesystems:
+                    filesystems[offset] = pytsk3.FS_Info(img, offset=offset)
+                fs = filesystems[offset]
+                if inode is None:
+                    records = iter_fs_records(fs)
+                else:
+                    records = walk_filesystem(fs, inode, path, recursive)
+                if known is not None:
+                    records = tag_known_files(fs, records, known)
+                for record in records:
+                    record["partition_offset"] = offset
+                    batch.append(record)
+                    if len(batch) >= batch_size:
+                        results.put(("records", batch))
+                        batch = []
+            except Exception as e:
+                results.put(("error", f"{path or '/'} at offset {offset}: {e}"))
+            if batch:
+                results.put(("records", batch))
+    finally:
+        results.put(("done", None))
+
+
+def iter_records_parallel(image_path, workers=None, split_subtrees=False, batch_size=DEFAULT_BATCH_SIZE,
+                          known_hashes=None):
+    """
+    Walk every filesystem in an image using a pool of worker processes.
+
+    Each worker opens its own pyewf/pytsk3 handles. Records from all workers
+    are merged into one stream (in no particular order); each record carries
+    a "partition_offset" key. The result queue is bounded, so workers pause
+    when the consumer falls behind. With `known_hashes` (path to a .khs
+    file) every worker maps the set and tags files as known/unknown.
+
+    A worker killed outright (e.g. a crash inside libewf/libtsk) cannot post
+    its "done"; once every process has exited and the queue is drained the
+    stream ends, and each abnormal exit is reported.
+    """
+    items = plan_work_items(image_path, split_subtrees)
+    if not items:
+        return
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(items)))
+    # Spawned (not forked) workers: libewf/libtsk handles must not be shared
+    ctx = mp.get_context("spawn")
+    tasks = ctx.Queue()
+    results = ctx.Queue(maxsize=workers * 4)
+    for item in items:
+        tasks.put(item)
+    for _ in range(workers):
+        tasks.put(None)
+
+    procs = [ctx.Process(target=_worker, args=(image_path, tasks, results, batch_size, known_hashes),
+                         daemon=True)
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+
+    finished = 0
+    all_exited = False
+    try:
+        while finished < workers:
+            try:
+                kind, payload = results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                if any(p.is_alive() for p in procs):
+                    continue
+                if not all_exited:
+                    # Whatever the last workers flushed before exiting is read on one more pass
+                    all_exited = True
+                    continue
+                for p in procs:
+                    if p.exitcode:
+                        print(f"⚠️ Walk worker exited with code {p.exitcode}")
+                break
+            if kind == "records":
+                yield from payload
+            elif kind == "error":
+                print(f"⚠️ Walk failed for {payload}")
+            else:
+                finished += 1
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+            p.join()
@@ -0,0 +1,143 @@
+import os
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+from extraction.signatures import SIGNATURES
+from extraction.split_raw import image_size, open_raw
+from utils.helper import read_full
+
+DEFAULT_BLOCK_SIZE = 16 * 1024 * 1024      # 16MB per read
+DEFAULT_SPLIT_SIZE = 256 * 1024 * 1024     # bytes per parallel work item
+
+
+class SignatureScanner:
+    """
+    Finds every occurrence of every signature in a raw image in one read pass.
+
+    The image is streamed through one preallocated buffer with readinto().
+    Each block is searched in memory with bytearray.find(), which runs at
+    memchr speed, once per distinct signature. The last (longest signature - 1)
+    bytes of a block are carried over to the front of the next one, so matches
+    that cross a block boundary are found exactly once.
+    """
+
+    def __init__(self, signatures=None, block_size=DEFAULT_BLOCK_SIZE):
+        self.signatures = dict(SIGNATURES if signatures is None else signatures)
+        if not self.signatures:
+            raise ValueError("No signatures to scan for")
+        self.block_size = block_size
+        self.overlap = max(len(s) for s in self.signatures) - 1
+
+    def scan_buffer(self, buf, length, carried=0, base=0, limit=None):
+        """
+        Return sorted [(offset, type)] for matches in buf[:length].
+
+        `carried` bytes at the front were already searched as the tail of the
+        previous block; matches lying entirely inside them are skipped. `base`
+        is the image offset of buf[0]. Matches starting at or after `limit`
+        (an image offset) are ignored.
+        """
+        hits = []
+        for sig, desc in self.signatures.items():
+            pos = buf.find(sig, 0, length)
+            while pos != -1:
+                if pos + len(sig) > carried:
+                    if limit is not None and base + pos >= limit:
+                        break
+                    hits.append((base + pos, desc))
+                pos = buf.find(sig, pos + 1, length)
+        hits.sort()
+        return hits
+
+    def scan_file(self, f, ranges):
+        """
+        Yield (offset, type) for an open binary file over [(start, end)] byte ranges,
+        in offset order within each range.
+
+        Hits starting in a block's carried-over tail are held back and merged
+        with the next block's hits, since a longer signature starting earlier
+        in that tail is only completed, and found, in the next block.
+        """
+        buf = bytearray(self.overlap + self.block_size)
+        view = memoryview(buf)
+        size = f.seek(0, os.SEEK_END)
+
+        for start, end in ranges:
+            end = min(end, size)
+            if start >= end:
+                continue
+            f.seek(start)
+            # Read up to `overlap` bytes past the range so a match starting
+            # just before `end` can still be completed
+            read_end = min(end + self.overlap, size)
+            pos = start
+            carried = 0
+            pending = []
+            while pos < read_end:
+                want = min(self.block_size, read_end - pos)
+                n = read_full(f, view[carried:carried + want])
+                if not n:
+                    break
+                length = carried + n
+                hits = self.scan_buffer(buf, length, carried, base=pos - carried, limit=end)
+                if pending:
+                    hits = sorted(pending + hits)
+                pos += n
+
+                # Carry the tail over for matches crossing into the next block
+                keep = min(self.overlap, length)
+                buf[:keep] = buf[length - keep:length]
+                carried = keep
+                # Later blocks only find matches starting at or after the carried tail
+                cut = pos - keep
+                split = bisect_left(hits, (cut,))
+                yield from hits[:split]
+                pending = hits[split:]
+            yield from pending
+
+    def scan(self, image_path, ranges=None):
+        """
+        Yield (offset, type) for every signature hit in a raw image, in offset order.
+
+        `ranges` restricts the scan to [(start, end)] byte ranges, e.g. the
+        unallocated regions of a volume; by default the whole image is scanned.
+        Split raw sets (.001, .002, ...) are scanned as one image.
+        """
+        with open_raw(image_path) as f:
+            if ranges is None:
+                ranges = [(0, f.seek(0, os.SEEK_END))]
+            yield from self.scan_file(f, sorted(ranges))
+
+
+def split_ranges(ranges, split_size=DEFAULT_SPLIT_SIZE):
+    """Cut [(start, end)] ranges into pieces of at most `split_size` bytes."""
+    pieces = []
+    for start, end in ranges:
+        for piece_start in range(start, end, split_size):
+            pieces.append((piece_start, min(piece_start + split_size, end)))
+    return pieces
+
+
+def _scan_piece(args):
+    image_path, piece, signatures, block_size = args
+    return list(SignatureScanner(signatures, block_size).scan(image_path, [piece]))
+
+
+def scan_image(image_path, ranges=None, signatures=None, block_size=DEFAULT_BLOCK_SIZE, workers=1):
+    """
+    Yield (offset, type) hits for `image_path`, in offset order.
+
+    With workers > 1 the ranges are split into DEFAULT_SPLIT_SIZE pieces that
+    are scanned by a process pool. A piece reports only matches that start
+    inside it, so hits are never duplicated at piece boundaries.
+    """
+    if workers <= 1:
+        yield from SignatureScanner(signatures, block_size).scan(image_path, ranges)
+        return
+
+    if ranges is None:
+        ranges = [(0, image_size(image_path))]
+    pieces = split_ranges(sorted(ranges))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for hits in pool.map(_scan_piece, [(image_path, p, signatures, block_size) for p in pieces]):
+            yield from hits
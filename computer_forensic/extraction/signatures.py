@@ -0,0 +1,18 @@
+# Known file signatures (magic numbers), shared by view_raw_data.py and the
+# raw-image scanners. Add entries with register_signature().
+SIGNATURES = {
+    b"\xFF\xD8\xFF": "JPEG image",
+    b"\x89PNG": "PNG image",
+    b"%PDF": "PDF document",
+    b"PK\x03\x04": "ZIP / DOCX / JAR",
+    b"GIF89a": "GIF image",
+    b"BM": "Bitmap image",
+    b"\x7FELF": "Linux Executable",
+}
+
+
+def register_signature(signature, description):
+    """Add (or replace) a signature in the shared table."""
+    if not signature:
+        raise ValueError("Signature must not be empty")
+    SIGNATURES[bytes(signature)] = description
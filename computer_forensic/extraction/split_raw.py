@@ -0,0 +1,194 @@
+"""
+Virtual concatenated view of split raw images (image.001, image.002, ...).
+
+Opening a set only stats the segments, so sets of hundreds of segments open
+instantly and are never concatenated on disk. Reads are positional
+(os.preadv straight into the caller's buffer) and may cross segment
+boundaries. With workers > 1, large reads are cut into pieces that are read
+concurrently, so segments on different disks (or a striped volume) are
+read in parallel while hashing or scanning.
+"""
+import io
+import os
+import re
+import threading
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.helper import pread_full
+
+SEGMENT_PATTERN = re.compile(r"^(?P<base>.*)\.(?P<number>\d{3,})$")
+PARALLEL_MIN_PIECE = 1024 * 1024   # reads are split into pieces of at least this size
+
+
+def is_split_raw(path):
+    """True for a numbered raw segment (image.001, image.000, ...)."""
+    return SEGMENT_PATTERN.match(path) is not None
+
+
+def segment_paths(path):
+    """All segments of the set `path` belongs to, in order, starting from .000 or .001."""
+    match = SEGMENT_PATTERN.match(path)
+    if not match:
+        return [path]
+    base, width = match.group("base"), len(match.group("number"))
+    number = 0 if os.path.exists(f"{base}.{0:0{width}d}") else 1
+    paths = []
+    while os.path.exists(f"{base}.{number:0{width}d}"):
+        paths.append(f"{base}.{number:0{width}d}")
+        number += 1
+    if not paths:
+        raise FileNotFoundError(f"No segments found for {path}")
+    return paths
+
+
+class SplitRawImage:
+    """Read-only concatenation of raw segment files."""
+
+    def __init__(self, path, workers=1):
+        self.paths = segment_paths(path) if isinstance(path, str) else list(path)
+        self.sizes = [os.path.getsize(p) for p in self.paths]
+        self.starts = []
+        total = 0
+        for size in self.sizes:
+            self.starts.append(total)
+            total += size
+        self.size = total
+        self.workers = max(1, workers)
+        self._fds = [None] * len(self.paths)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+
+    def __len__(self):
+        return self.size
+
+    def _fd(self, index):
+        fd = self._fds[index]
+        if fd is None:
+            with self._lock:
+                fd = self._fds[index]
+                if fd is None:
+                    fd = self._fds[index] = os.open(self.paths[index], os.O_RDONLY)
+        return fd
+
+    def _pieces(self, offset, view):
+        """Split a read into (segment index, segment offset, view slice) pieces."""
+        pieces = []
+        index = bisect_right(self.starts, offset) - 1
+        pos = 0
+        while pos < len(view) and index < len(self.paths):
+            seg_offset = offset + pos - self.starts[index]
+            n = min(len(view) - pos, self.sizes[index] - seg_offset)
+            if n > 0:
+                pieces.append((index, seg_offset, view[pos:pos + n]))
+                pos += n
+            index += 1
+        return pieces
+
+    def _read_piece(self, piece):
+        index, seg_offset, view = piece
+        return pread_full(self._fd(index), view, seg_offset)
+
+    def readinto(self, offset, buf):
+        """Read up to len(buf) bytes at `offset` directly into `buf`; returns the byte count."""
+        if offset >= self.size:
+            return 0
+        view = memoryview(buf).cast("B")
+        view = view[:min(len(view), self.size - offset)]
+        pieces = self._pieces(offset, view)
+
+        if self._pool is not None and len(view) >= 2 * PARALLEL_MIN_PIECE:
+            # Cut into roughly one piece per worker so every worker has a read in flight
+            step = max(PARALLEL_MIN_PIECE, -(-len(view) // self.workers))
+            split = []
+            for index, seg_offset, piece in pieces:
+                for start in range(0, len(piece), step):
+                    split.append((index, seg_offset + start, piece[start:start + step]))
+            return sum(self._pool.map(self._read_piece, split))
+        return sum(self._read_piece(piece) for piece in pieces)
+
+    def read(self, offset, size):
+        """Return up to `size` bytes at `offset` as bytes."""
+        size = max(0, min(size, self.size - offset))
+        if not size:
+            return b""
+        # Reads within one segment come straight from pread without an extra buffer
+        index = bisect_right(self.starts, offset) - 1
+        seg_offset = offset - self.starts[index]
+        if seg_offset + size <= self.sizes[index] and self._pool is None:
+            return os.pread(self._fd(index), size, seg_offset)
+        buf = bytearray(size)
+        n = self.readinto(offset, buf)
+        return bytes(buf) if n == size else bytes(buf[:n])
+
+    def open_stream(self):
+        """A seekable binary file object over the whole set (for hashing and scanning)."""
+        return SplitRawStream(self)
+
+    def close(self):
+        with self._lock:
+            for i, fd in enumerate(self._fds):
+                if fd is not None:
+                    os.close(fd)
+                    self._fds[i] = None
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SplitRawStream(io.RawIOBase):
+    """Unbuffered file object reading a SplitRawImage sequentially."""
+
+    def __init__(self, image):
+        super().__init__()
+        self.image = image
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buf):
+        n = self.image.readinto(self._pos, buf)
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.image.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self.image.close()
+        super().close()
+
+
+def open_raw(path, workers=1):
+    """Open a raw image (single file or split set) as an unbuffered, seekable binary stream."""
+    if is_split_raw(path):
+        return SplitRawImage(path, workers).open_stream()
+    return open(path, "rb", buffering=0)
+
+
+def image_size(path):
+    """Size in bytes of a raw image; for split sets, the sum of all segments."""
+    if is_split_raw(path):
+        return sum(os.path.getsize(p) for p in segment_paths(path))
+    return os.path.getsize(path)
@@ -1,3 +1,6 @@
+from datetime import datetime, timezone
+
+
 def build_features(parsed_data):
     """
     Convert raw parsed data into structured features for storage and visualization
@@ -5,6 +8,23 @@ def build_features(parsed_data):
     if "error" in parsed_data:
         return parsed_data
     
+    # Aggregates come from the columnar file table when the image was walked
+    table = parsed_data.get("file_table")
+    if table is not None:
+        parsed_data = dict(parsed_data)
+        parsed_data.update({
+            "recent_files": table.recent(10),
+            "total_files": table.total_files,
+            "file_types": table.type_counts(),
+            "size_distribution": table.size_histogram(),
+            "known_files": table.known_counts(),
+            # Day buckets keyed by date string (BSON documents need string keys)
+            "activity_timeline": {
+                datetime.fromtimestamp(day, timezone.utc).strftime("%Y-%m-%d"): n
+                for day, n in table.time_buckets("mtime").items()
+            }
+        })
+
     # Extract and structure features
     features = {
         "filename": parsed_data.get("filename", "unknown"),
@@ -15,6 +35,10 @@ def build_features(parsed_data):
         "keys": parsed_data.get("keys", []),
         "total_files": parsed_data.get("total_files", 0),
         "file_types": parsed_data.get("file_types", {}),
+        "size_distribution": parsed_data.get("size_distribution", {}),
+        "activity_timeline": parsed_data.get("activity_timeline", {}),
+        "entropy": parsed_data.get("entropy") or {},
+        "known_files": parsed_data.get("known_files", {}),
         "size_bytes": parsed_data.get("size_bytes", 0)
     }
     
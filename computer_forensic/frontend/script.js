@@ -2,6 +2,11 @@
 const BACKEND_URL = "http://127.0.0.1:5000";
 
 let progressInterval = null;
+let currentJobId = null;  // case shown in the plots (null: the server's most recent one)
+
+// Large images go up in resumable chunks, several at a time
+const CHUNKED_UPLOAD_THRESHOLD = 64 * 1024 * 1024;
+const PARALLEL_CHUNKS = 4;
 
 function submitImage() {
   const fileInput = document.getElementById('diskImage');
@@ -27,26 +32,36 @@ function submitImage() {
   showProgressBar();
   updateProgress(0, "Uploading file...");
 
-  const formData = new FormData();
-  formData.append("image", file);
-  formData.append("databases", JSON.stringify(selectedDBs));
+  const entropyMap = document.getElementById('entropyMap').checked;
+  let upload;
 
-  fetch(`${BACKEND_URL}/upload-image`, {
-    method: "POST",
-    body: formData
-  })
-  .then(res => {
-    if (!res.ok) {
-      return res.json().then(err => {
-        throw new Error(err.error || "Upload failed");
-      });
-    }
-    return res.json();
-  })
+  if (file.size >= CHUNKED_UPLOAD_THRESHOLD) {
+    upload = uploadInChunks(file, { databases: selectedDBs, entropy_map: entropyMap });
+  } else {
+    const formData = new FormData();
+    formData.append("image", file);
+    formData.append("databases", JSON.stringify(selectedDBs));
+    formData.append("entropy_map", entropyMap);
+
+    upload = fetch(`${BACKEND_URL}/upload-image`, {
+      method: "POST",
+      body: formData
+    })
+    .then(res => {
+      if (!res.ok) {
+        return res.json().then(err => {
+          throw new Error(err.error || "Upload failed");
+        });
+      }
+      return res.json();
+    });
+  }
+
+  upload
   .then(data => {
     if (data.success && data.job_id) {
-      // Start polling for job status
-      pollJobStatus(data.job_id);
+      // Follow job progress (pushed by the server, or polled as a fallback)
+      watchJob(data.job_id);
     } else {
       hideProgressBar();
       alert("Upload failed: " + (data.error || "Unknown error"));
@@ -59,26 +74,123 @@ function submitImage() {
   });
 }
 
+async function checkedJson(res, fallbackError) {
+  const data = await res.json();
+  if (!res.ok) {
+    throw new Error(data.error || fallbackError);
+  }
+  return data;
+}
+
+// Send a file through the chunked upload API, resuming an earlier attempt at the same file
+async function uploadInChunks(file, options) {
+  const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+  let upload = null;
+
+  const savedId = localStorage.getItem(resumeKey);
+  if (savedId) {
+    const res = await fetch(`${BACKEND_URL}/uploads/${savedId}`);
+    if (res.ok) {
+      upload = await res.json();
+    }
+  }
+  if (!upload) {
+    upload = await checkedJson(await fetch(`${BACKEND_URL}/uploads`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ filename: file.name, size: file.size })
+    }), "Upload failed");
+    localStorage.setItem(resumeKey, upload.upload_id);
+  }
+
+  // Only the chunks the server doesn't have yet are sent
+  const pending = upload.missing.slice();
+  let received = upload.received;
+  const sendChunks = async () => {
+    while (pending.length) {
+      const index = pending.shift();
+      const start = index * upload.chunk_size;
+      await checkedJson(await fetch(`${BACKEND_URL}/uploads/${upload.upload_id}/chunks/${index}`, {
+        method: "PUT",
+        body: file.slice(start, start + upload.chunk_size)
+      }), `Chunk ${index} failed`);
+      received++;
+      updateProgress(Math.floor(received * 100 / upload.chunk_count),
+                     `Uploading: chunk ${received} / ${upload.chunk_count}`);
+    }
+  };
+  await Promise.all(Array.from({ length: PARALLEL_CHUNKS }, sendChunks));
+
+  const data = await checkedJson(await fetch(`${BACKEND_URL}/uploads/${upload.upload_id}/finalize`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify(options)
+  }), "Upload failed");
+  localStorage.removeItem(resumeKey);
+  return data;
+}
+
+// Apply a job status update to the page; returns true once the job has ended
+function handleJobUpdate(data) {
+  updateProgress(data.progress, data.message);
+
+  if (data.status === "completed") {
+    hideProgressBar();
+    currentJobId = data.job_id;
+
+    if (data.result) {
+      alert(`✓ Extraction complete!\n${data.result.message}`);
+      loadCaseDetails(data.result.caseDetails);
+      loadRecentFiles(data.result.recentFiles);
+    }
+    return true;
+  } else if (data.status === "error") {
+    hideProgressBar();
+    alert("Extraction failed: " + (data.error || "Unknown error"));
+    return true;
+  } else if (data.status === "cancelled") {
+    hideProgressBar();
+    alert("Extraction cancelled");
+    return true;
+  }
+  return false;
+}
+
+// Follow a job over Server-Sent Events, falling back to polling if the stream can't be used
+function watchJob(jobId) {
+  if (!window.EventSource) {
+    pollJobStatus(jobId);
+    return;
+  }
+
+  const source = new EventSource(`${BACKEND_URL}/job-events/${jobId}`);
+  let received = false;
+
+  const onUpdate = event => {
+    received = true;
+    if (handleJobUpdate(JSON.parse(event.data))) {
+      source.close();
+    }
+  };
+  source.addEventListener("progress", onUpdate);
+  source.addEventListener("done", onUpdate);
+
+  source.onerror = () => {
+    // EventSource reconnects by itself once a stream has worked; otherwise poll instead
+    if (!received) {
+      source.close();
+      pollJobStatus(jobId);
+    }
+  };
+}
+
 function pollJobStatus(jobId) {
   progressInterval = setInterval(() => {
     fetch(`${BACKEND_URL}/job-status/${jobId}`)
       .then(res => res.json())
       .then(data => {
-        updateProgress(data.progress, data.message);
-        
-        if (data.status === "completed") {
-          clearInterval(progressInterval);
-          hideProgressBar();
-          
-          if (data.result) {
-            alert(`✓ Extraction complete!\n${data.result.message}`);
-            loadCaseDetails(data.result.caseDetails);
-            loadRecentFiles(data.result.recentFiles);
-          }
-        } else if (data.status === "error") {
+        if (handleJobUpdate(data)) {
           clearInterval(progressInterval);
-          hideProgressBar();
-          alert("Extraction failed: " + (data.error || "Unknown error"));
         }
       })
       .catch(err => {
@@ -150,7 +262,8 @@ function loadPlot(type) {
   const buttons = document.querySelectorAll('.plot-tabs button');
   buttons.forEach(btn => btn.disabled = true);
   
-  fetch(`${BACKEND_URL}/plots?type=${type}`)
+  const jobParam = currentJobId ? `&job_id=${encodeURIComponent(currentJobId)}` : "";
+  fetch(`${BACKEND_URL}/plots?type=${type}${jobParam}`)
     .then(res => {
       if (!res.ok) {
         return res.json().then(err => {
@@ -175,7 +288,7 @@ function loadPlot(type) {
       // Determine chart type
       let chartType = "bar";
       if (type === "pie") chartType = "pie";
-      else if (type === "line") chartType = "line";
+      else if (type === "line" || type === "entropy") chartType = "line";
       else if (type === "histogram") chartType = "bar";
       
       currentChart = new Chart(ctx, {
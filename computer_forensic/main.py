@@ -0,0 +1,117 @@
+"""
+Command line intake for the forensic backend.
+
+    python main.py scan <directory|manifest>             list the evidence sets that would be queued
+    python main.py ingest <directory|manifest> [--wait]  queue them on the running backend
+    python main.py status <batch_id> [--wait]            aggregate status of a batch
+
+Paths are read by the server, so they must be visible to it. Ingest goes
+through the backend (rather than extracting locally) so batch jobs share its
+worker and per-device I/O limits with every other upload.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from backend.batch_ingest import discover_evidence
+
+DEFAULT_SERVER = os.environ.get("FORENSIC_SERVER", "http://127.0.0.1:5000")
+POLL_INTERVAL = 2  # seconds between status checks with --wait
+
+
+def _request(url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return json.load(response)
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.load(e).get("error", e.reason)
+        except ValueError:
+            message = e.reason
+        raise SystemExit(f"❌ {e.code}: {message}")
+
+
+def _print_sets(sets, skipped):
+    for evidence in sets:
+        print(f"🧩 {evidence['path']} ({evidence['format']}, {evidence['segments']} segment(s), "
+              f"{evidence['size'] / 1024 / 1024:.1f} MB)")
+    for entry in skipped:
+        print(f"⚠️  Skipped {entry['path']}: {entry['reason']}")
+
+
+def _wait(server, batch_id):
+    while True:
+        status = _request(f"{server}/batch-status/{batch_id}")
+        counts = ", ".join(f"{n} {state}" for state, n in sorted(status["counts"].items()))
+        print(f"   ... {status['progress']}% ({counts})")
+        if status["status"] != "running":
+            return status
+        time.sleep(POLL_INTERVAL)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch intake of disk images")
+    parser.add_argument("--server", default=DEFAULT_SERVER, help=f"Backend URL (default: {DEFAULT_SERVER})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="List evidence sets in a directory or manifest")
+    scan.add_argument("source")
+
+    ingest = commands.add_parser("ingest", help="Queue every evidence set in a directory or manifest")
+    ingest.add_argument("source")
+    ingest.add_argument("--databases", default="", help="Comma separated: mongodb,postgres,neo4j,vector")
+    ingest.add_argument("--examiner", default="default")
+    ingest.add_argument("--priority", type=int, default=0)
+    ingest.add_argument("--entropy-map", action="store_true")
+    ingest.add_argument("--block-index", action="store_true")
+    ingest.add_argument("--force-verify", action="store_true")
+    ingest.add_argument("--wait", action="store_true", help="Follow the batch until every job has finished")
+
+    status = commands.add_parser("status", help="Show the aggregate status of a batch")
+    status.add_argument("batch_id")
+    status.add_argument("--wait", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "scan":
+        sets, skipped = discover_evidence(args.source)
+        _print_sets(sets, skipped)
+        print(f"✅ {len(sets)} evidence set(s)")
+        return 0
+
+    if args.command == "ingest":
+        source = os.path.abspath(args.source)
+        key = "directory" if os.path.isdir(source) else "manifest"
+        result = _request(f"{args.server}/batch-ingest", {
+            key: source,
+            "databases": [db for db in args.databases.split(",") if db],
+            "examiner": args.examiner,
+            "priority": args.priority,
+            "entropy_map": args.entropy_map,
+            "block_index": args.block_index,
+            "force_verify": args.force_verify
+        })
+        _print_sets(result["jobs"], result["skipped"])
+        print(f"✅ Batch {result['batch_id']}: {result['message']}")
+        batch_id = result["batch_id"]
+        if not args.wait:
+            return 0
+    else:
+        batch_id = args.batch_id
+        if not args.wait:
+            print(json.dumps(_request(f"{args.server}/batch-status/{batch_id}"), indent=2))
+            return 0
+
+    final = _wait(args.server, batch_id)
+    print(f"🏁 Batch {batch_id}: {final['status']}")
+    return 0 if final["status"] == "completed" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
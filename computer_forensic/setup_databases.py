@@ -1,62 +1,64 @@
 # setup_databases.py
-import psycopg2
-from pymongo import MongoClient
 from neo4j import GraphDatabase
 from pymilvus import connections, FieldSchema, CollectionSchema, DataType, Collection, utility
-import yaml
 
+from database.connection_manager import get_manager
 
-with open("forensic_ir_app/config/db_config.yaml", "r") as f:
-    cfg = yaml.safe_load(f)
+# Same configuration (config/db_config.yaml) and connections as the handlers
+manager = get_manager()
+cfg = manager.config
 
-# PostgreSQL Setup
-pg_conn = psycopg2.connect(
-    host=cfg["postgres"]["host"],
-    port=cfg["postgres"]["port"],
-    user=cfg["postgres"]["user"],
-    password=cfg["postgres"]["password"],
-    dbname=cfg["postgres"]["database"]
-)
-pg_cur = pg_conn.cursor()
+# PostgreSQL Setup (a pooled connection, committed when the block exits)
+with manager.postgres_connection() as conn:
+    with conn.cursor() as cur:
+        # Create tables
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS artifacts (
+            id SERIAL PRIMARY KEY,
+            filename VARCHAR(255),
+            filepath VARCHAR(1024),
+            size BIGINT,
+            sha256 VARCHAR(64),
+            created TIMESTAMP,
+            modified TIMESTAMP,
+            accessed TIMESTAMP,
+            owner VARCHAR(255),
+            deleted BOOLEAN,
+            file_type VARCHAR(50),
+            case_id VARCHAR(100)
+        );
+        """)
 
-# Create tables
-pg_cur.execute("""
-CREATE TABLE IF NOT EXISTS artifacts (
-    id SERIAL PRIMARY KEY,
-    filename VARCHAR(255),
-    filepath VARCHAR(1024),
-    size BIGINT,
-    sha256 VARCHAR(64),
-    created TIMESTAMP,
-    modified TIMESTAMP,
-    accessed TIMESTAMP,
-    owner VARCHAR(255),
-    deleted BOOLEAN,
-    file_type VARCHAR(50),
-    case_id VARCHAR(100)
-);
-""")
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS timeline_events (
+            id SERIAL PRIMARY KEY,
+            timestamp TIMESTAMP,
+            event_type VARCHAR(50),
+            description TEXT,
+            artifact_id INT REFERENCES artifacts(id),
+            case_id VARCHAR(100)
+        );
+        """)
 
-pg_cur.execute("""
-CREATE TABLE IF NOT EXISTS timeline_events (
-    id SERIAL PRIMARY KEY,
-    timestamp TIMESTAMP,
-    event_type VARCHAR(50),
-    description TEXT,
-    artifact_id INT REFERENCES artifacts(id),
-    case_id VARCHAR(100)
-);
-""")
+        # One row per extraction job; the unique job_id makes retried writes upserts
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS cases (
+            id SERIAL PRIMARY KEY,
+            job_id VARCHAR(100) UNIQUE,
+            space TEXT,
+            file_system TEXT,
+            hash TEXT,
+            total_files BIGINT,
+            keys TEXT
+        );
+        """)
+        cur.execute("ALTER TABLE cases ADD COLUMN IF NOT EXISTS job_id VARCHAR(100) UNIQUE")
 
-pg_conn.commit()
-pg_cur.close()
-pg_conn.close()
 print("PostgreSQL tables created successfully!")
 
 
 #  MongoDB Setup
-mongo_client = MongoClient(cfg["mongodb"]["uri"])
-mongo_db = mongo_client[cfg["mongodb"]["database"]]
+mongo_db = manager.mongo_db()
 if "artifacts" not in mongo_db.list_collection_names():
     mongo_db.create_collection("artifacts")
 print("MongoDB collection 'artifacts' ready!")
@@ -76,7 +78,7 @@ print("Neo4j constraints created successfully!")
 
 
 # Milvus Setup
-connections.connect(alias="default", host="127.0.0.1", port="19530")
+connections.connect(alias="default", host=cfg["milvus"]["host"], port=cfg["milvus"]["port"])
 
 fields = [
     FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
@@ -29,12 +29,12 @@ parsed_data = parse_disk_image(test_file)
 print(f"✓ Parsed data keys: {list(parsed_data.keys())}")
 print(f"  - File system: {parsed_data.get('file_system')}")
 print(f"  - Total files: {parsed_data.get('total_files')}")
-print(f"  - File types: {parsed_data.get('file_types')}")
 
 # Test feature builder
 print("\n--- Testing Feature Builder ---")
 features = build_features(parsed_data)
 print(f"✓ Features built: {list(features.keys())}")
+print(f"  - File types: {features.get('file_types')}")
 
 # Test plot builders
 print("\n--- Testing Plot Builders ---")
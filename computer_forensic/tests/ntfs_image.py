@@ -0,0 +1,353 @@
+"""
+Minimal NTFS image writer for tests and benchmarks.
+
+Builds just enough of a volume for The Sleuth Kit to open it: boot sector,
+$MFT (+ $MFTMirr), $Volume, $AttrDef, $Bitmap and a root directory, plus
+the files and directories added with add_file(). Directory indexes are
+written as one INDX record chain in $INDEX_ALLOCATION behind an $INDEX_ROOT
+holding only the end entry, which TSK reads the same way as a balanced tree.
+
+Individual records can be made awkward on purpose: split into an extension
+record through an $ATTRIBUTE_LIST, torn (bad fixup), carrying DOS + Win32
+names or hard links, deleted, or with non-resident $DATA.
+"""
+import struct
+
+SECTOR = 512
+CLUSTER = 4096
+RECORD = 1024
+INDX_SIZE = 4096
+ROOT = 5
+FIRST_USER = 24  # like a formatted volume: 16-23 are left for $Extend children
+
+NS_POSIX, NS_WIN32, NS_DOS, NS_WIN32_DOS = 0, 1, 2, 3
+
+BASE_TIME = 132500000000000000  # 2020-11-17 as FILETIME
+ATTRDEF = (
+    ("$STANDARD_INFORMATION", 0x10, 0x40), ("$ATTRIBUTE_LIST", 0x20, 0x80), ("$FILE_NAME", 0x30, 0x42),
+    ("$OBJECT_ID", 0x40, 0x40), ("$SECURITY_DESCRIPTOR", 0x50, 0x80), ("$VOLUME_NAME", 0x60, 0x40),
+    ("$VOLUME_INFORMATION", 0x70, 0x40), ("$DATA", 0x80, 0), ("$INDEX_ROOT", 0x90, 0x42),
+    ("$INDEX_ALLOCATION", 0xA0, 0), ("$BITMAP", 0xB0, 0), ("$REPARSE_POINT", 0xC0, 0),
+)
+METAFILES = ((0, "$MFT"), (1, "$MFTMirr"), (2, "$LogFile"), (3, "$Volume"), (4, "$AttrDef"), (5, "."),
+             (6, "$Bitmap"), (7, "$Boot"), (8, "$BadClus"), (9, "$Secure"), (10, "$UpCase"), (11, "$Extend"))
+
+
+def filetime(unix_seconds):
+    return unix_seconds * 10000000 + 116444736000000000
+
+
+def _align(n, to=8):
+    return (n + to - 1) // to * to
+
+
+def _runlist(lcn, clusters):
+    if not clusters:
+        return b"\x00"
+    length = clusters.to_bytes(8, "little").rstrip(b"\x00") or b"\x00"
+    offset = lcn.to_bytes(8, "little", signed=True)
+    while len(offset) > 1 and offset[-1] == 0 and not offset[-2] & 0x80:
+        offset = offset[:-1]
+    if offset[-1] & 0x80:
+        offset += b"\x00"
+    return bytes([len(offset) << 4 | len(length)]) + length + offset + b"\x00"
+
+
+def _resident(attr_type, attr_id, content, name=""):
+    name_raw = name.encode("utf-16-le")
+    name_offset = 0x18
+    content_offset = _align(name_offset + len(name_raw))
+    length = _align(content_offset + len(content))
+    header = struct.pack("<IIBBHHHIHBB", attr_type, length, 0, len(name), name_offset, 0, attr_id,
+                         len(content), content_offset, 0, 0)
+    body = header + name_raw
+    body += b"\x00" * (content_offset - len(body)) + content
+    return body + b"\x00" * (length - len(body))
+
+
+def _non_resident(attr_type, attr_id, lcn, clusters, size, name="", start_vcn=0):
+    name_raw = name.encode("utf-16-le")
+    name_offset = 0x40
+    runs_offset = _align(name_offset + len(name_raw))
+    runs = _runlist(lcn, clusters)
+    length = _align(runs_offset + len(runs))
+    last_vcn = start_vcn + clusters - 1 if clusters else 0
+    header = struct.pack("<IIBBHHHQQHHIQQQ", attr_type, length, 1, len(name), name_offset, 0, attr_id,
+                         start_vcn, last_vcn, runs_offset, 0, 0, clusters * CLUSTER, size, size)
+    body = header + name_raw
+    body += b"\x00" * (runs_offset - len(body)) + runs
+    return body + b"\x00" * (length - len(body))
+
+
+def _apply_usa(block, usn=1):
+    """Protect a FILE/INDX block: save each sector's last two bytes into the update sequence array."""
+    block = bytearray(block)
+    usa_offset, usa_count = struct.unpack_from("<HH", block, 4)
+    struct.pack_into("<H", block, usa_offset, usn)
+    for i in range(1, usa_count):
+        end = i * SECTOR
+        block[usa_offset + 2 * i:usa_offset + 2 * i + 2] = block[end - 2:end]
+        struct.pack_into("<H", block, end - 2, usn)
+    return bytes(block)
+
+
+class _Name:
+    def __init__(self, name, parent, parent_seq, namespace):
+        self.name = name
+        self.parent = parent
+        self.parent_seq = parent_seq
+        self.namespace = namespace
+
+
+class _Entry:
+    def __init__(self, number, names, is_dir, in_use, seq, size, resident, times, split, torn):
+        self.number = number
+        self.names = names
+        self.is_dir = is_dir
+        self.in_use = in_use
+        self.seq = seq
+        self.size = size
+        self.resident = resident
+        self.times = times
+        self.split = split
+        self.torn = torn
+        self.data_lcn = 0
+        self.data_clusters = 0
+        self.index_lcn = 0
+        self.index_clusters = 0
+
+
+class NtfsImage:
+    """
+    Collects files and writes the volume with build(path).
+
+    Record numbers are assigned from FIRST_USER upwards unless given.
+    """
+
+    def __init__(self, records=None):
+        self.entries = {}
+        self.records = records
+        self._next = FIRST_USER
+        for number, name in METAFILES:
+            self.entries[number] = _Entry(number, [_Name(name, ROOT, ROOT, NS_WIN32_DOS)],
+                                          number in (ROOT, 11), True, number or 1, 0, True,
+                                          (0, 0, 0, 0), None, False)
+
+    def add_file(self, name, parent=ROOT, *, number=None, is_dir=False, in_use=True, seq=1, parent_seq=None,
+                 size=0, resident=True, times=None, dos_name=None, links=(), split=None, torn=False):
+        """
+        Add a file or directory; returns its record number.
+
+        dos_name adds a separate DOS 8.3 $FILE_NAME; links is a list of
+        (parent, name) hard links; split is None, "name" or "data" for
+        which attribute moves to an extension record (behind an
+        $ATTRIBUTE_LIST); torn breaks the record's fixup.
+        """
+        if number is None:
+            number = self._next
+            self._next += 1 + (split is not None)
+        else:
+            self._next = max(self._next, number + 1 + (split is not None))
+        parent_seq = self.entries[parent].seq if parent_seq is None and parent in self.entries else parent_seq or 1
+        namespace = NS_WIN32 if dos_name else NS_WIN32_DOS
+        names = [_Name(name, parent, parent_seq, namespace)]
+        if dos_name:
+            names.append(_Name(dos_name, parent, parent_seq, NS_DOS))
+        for link_parent, link_name in links:
+            names.append(_Name(link_name, link_parent, self.entries[link_parent].seq, NS_WIN32_DOS))
+        if times is None:
+            t = 1600000000 + number * 60
+            times = (t, t + 10, t + 20, t + 30)  # crtime, mtime, ctime, atime (unix seconds)
+        self.entries[number] = _Entry(number, names, is_dir, in_use, seq, size, resident, times, split, torn)
+        return number
+
+    # ---------------------------
+    # Attributes
+    # ---------------------------
+    @staticmethod
+    def _si(entry):
+        crtime, mtime, ctime, atime = (filetime(t) if t else 0 for t in entry.times)
+        return struct.pack("<4QIIIIIIQQ", crtime, mtime, ctime, atime, 0x20, 0, 0, 0, 0, 0, 0, 0)
+
+    @staticmethod
+    def _fn(entry, name):
+        raw = name.name.encode("utf-16-le")
+        crtime, mtime, ctime, atime = (filetime(t) if t else 0 for t in entry.times)
+        flags = 0x10000000 if entry.is_dir else 0x20
+        size = 0 if entry.is_dir else entry.size
+        return struct.pack("<Q4QQQIIBB", name.parent | name.parent_seq << 48, crtime, mtime, ctime, atime,
+                           _align(size, CLUSTER), size, flags, 0, len(name.name), name.namespace) + raw
+
+    def _data_attr(self, entry, attr_id):
+        if entry.resident:
+            return _resident(0x80, attr_id, b"\x00" * entry.size)
+        return _non_resident(0x80, attr_id, entry.data_lcn, entry.data_clusters, entry.size)
+
+    def _index_attrs(self, entry, attr_id):
+        root = struct.pack("<IIIB3x", 0x30, 1, INDX_SIZE, INDX_SIZE // CLUSTER)
+        # Node header + a single end entry that points at INDX record VCN 0
+        end_entry = struct.pack("<QHHIQ", 0, 0x18, 0, 0x03, 0)
+        node = struct.pack("<IIIB3x", 0x10, 0x10 + len(end_entry), 0x10 + len(end_entry), 1)
+        attrs = [_resident(0x90, attr_id, root + node + end_entry, "$I30")]
+        attrs.append(_non_resident(0xA0, attr_id + 1, entry.index_lcn, entry.index_clusters,
+                                   entry.index_clusters * CLUSTER, "$I30"))
+        bitmap = ((1 << entry.index_clusters) - 1).to_bytes(_align(-(-entry.index_clusters // 8)), "little")
+        attrs.append(_resident(0xB0, attr_id + 2, bitmap, "$I30"))
+        return attrs
+
+    def _attributes(self, entry):
+        """[(attr_type, attr_id, in_extension, bytes)] in attribute order."""
+        attrs = [(0x10, 0, False, _resident(0x10, 0, self._si(entry)))]
+        attr_id = 1
+        for name in entry.names:
+            attrs.append((0x30, attr_id, entry.split == "name", _resident(0x30, attr_id, self._fn(entry, name))))
+            attr_id += 1
+        if entry.number == 3:
+            attrs.append((0x70, attr_id, False, _resident(0x70, attr_id, struct.pack("<QBBH6x", 0, 3, 1, 0))))
+        elif entry.number in (0, 1, 4, 6):
+            attrs.append((0x80, attr_id, False, _non_resident(0x80, attr_id, entry.data_lcn, entry.data_clusters,
+                                                              entry.size)))
+        elif entry.is_dir:
+            for i, attr in enumerate(self._index_attrs(entry, attr_id)):
+                attrs.append((struct.unpack_from("<I", attr)[0], attr_id + i, False, attr))
+        else:
+            attrs.append((0x80, attr_id, entry.split == "data", self._data_attr(entry, attr_id)))
+        return attrs
+
+    @staticmethod
+    def _attribute_list(entry, attrs, ext_ref):
+        content = b""
+        base_ref = entry.number | entry.seq << 48
+        for attr_type, attr_id, in_ext, raw in attrs:
+            name_length = raw[9]
+            name = raw[struct.unpack_from("<H", raw, 10)[0]:][:2 * name_length]
+            length = _align(0x1A + len(name))
+            item = struct.pack("<IHBBQQH", attr_type, length, name_length, 0x1A if name_length else 0, 0,
+                               ext_ref if in_ext else base_ref, attr_id) + name
+            content += item + b"\x00" * (length - len(item))
+        return content
+
+    # ---------------------------
+    # Records
+    # ---------------------------
+    @staticmethod
+    def _record(number, seq, flags, attrs, base_ref=0, torn=False):
+        body = b"".join(attrs) + struct.pack("<II", 0xFFFFFFFF, 0)
+        used = 0x38 + len(body)
+        if used > RECORD:
+            raise ValueError(f"Record {number} does not fit in {RECORD} bytes")
+        header = struct.pack("<4sHHQHHHHIIQHHI", b"FILE", 0x30, RECORD // SECTOR + 1, 0, seq, 1, 0x38, flags,
+                             used, RECORD, base_ref, 16, 0, number)
+        record = header + b"\x00" * (0x38 - len(header)) + body
+        record = _apply_usa(record + b"\x00" * (RECORD - len(record)))
+        if torn:
+            record = record[:SECTOR - 2] + b"\xde\xad" + record[SECTOR:]
+        return record
+
+    def _records(self, entry):
+        """The FILE record(s) of an entry: {number: bytes}."""
+        flags = (0x01 if entry.in_use else 0) | (0x02 if entry.is_dir else 0)
+        attrs = self._attributes(entry)
+        if entry.split is None:
+            return {entry.number: self._record(entry.number, entry.seq, flags, [a[3] for a in attrs],
+                                               torn=entry.torn)}
+        ext = entry.number + 1
+        ext_ref = ext | entry.seq << 48
+        attr_list = _resident(0x20, len(attrs) + 1, self._attribute_list(entry, attrs, ext_ref))
+        base = [attrs[0][3], attr_list] + [a[3] for a in attrs[1:] if not a[2]]
+        return {
+            entry.number: self._record(entry.number, entry.seq, flags, base, torn=entry.torn),
+            ext: self._record(ext, entry.seq, entry.in_use, [a[3] for a in attrs if a[2]],
+                              base_ref=entry.number | entry.seq << 48)
+        }
+
+    def _index_records(self, directory, children):
+        """INDX records holding `children` ([(entry, _Name)]) for one directory."""
+        entries = []
+        for entry, name in sorted(children, key=lambda c: c[1].name.upper()):
+            key = self._fn(entry, name)
+            length = _align(0x10 + len(key))
+            raw = struct.pack("<QHHI", entry.number | entry.seq << 48, length, len(key), 0) + key
+            entries.append(raw + b"\x00" * (length - len(raw)))
+        end_entry = struct.pack("<QHHI", 0, 0x10, 0, 0x02)
+        records = []
+        usa_count = INDX_SIZE // SECTOR + 1
+        first_entry = _align(0x28 + 2 * usa_count) - 0x18
+        capacity = INDX_SIZE - 0x18 - first_entry - len(end_entry)
+        chunk = []
+        for raw in entries + [None]:
+            if raw is None or sum(map(len, chunk)) + len(raw) > capacity:
+                body = b"".join(chunk) + end_entry
+                node = struct.pack("<IIIB3x", first_entry, first_entry + len(body), INDX_SIZE - 0x18, 0)
+                header = struct.pack("<4sHHQQ", b"INDX", 0x28, usa_count, 0, len(records)) + node
+                record = header + b"\x00" * (0x18 + first_entry - len(header)) + body
+                records.append(_apply_usa(record + b"\x00" * (INDX_SIZE - len(record))))
+                chunk = []
+            if raw is not None:
+                chunk.append(raw)
+        return records
+
+    def build(self, path):
+        """Write the image; returns its size."""
+        count = self.records or max(self._next, 64)
+        count = _align(count, CLUSTER // RECORD)
+        children = {}
+        for entry in self.entries.values():
+            if entry.number == ROOT:
+                continue
+            for name in entry.names:
+                parent = self.entries.get(name.parent)
+                if entry.in_use and parent is not None and parent.in_use and parent.seq == name.parent_seq:
+                    children.setdefault(name.parent, []).append((entry, name))
+
+        # Cluster layout: boot, $AttrDef, $MFTMirr, $MFT, $Bitmap, directory indexes, file data
+        attrdef = b"".join(n.encode("utf-16-le").ljust(128, b"\x00") + struct.pack("<IIIIQQ", t, 0, 0, 0, 0,
+                                                                                     m or 0xFFFFFFFFFFFFFFFF)
+                           for n, t, m in ATTRDEF).ljust(CLUSTER, b"\x00")
+        mft_lcn = 3
+        mft_clusters = count * RECORD // CLUSTER
+        next_lcn = mft_lcn + mft_clusters + 1
+        index_records = {}
+        for entry in self.entries.values():
+            if entry.is_dir:
+                index_records[entry.number] = self._index_records(entry, children.get(entry.number, []))
+                entry.index_lcn = next_lcn
+                entry.index_clusters = len(index_records[entry.number])
+                next_lcn += entry.index_clusters
+        for entry in self.entries.values():
+            if not entry.is_dir and not entry.resident and entry.size:
+                entry.data_clusters = -(-entry.size // CLUSTER)
+                entry.data_lcn = next_lcn
+                next_lcn += entry.data_clusters
+        total_clusters = next_lcn + 1
+        bitmap_lcn = mft_lcn + mft_clusters
+        metafile_data = ((0, mft_lcn, mft_clusters, count * RECORD), (1, 2, 1, 4 * RECORD),
+                         (4, 1, 1, len(ATTRDEF) * 160), (6, bitmap_lcn, 1, _align(total_clusters // 8 + 1)))
+        for number, lcn, clusters, size in metafile_data:
+            entry = self.entries[number]
+            entry.data_lcn, entry.data_clusters, entry.size = lcn, clusters, size
+
+        image = bytearray(total_clusters * CLUSTER)
+        boot = struct.pack("<3s8sHBH5xB18xQQQbxxxbxxxQ", b"\xebR\x90", b"NTFS    ", SECTOR, CLUSTER // SECTOR, 0,
+                           0xF8, total_clusters * CLUSTER // SECTOR - 1, mft_lcn, 2, -10, 1, 0x1234567890)
+        image[0:len(boot)] = boot
+        image[510:512] = b"\x55\xaa"
+        image[-SECTOR:] = image[:SECTOR]
+        image[CLUSTER:2 * CLUSTER] = attrdef
+        image[bitmap_lcn * CLUSTER:bitmap_lcn * CLUSTER + _align(total_clusters // 8 + 1)] = \
+            b"\xff" * _align(total_clusters // 8 + 1)
+
+        mft = bytearray(count * RECORD)
+        for entry in self.entries.values():
+            for number, record in self._records(entry).items():
+                mft[number * RECORD:(number + 1) * RECORD] = record
+        image[mft_lcn * CLUSTER:(mft_lcn + mft_clusters) * CLUSTER] = mft
+        image[2 * CLUSTER:3 * CLUSTER] = mft[:4 * RECORD]
+        for number, records in index_records.items():
+            lcn = self.entries[number].index_lcn
+            for i, record in enumerate(records):
+                image[(lcn + i) * CLUSTER:(lcn + i + 1) * CLUSTER] = record
+
+        with open(path, "wb") as f:
+            f.write(image)
+        return len(image)
@@ -0,0 +1,136 @@
+import importlib
+import io
+import os
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("flask_cors")
+
+
+@pytest.fixture(scope="module")
+def app_module(tmp_path_factory):
+    # The app keeps its upload folder relative to the working directory; the job database goes to a data dir
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    os.environ["FORENSIC_DATA_DIR"] = str(tmp_path_factory.mktemp("data"))
+    try:
+        module = importlib.import_module("backend.app")
+        yield module
+    finally:
+        os.chdir(cwd)
+        del os.environ["FORENSIC_DATA_DIR"]
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    queued = []
+
+    def queue_extraction(filename, image_path, digests, options):
+        queued.append((filename, image_path))
+        return app_module.ExtractionJob("job-1", filename)
+
+    monkeypatch.setattr(app_module, "queue_extraction", queue_extraction)
+    monkeypatch.setattr(app_module.scheduler, "queue_position", lambda job_id: 0)
+    client = app_module.app.test_client()
+    client.queued = queued
+    return client
+
+
+def _part_files(app_module):
+    return [name for name in os.listdir(app_module.UPLOAD_FOLDER) if name.endswith(".part")]
+
+
+def test_upload_moves_file_under_a_safe_name(app_module, client):
+    response = client.post("/upload-image", data={"image": (io.BytesIO(b"disk" * 100), "../../evil.img")},
+                           content_type="multipart/form-data")
+
+    assert response.status_code == 200
+    assert client.queued == [("evil.img", os.path.join(app_module.UPLOAD_FOLDER, "evil.img"))]
+    assert os.path.getsize(os.path.join(app_module.UPLOAD_FOLDER, "evil.img")) == 400
+    assert _part_files(app_module) == []
+
+
+@pytest.mark.parametrize("files", [
+    {"other": (io.BytesIO(b"x" * 100), "other.img")},                     # no "image" field
+    {"image": (io.BytesIO(b"x" * 100), "..")},                            # nothing left after secure_filename
+    {"image": (io.BytesIO(b"x" * 100), "a.img"), "extra": (io.BytesIO(b"y"), "b.img")},
+])
+def test_part_files_are_removed_when_not_moved(app_module, client, files):
+    client.post("/upload-image", data=files, content_type="multipart/form-data")
+
+    assert _part_files(app_module) == []
+
+
+def test_part_files_are_removed_when_the_view_fails(app_module, client, monkeypatch):
+    monkeypatch.setattr(app_module, "extraction_options", lambda form: 1 / 0)
+    response = client.post("/upload-image", data={"image": (io.BytesIO(b"x" * 100), "a.img")},
+                           content_type="multipart/form-data")
+
+    assert response.status_code == 500
+    assert _part_files(app_module) == []
+
+
+def test_part_files_are_removed_when_the_client_disconnects(app_module, client):
+    boundary = "b0undary"
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"image\"; filename=\"a.img\"\r\n"
+            f"Content-Type: application/octet-stream\r\n\r\n").encode() + b"x" * 100_000
+    # Content-Length promises more than is sent, as when the connection drops mid-upload
+    client.post("/upload-image", input_stream=io.BytesIO(body),
+                content_type=f"multipart/form-data; boundary={boundary}",
+                headers={"Content-Length": str(len(body) + 1_000_000)})
+
+    assert _part_files(app_module) == []
+
+
+def test_batch_ingest_defaults_to_the_upload_folder(app_module, client, tmp_path):
+    outside = tmp_path / "intake"
+    outside.mkdir()
+    (outside / "disk.dd").write_bytes(b"x" * 512)
+    inside = os.path.join(app_module.UPLOAD_FOLDER, "intake")
+    os.makedirs(inside, exist_ok=True)
+    with open(os.path.join(inside, "disk.dd"), "wb") as f:
+        f.write(b"x" * 512)
+
+    assert client.post("/batch-ingest", json={"directory": str(outside)}).status_code == 403
+    response = client.post("/batch-ingest", json={"directory": inside})
+    assert response.status_code == 200
+    assert [job["path"] for job in response.get_json()["jobs"]] == [os.path.abspath(os.path.join(inside, "disk.dd"))]
+
+
+@pytest.mark.parametrize("body", [
+    {"paths": "a.dd"},
+    {"paths": ["a.dd", 5]},
+    {"paths": [None]},
+    {"paths": [""]},
+    {"directory": ["a"], "paths": None},
+    {"directory": 7},
+    {"manifest": {"a": 1}},
+    ["a.dd"],
+])
+def test_batch_ingest_rejects_malformed_sources(client, body):
+    response = client.post("/batch-ingest", json=body)
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("filename", ["..", "x.part", "0123456789abcdef0123456789abcdef.receipts"])
+def test_chunked_upload_rejects_unusable_names(client, filename):
+    response = client.post("/uploads", json={"filename": filename, "size": 10})
+
+    assert response.status_code == 400
+
+
+def test_job_database_is_outside_the_upload_folder(app_module):
+    uploads = os.path.realpath(app_module.UPLOAD_FOLDER)
+
+    assert not os.path.realpath(app_module.JOB_DB_PATH).startswith(uploads + os.sep)
+
+
+def test_entropy_plot_needs_no_filesystem(app_module, client):
+    # An encrypted container: no files were found, but the entropy map was built
+    app_module.jobs.save_features("encrypted", {"file_types": {}, "entropy": {
+        "block_size": 4096, "profile": [{"offset": 0, "entropy": 7.99}], "high_entropy_regions": []}})
+
+    assert client.get("/plots?type=entropy&job_id=encrypted").status_code == 200
+    assert client.get("/plots?type=pie&job_id=encrypted").status_code == 400
@@ -0,0 +1,38 @@
+import os
+
+from backend.batch_ingest import discover_evidence, group_evidence
+
+
+def _touch(directory, *names):
+    for name in names:
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(b"x" * 512)
+    return [os.path.join(directory, name) for name in names]
+
+
+def test_sets_are_grouped_under_their_first_segment(tmp_path):
+    d = str(tmp_path)
+    _touch(d, "a.E01", "a.E02", "a.EAA", "b.001", "b.002", "b.003", "c.dd", "notes.txt", "setup.exe")
+
+    sets, skipped = discover_evidence(d)
+
+    assert {(os.path.basename(s["path"]), s["format"], s["segments"]) for s in sets} == {
+        ("a.E01", "ewf", 3), ("b.001", "split_raw", 3), ("c.dd", "raw", 1)}
+    assert skipped == []
+
+
+def test_incomplete_sets_are_skipped_once(tmp_path):
+    sets, skipped = group_evidence(_touch(str(tmp_path), "a.E02", "a.E03", "b.001", "b.003"))
+
+    assert sets == []
+    assert sorted((os.path.basename(s["path"]), s["reason"]) for s in skipped) == [
+        ("a.E02", "EWF set without its .E01 segment"), ("b.001", "Split raw set with missing segments")]
+
+
+def test_many_split_raw_sets(tmp_path):
+    paths = _touch(str(tmp_path), *[f"disk{i:04d}.{n:03d}" for i in range(1000) for n in (1, 2)])
+
+    sets, skipped = group_evidence(paths)
+
+    assert len(sets) == 1000 and skipped == []
+    assert all(s["segments"] == 2 for s in sets)
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from utils.block_index import BlockIndex, build_block_index, diff_indexes, is_current, verify_range
+
+BLOCK = 4096
+SIZE = 10 * BLOCK + 1000  # ten whole blocks and a partial one
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "disk.dd"
+    path.write_bytes(bytes((i * 31 + i // 97) % 256 for i in range(SIZE)))
+    index_path = build_block_index(str(path), block_size=BLOCK, workers=2)
+    return str(path), index_path
+
+
+def _flip(path, offset):
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def _rebuild(tmp_path, path):
+    return build_block_index(path, str(tmp_path / "second.blkidx"), block_size=BLOCK, workers=1)
+
+
+def test_index_covers_the_image(image):
+    path, index_path = image
+
+    with BlockIndex(index_path) as index:
+        assert (index.block_count, index.image_size, index.algorithm) == (11, SIZE, "sha256")
+    assert is_current(path, index_path)
+    assert verify_range(path, index_path=index_path) == []
+
+
+@pytest.mark.parametrize("offset, region", [
+    (3 * BLOCK + 17, (3 * BLOCK, BLOCK)),
+    (10 * BLOCK + 999, (10 * BLOCK, 1000)),  # the partial last block
+])
+def test_one_changed_byte_reports_exactly_its_block(image, tmp_path, offset, region):
+    path, index_path = image
+    _flip(path, offset)
+
+    assert verify_range(path, index_path=index_path) == [region]
+    assert verify_range(path, region[0], 10, index_path=index_path) == [region]
+    assert verify_range(path, 0, region[0], index_path=index_path) == []
+    assert diff_indexes(index_path, _rebuild(tmp_path, path)) == [region]
+
+
+def test_size_change_inside_the_last_block_is_reported_once(image, tmp_path):
+    path, index_path = image
+    with open(path, "r+b") as f:
+        f.truncate(SIZE - 500)
+
+    assert verify_range(path, index_path=index_path) == [(10 * BLOCK, 1000)]
+    assert verify_range(path, 10 * BLOCK + 100, 50, index_path=index_path) == [(10 * BLOCK, 1000)]
+    assert diff_indexes(index_path, _rebuild(tmp_path, path)) == [(10 * BLOCK, 1000)]
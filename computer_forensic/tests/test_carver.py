@@ -0,0 +1,72 @@
+import functools
+import json
+import os
+
+from extraction import carver
+from extraction.signature_scanner import split_ranges
+
+PIECE = 4096
+
+
+def _image(path):
+    data = bytearray(6 * PIECE)
+    # A ZIP spanning three pieces; its later local headers start in pieces of their own
+    zip_start = 1000
+    for offset in (zip_start, 5000, 9000):
+        data[offset:offset + 4] = b"PK\x03\x04"
+    eocd = 11000
+    data[eocd:eocd + 22] = b"PK\x05\x06" + b"\x00" * 18
+    jpeg_start = 15000
+    data[jpeg_start:jpeg_start + 3] = b"\xFF\xD8\xFF"
+    data[jpeg_start + 500:jpeg_start + 502] = b"\xFF\xD9"
+    path.write_bytes(bytes(data))
+    return zip_start, eocd + 22, jpeg_start
+
+
+def _manifest(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_files_crossing_pieces_are_carved_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(carver, "split_ranges", functools.partial(split_ranges, split_size=PIECE))
+    image = tmp_path / "image.dd"
+    zip_start, zip_end, jpeg_start = _image(image)
+    out = tmp_path / "carved"
+
+    summary = carver.carve_image(str(image), str(out), types=["zip", "jpeg"], workers=1)
+
+    entries = _manifest(summary["manifest"])
+    assert [(e["type"], e["offset"]) for e in entries] == [("zip", zip_start), ("jpeg", jpeg_start)]
+    assert entries[0]["length"] == zip_end - zip_start
+    assert summary["by_type"] == {"zip": 1, "jpeg": 1}
+    assert sorted(os.listdir(out)) == sorted([carver.MANIFEST_NAME] + [os.path.basename(e["path"]) for e in entries])
+
+
+def test_rerun_replaces_the_manifest(tmp_path):
+    image = tmp_path / "image.dd"
+    _image(image)
+    out = tmp_path / "carved"
+
+    carver.carve_image(str(image), str(out), types=["zip", "jpeg"], workers=1)
+    summary = carver.carve_image(str(image), str(out), types=["zip", "jpeg"], workers=1)
+
+    assert len(_manifest(summary["manifest"])) == summary["carved"] == 2
+
+
+def test_split_raw_set_is_carved_across_segments(tmp_path):
+    whole = tmp_path / "whole.dd"
+    zip_start, zip_end, jpeg_start = _image(whole)
+    data = whole.read_bytes()
+    boundary = 7000  # inside the ZIP
+    (tmp_path / "disk.001").write_bytes(data[:boundary])
+    (tmp_path / "disk.002").write_bytes(data[boundary:])
+
+    summary = carver.carve_image(str(tmp_path / "disk.001"), str(tmp_path / "carved"), types=["zip", "jpeg"],
+                                 workers=1)
+
+    entries = _manifest(summary["manifest"])
+    assert [(e["type"], e["offset"], e["length"]) for e in entries] == [
+        ("zip", zip_start, zip_end - zip_start), ("jpeg", jpeg_start, 502)]
+    with open(entries[0]["path"], "rb") as f:
+        assert f.read() == data[zip_start:zip_end]
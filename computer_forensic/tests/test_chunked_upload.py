@@ -0,0 +1,160 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from backend.chunked_upload import UploadManager
+
+CHUNK = 1024
+
+
+def _data(size=CHUNK * 3 + 100):
+    return bytes((i * 7 + i // 251) % 256 for i in range(size))
+
+
+def _chunk(data, index):
+    return data[index * CHUNK:(index + 1) * CHUNK]
+
+
+def _send_all(upload, data, order):
+    for index in order:
+        upload.write_chunk(index, io.BytesIO(_chunk(data, index)))
+
+
+def test_out_of_order_chunks_finalize_to_original(tmp_path):
+    data = _data()
+    manager = UploadManager(str(tmp_path))
+    upload = manager.create("disk.img", len(data), CHUNK)
+    assert upload.chunk_count == 4
+    _send_all(upload, data, [3, 1, 0])
+    assert upload.missing() == [2]
+    with pytest.raises(ValueError):
+        manager.finalize(upload.upload_id, str(tmp_path / "disk.img"))
+    _send_all(upload, data, [2])
+
+    manifest = manager.finalize(upload.upload_id, str(tmp_path / "disk.img"))
+    assert (tmp_path / "disk.img").read_bytes() == data
+    expected = hashlib.sha256(b"".join(hashlib.sha256(_chunk(data, i)).digest() for i in range(4))).hexdigest()
+    assert manifest == expected
+    assert not os.path.exists(upload.receipts_path)
+
+
+def test_digest_mismatch_is_rejected(tmp_path):
+    data = _data()
+    upload = UploadManager(str(tmp_path)).create("disk.img", len(data), CHUNK)
+    with pytest.raises(ValueError):
+        upload.write_chunk(0, io.BytesIO(_chunk(data, 0)), expected_digest="00" * 32)
+    assert 0 in upload.missing()
+
+
+def test_rejected_resend_revokes_the_received_chunk(tmp_path):
+    data = _data()
+    manager = UploadManager(str(tmp_path))
+    upload = manager.create("disk.img", len(data), CHUNK)
+    _send_all(upload, data, range(4))
+
+    # A short resend overwrites part of chunk 1 before it is rejected
+    with pytest.raises(ValueError):
+        upload.write_chunk(1, io.BytesIO(b"\xff" * (CHUNK // 2)))
+    assert upload.missing() == [1]
+    with pytest.raises(ValueError):
+        manager.finalize(upload.upload_id, str(tmp_path / "disk.img"))
+
+    # The revocation is durable: a restarted server also asks for chunk 1 again
+    reloaded = UploadManager(str(tmp_path)).get(upload.upload_id)
+    assert reloaded.missing() == [1]
+
+    _send_all(upload, data, [1])
+    manager.finalize(upload.upload_id, str(tmp_path / "disk.img"))
+    assert (tmp_path / "disk.img").read_bytes() == data
+
+
+def test_resend_of_identical_chunk_is_accepted(tmp_path):
+    data = _data()
+    manager = UploadManager(str(tmp_path))
+    upload = manager.create("disk.img", len(data), CHUNK)
+    _send_all(upload, data, [0, 1, 2, 3, 2])
+    assert upload.missing() == []
+    manager.finalize(upload.upload_id, str(tmp_path / "disk.img"))
+    assert (tmp_path / "disk.img").read_bytes() == data
+
+
+def test_reload_from_receipts(tmp_path):
+    data = _data()
+    upload = UploadManager(str(tmp_path)).create("../evil/disk.img", len(data), CHUNK)
+    _send_all(upload, data, [0, 2])
+    with open(upload.receipts_path, "a") as f:
+        f.write('{"chunk": 3, "dig')  # torn last line
+
+    manager = UploadManager(str(tmp_path))
+    reloaded = manager.get(upload.upload_id)
+    assert reloaded.filename == "disk.img"
+    assert (reloaded.size, reloaded.chunk_size) == (len(data), CHUNK)
+    assert reloaded.missing() == [1, 3]
+    with pytest.raises(KeyError):
+        manager.get("not-an-upload-id")
+
+
+def test_finalize_detects_chunks_changed_on_disk(tmp_path):
+    data = _data()
+    manager = UploadManager(str(tmp_path))
+    upload = manager.create("disk.img", len(data), CHUNK)
+    _send_all(upload, data, range(4))
+    with open(upload.part_path, "r+b") as f:
+        f.seek(2 * CHUNK + 5)
+        f.write(b"\x00\x01")
+
+    with pytest.raises(ValueError, match="2"):
+        manager.finalize(upload.upload_id, str(tmp_path / "disk.img"))
+    assert upload.missing() == [2]
+    assert not (tmp_path / "disk.img").exists()
+
+    _send_all(upload, data, [2])
+    manager.finalize(upload.upload_id, str(tmp_path / "disk.img"))
+    assert (tmp_path / "disk.img").read_bytes() == data
+
+
+@pytest.mark.parametrize("filename", ["", "..", "../", "abc.part", "0" * 32 + ".receipts", "x.RECEIPTS"])
+def test_unusable_file_names_are_rejected(tmp_path, filename):
+    with pytest.raises(ValueError):
+        UploadManager(str(tmp_path)).create(filename, 10, CHUNK)
+    assert os.listdir(tmp_path) == []
+
+
+def test_chunks_cannot_be_written_while_finalize_verifies(tmp_path):
+    data = _data()
+    manager = UploadManager(str(tmp_path))
+    upload = manager.create("disk.img", len(data), CHUNK)
+    _send_all(upload, data, range(4))
+    verify = upload.verify
+    rejected = []
+
+    def verify_with_late_chunk():
+        with pytest.raises(ValueError, match="finalized"):
+            upload.write_chunk(1, io.BytesIO(b"\xff" * CHUNK))
+        rejected.append(1)
+        return verify()
+
+    upload.verify = verify_with_late_chunk
+    manager.finalize(upload.upload_id, str(tmp_path / "disk.img"))
+
+    assert rejected == [1]
+    assert (tmp_path / "disk.img").read_bytes() == data
+
+
+def test_abandoned_uploads_expire(tmp_path):
+    data = _data()
+    manager = UploadManager(str(tmp_path), ttl=3600)
+    stale = manager.create("old.img", len(data), CHUNK)
+    _send_all(stale, data, [0])
+    fresh = manager.create("new.img", len(data), CHUNK)
+    old = os.path.getmtime(stale.receipts_path) - 7200
+    os.utime(stale.receipts_path, (old, old))
+
+    manager.create("other.img", len(data), CHUNK)
+
+    assert not os.path.exists(stale.part_path) and not os.path.exists(stale.receipts_path)
+    with pytest.raises(KeyError):
+        manager.get(stale.upload_id)
+    assert manager.get(fresh.upload_id) is fresh
@@ -0,0 +1,264 @@
+import csv
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+
+from backend import db_router
+from database.bulk_ingest import copy_artifacts_postgres, insert_artifacts_mongodb
+from database.connection_manager import ConnectionManager
+from extraction.file_table import FileTable
+
+
+class _FakePostgres:
+    """
+    Just enough of artifacts/timeline_events for bulk_ingest: DELETE by case, nextval and COPY.
+    A transaction that raises is rolled back; `fail_copy` makes the n-th COPY (counting from 1) fail.
+    """
+
+    def __init__(self):
+        self.tables = {"artifacts": [], "timeline_events": []}
+        self.transactions = []
+        self.fail_copy = None
+        self.copies = 0
+        self._ids = itertools.count(1)
+
+    @contextmanager
+    def postgres_connection(self):
+        statements = []
+        self.transactions.append(statements)
+        saved = {name: list(rows) for name, rows in self.tables.items()}
+        try:
+            yield _FakeConnection(self, statements)
+        except BaseException:
+            self.tables = saved
+            raise
+
+    def execute(self, sql, params):
+        if sql.startswith("DELETE FROM timeline_events"):
+            self.tables["timeline_events"] = [r for r in self.tables["timeline_events"] if r[-1] != params[0]]
+        elif sql.startswith("DELETE FROM artifacts"):
+            self.tables["artifacts"] = [r for r in self.tables["artifacts"] if r[-1] != params[0]]
+        else:
+            return [(next(self._ids),) for _ in range(params[0])]
+        return []
+
+
+class _FakeConnection:
+    def __init__(self, db, statements):
+        self.db = db
+        self.statements = statements
+
+    @contextmanager
+    def cursor(self):
+        yield self
+
+    def execute(self, sql, params):
+        self.statements.append(sql.split(" (")[0].split(" WHERE")[0])
+        self.rows = self.db.execute(sql, params)
+
+    def fetchall(self):
+        return self.rows
+
+    def copy_expert(self, sql, buf):
+        table = sql.split()[1]
+        self.db.copies += 1
+        if self.db.copies == self.db.fail_copy:
+            raise RuntimeError("COPY failed")
+        self.statements.append(f"COPY {table}")
+        self.db.tables[table].extend(tuple(row) for row in csv.reader(buf))
+
+
+class _FakeCollection:
+    def __init__(self):
+        self.documents = []
+        self.calls = []
+        self.fail_insert = None  # the n-th insert_many (counting from 1) fails after storing its documents
+
+    @staticmethod
+    def _matches(document, query):
+        for field, condition in query.items():
+            if isinstance(condition, dict):
+                if document[field] == condition["$ne"]:
+                    return False
+            elif document[field] != condition:
+                return False
+        return True
+
+    def delete_many(self, query):
+        self.calls.append("delete_many")
+        self.documents = [d for d in self.documents if not self._matches(d, query)]
+
+    def insert_many(self, documents, ordered=True):
+        self.calls.append("insert_many")
+        self.documents.extend(documents)
+        if self.calls.count("insert_many") == self.fail_insert:
+            raise RuntimeError("insert_many failed")
+        return type("InsertManyResult", (), {"inserted_ids": list(range(len(documents)))})()
+
+
+class _FakeMongo:
+    def __init__(self):
+        self.collection = _FakeCollection()
+
+    def mongo_db(self):
+        return {"artifacts": self.collection}
+
+
+def _table(files, dirs=1):
+    table = FileTable()
+    for i in range(dirs):
+        table.append({"path": f"/dir{i}", "inode": 100 + i, "size": 0, "mtime": 0, "atime": 0, "ctime": 0,
+                      "crtime": 0, "allocated": True, "is_dir": True, "extension": ""})
+    for i in range(files):
+        table.append({"path": f"/dir0/file{i}.txt", "inode": 200 + i, "size": i, "mtime": 1600000000 + i,
+                      "atime": 0, "ctime": 0, "crtime": 0, "allocated": True, "is_dir": False, "extension": "txt"})
+    return table
+
+
+def test_postgres_rerun_replaces_the_case_rows():
+    db = _FakePostgres()
+    table = _table(5)
+    db.tables["artifacts"].append(("other",) * 11 + ("case-2",))
+    copy_artifacts_postgres(table, "case-1", batch_size=2, manager=db)
+    stats = copy_artifacts_postgres(table, "case-1", batch_size=2, manager=db)
+
+    assert stats["rows"] == 5
+    assert [r[-1] for r in db.tables["artifacts"]].count("case-1") == 5
+    assert [r[-1] for r in db.tables["artifacts"]].count("case-2") == 1
+    assert len(db.tables["timeline_events"]) == 5
+    # The old rows and every batch share one transaction
+    assert len(db.transactions) == 2
+    assert db.transactions[1][:2] == ["DELETE FROM timeline_events", "DELETE FROM artifacts"]
+    assert db.transactions[1].count("COPY artifacts") == 3
+
+
+def test_postgres_failed_rerun_keeps_the_previous_load():
+    db = _FakePostgres()
+    table = _table(5)
+    copy_artifacts_postgres(table, "case-1", batch_size=2, manager=db)
+    before = {name: list(rows) for name, rows in db.tables.items()}
+    db.fail_copy = db.copies + 3  # the second batch's artifacts COPY
+    progress = []
+
+    with pytest.raises(RuntimeError):
+        copy_artifacts_postgres(table, "case-1", batch_size=2, manager=db,
+                                progress_callback=lambda done, total: progress.append(done))
+
+    assert db.tables == before
+    assert progress == [2]  # only the batch that was written
+
+
+def test_postgres_rerun_without_files_still_clears_the_case():
+    db = _FakePostgres()
+    copy_artifacts_postgres(_table(3), "case-1", manager=db)
+    stats = copy_artifacts_postgres(_table(0, dirs=3), "case-1", manager=db)
+
+    assert stats["rows"] == 0
+    assert db.tables == {"artifacts": [], "timeline_events": []}
+
+
+def test_mongodb_rerun_replaces_the_case_documents():
+    db = _FakeMongo()
+    table = _table(5)
+    insert_artifacts_mongodb(table, "case-1", batch_size=2, manager=db)
+    insert_artifacts_mongodb(table, "case-1", batch_size=2, manager=db)
+
+    assert len(db.collection.documents) == 5
+    assert len({d["load_id"] for d in db.collection.documents}) == 1
+    # The earlier load is removed only after the new one is complete
+    assert db.collection.calls == (["insert_many"] * 3 + ["delete_many"]) * 2
+
+
+def test_mongodb_failed_rerun_keeps_the_previous_load():
+    db = _FakeMongo()
+    table = _table(5)
+    insert_artifacts_mongodb(table, "case-1", batch_size=2, manager=db)
+    before = list(db.collection.documents)
+    db.collection.fail_insert = 5  # the second batch of the rerun
+
+    with pytest.raises(RuntimeError):
+        insert_artifacts_mongodb(table, "case-1", batch_size=2, manager=db)
+
+    assert db.collection.documents == before
+
+
+class _FakePool:
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.kwargs = kwargs
+
+    def getconn(self):
+        return type("Connection", (), {"closed": 0, "commit": lambda self: None})()
+
+    def putconn(self, conn, close=False):
+        pass
+
+
+def test_postgres_pool_sets_connect_and_statement_timeouts(monkeypatch):
+    pool_module = pytest.importorskip("psycopg2.pool")
+    monkeypatch.setattr(pool_module, "ThreadedConnectionPool", _FakePool)
+    manager = ConnectionManager()
+    manager._config = {"postgres": {"host": "db", "port": 5432, "user": "u", "password": "p", "database": "f",
+                                    "statement_timeout": 2.5}}
+
+    kwargs = manager.postgres_pool().kwargs
+    assert kwargs["connect_timeout"] > 0
+    assert kwargs["options"] == "-c statement_timeout=2500"
+
+
+def test_postgres_connection_gives_up_when_the_pool_stays_busy(monkeypatch):
+    pool_module = pytest.importorskip("psycopg2.pool")
+    monkeypatch.setattr(pool_module, "ThreadedConnectionPool", _FakePool)
+    manager = ConnectionManager()
+    manager._config = {"postgres": {"host": "db", "port": 5432, "user": "u", "password": "p", "database": "f",
+                                    "pool_max": 1, "acquire_timeout": 0.05}}
+
+    with manager.postgres_connection():
+        with pytest.raises(TimeoutError):
+            with manager.postgres_connection():
+                pass
+    with manager.postgres_connection():  # the slot is free again
+        pass
+
+
+def test_insert_all_reports_abandoned_writes_as_possibly_committed(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setitem(db_router.WRITERS, "slow", lambda features, key: release.wait())
+    monkeypatch.setitem(db_router.WRITERS, "fast", lambda features, key: None)
+    start = time.monotonic()
+    outcomes = db_router.insert_all(["slow", "fast"], {}, timeout=0.1)
+    release.set()
+
+    assert time.monotonic() - start < 1
+    assert outcomes["fast"]["status"] == "ok"
+    assert outcomes["slow"]["status"] == "timeout"
+    assert "may have committed" in outcomes["slow"]["error"]
+
+
+def test_retried_writes_reuse_the_key(monkeypatch):
+    from database import mongo_handler
+
+    class Collection:
+        def __init__(self):
+            self.documents = {}
+            self.calls = 0
+
+        def replace_one(self, query, document, upsert=False):
+            self.calls += 1
+            self.documents[query["_id"]] = document
+            if self.calls == 1:
+                raise TimeoutError("acknowledgement lost")  # the write reached the server anyway
+
+    collection = Collection()
+    manager = type("Manager", (), {"mongo_db": lambda self: {"cases": collection}})()
+    monkeypatch.setattr(mongo_handler, "get_manager", lambda: manager)
+    monkeypatch.setitem(db_router.WRITERS, "mongodb", mongo_handler.insert_mongodb)
+    features = {"total_files": 3}
+
+    outcomes = db_router.insert_all(["mongodb"], features, key="job-1", backoff=0)
+
+    assert outcomes["mongodb"]["status"] == "ok" and outcomes["mongodb"]["attempts"] == 2
+    assert collection.documents == {"job-1": {"total_files": 3, "_id": "job-1"}}
+    assert features == {"total_files": 3}
@@ -0,0 +1,118 @@
+import hashlib
+import os
+
+import pytest
+
+from extraction import extractor
+from utils.digest_cache import DigestCache, file_identity, sample_fingerprint, set_identity
+
+SIZE = 300 * 1024
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = DigestCache(str(tmp_path / "cache" / "digests.sqlite"), max_entries=3)
+    monkeypatch.setattr(extractor, "get_default_cache", lambda: cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "disk.dd"
+    path.write_bytes(bytes((i * 29 + i // 401) % 256 for i in range(SIZE)))
+    return str(path)
+
+
+def _rewrite_in_place(path, offset):
+    """Change one byte while keeping the size and mtime, as a tampered or bit-rotted file would."""
+    st = os.stat(path)
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0x01]))
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def _sha256(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_digests_come_from_the_cache_until_the_fingerprint_changes(cache, image):
+    first = extractor.compute_image_digests(image, ("sha256",))
+    assert (first["source"], first["digests"]["sha256"]) == ("image", _sha256(image))
+    assert extractor.compute_image_digests(image, ("sha256",))["source"] == "cache"
+
+    identity = file_identity(image)
+    _rewrite_in_place(image, SIZE // 2)
+    changed = file_identity(image)
+    assert changed[:4] == identity[:4] and changed[4] != identity[4]
+
+    again = extractor.compute_image_digests(image, ("sha256",))
+    assert (again["source"], again["digests"]["sha256"]) == ("image", _sha256(image))
+    assert again["digests"] != first["digests"]
+
+
+def test_force_verify_rereads_and_compares(cache, image):
+    extractor.compute_image_digests(image, ("md5",))
+    result = extractor.compute_image_digests(image, ("md5",), force_verify=True)
+    assert (result["source"], result["verified"]) == ("image", True)
+
+    # A cached value for the same identity that no longer matches is flagged
+    cache.put(file_identity(image), {"md5": "0" * 32})
+    result = extractor.compute_image_digests(image, ("md5",), force_verify=True)
+    assert result["verified"] is False
+    assert cache.get(file_identity(image), ("md5",)) == result["digests"]
+
+
+def test_sampled_fingerprint_only_reads_its_blocks(image):
+    before = sample_fingerprint(image, block_size=1024, blocks=4)
+    _rewrite_in_place(image, 5000)  # between the sampled blocks
+    assert sample_fingerprint(image, block_size=1024, blocks=4) == before
+    _rewrite_in_place(image, SIZE - 1)  # the last block is always sampled
+    assert sample_fingerprint(image, block_size=1024, blocks=4) != before
+
+
+def test_split_set_identity_covers_every_segment(cache, tmp_path):
+    paths = []
+    for number in range(1, 4):
+        path = tmp_path / f"set.{number:03d}"
+        path.write_bytes(bytes([number]) * 4096)
+        paths.append(str(path))
+    identity = set_identity(paths)
+    assert extractor.compute_image_digests(paths[0], ("md5",))["source"] == "image"
+    assert extractor.compute_image_digests(paths[0], ("md5",))["source"] == "cache"
+
+    _rewrite_in_place(paths[0], 10)  # the first and last segments are sampled
+    changed = set_identity(paths)
+    assert changed != identity
+    st = os.stat(paths[1])
+    os.utime(paths[1], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))  # the others by size and mtime
+    assert set_identity(paths) != changed
+    assert extractor.compute_image_digests(paths[0], ("md5",))["source"] == "image"
+
+
+def test_entries_are_merged_evicted_and_invalidated(cache, tmp_path, image):
+    identity = file_identity(image)
+    cache.put(identity, {"md5": "a"})
+    cache.put(identity, {"sha1": "b"})
+    assert cache.get(identity, ("md5", "sha1")) == {"md5": "a", "sha1": "b"}
+    assert cache.get(identity, ("md5", "sha256")) is None
+
+    others = []
+    for i in range(3):
+        other = tmp_path / f"other{i}.dd"
+        other.write_bytes(bytes([i]) * 10)
+        others.append(file_identity(str(other)))
+    cache.put(others[0], {"md5": "c"})
+    cache.put(others[1], {"md5": "c"})
+    cache.get(identity, ("md5",))  # used again: others[0] is now the least recently used
+    cache.put(others[2], {"md5": "c"})
+    assert cache.get(others[0], ("md5",)) is None
+    assert cache.get(identity, ("md5",)) == {"md5": "a"}
+    assert all(cache.get(other, ("md5",)) == {"md5": "c"} for other in others[1:])
+
+    cache.invalidate(str(tmp_path / "other2.dd"))
+    assert cache.get(others[2], ("md5",)) is None
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from extraction import entropy_map
+from extraction.entropy_map import EntropyMap, build_entropy_map, is_current, summarize
+
+BLOCK = 4096
+REGION = 2 * 1024 * 1024
+
+
+@pytest.fixture
+def image(tmp_path):
+    # Zeros, then random bytes, then zeros again
+    path = tmp_path / "disk.dd"
+    path.write_bytes(bytes(REGION) + random.Random(7).randbytes(REGION) + bytes(REGION))
+    return str(path)
+
+
+def test_map_finds_the_random_region(image):
+    map_path = build_entropy_map(image, block_size=BLOCK, workers=1)
+
+    with EntropyMap(map_path) as entropy:
+        assert (entropy.block_size, entropy.image_size, len(entropy)) == (BLOCK, 3 * REGION, 3 * REGION // BLOCK)
+        values = list(entropy.values())
+        blocks = REGION // BLOCK
+        assert max(values[:blocks]) == 0 and max(values[2 * blocks:]) == 0
+        assert min(values[blocks:2 * blocks]) > 7.9
+        assert entropy.high_entropy_regions() == [(REGION, REGION)]
+    assert is_current(image, map_path)
+    assert summarize(map_path)["high_entropy_regions"] == [{"offset": REGION, "length": REGION}]
+
+
+def test_map_matches_without_numpy(tmp_path, monkeypatch):
+    image = tmp_path / "small.dd"
+    image.write_bytes(bytes(8 * BLOCK) + random.Random(7).randbytes(8 * BLOCK + 100))
+    image = str(image)
+    with EntropyMap(build_entropy_map(image, str(tmp_path / "a.entropy"), block_size=BLOCK, workers=1)) as a:
+        expected = [float(v) for v in a.values()]
+    monkeypatch.setattr(entropy_map, "np", None)
+    with EntropyMap(build_entropy_map(image, str(tmp_path / "b.entropy"), block_size=BLOCK, workers=1)) as b:
+        assert b.values() == pytest.approx(expected, abs=0.01)
+
+
+def test_split_raw_set_is_mapped_as_one_image(image, tmp_path):
+    data = open(image, "rb").read()
+    first = tmp_path / "split.001"
+    first.write_bytes(data[:REGION + 1000])  # the random region starts inside the first segment
+    (tmp_path / "split.002").write_bytes(data[REGION + 1000:])
+
+    with EntropyMap(build_entropy_map(str(first), block_size=BLOCK, workers=1)) as entropy:
+        assert entropy.image_size == len(data)
+        assert entropy.high_entropy_regions() == [(REGION, REGION)]
@@ -0,0 +1,88 @@
+import json
+import os
+
+import pytest
+
+from extraction.export import CHECKPOINT_SUFFIX, export_ranges
+
+UNIT = 4096
+BLOCK = 1024
+
+
+class _Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "disk.dd"
+    data = bytes((i * 7 + i // 509) % 256 for i in range(10 * UNIT + 300))
+    path.write_bytes(data)
+    return str(path), data
+
+
+def _export(image_path, output, **kwargs):
+    return export_ranges(image_path, output, workers=2, unit_size=UNIT, block_size=BLOCK, **kwargs)
+
+
+def _interrupt_after(units):
+    def progress(done, total):
+        if done >= units * UNIT:
+            raise _Interrupted()
+    return progress
+
+
+def _checkpointed_units(output):
+    with open(output + CHECKPOINT_SUFFIX) as f:
+        return [json.loads(line)["unit"] for line in f.readlines()[1:]]
+
+
+def test_interrupted_export_resumes_from_its_checkpoint(image, tmp_path):
+    image_path, data = image
+    reference = _export(image_path, str(tmp_path / "reference.raw"))
+    output = str(tmp_path / "out.raw")
+
+    with pytest.raises(_Interrupted):
+        _export(image_path, output, progress_callback=_interrupt_after(3))
+    done = _checkpointed_units(output)
+    assert 3 <= len(done) < 11
+
+    result = _export(image_path, output)
+    assert (result["units"], result["resumed_units"], result["bytes"]) == (11, len(done), len(data))
+    assert result["digest"] == reference["digest"]
+    with open(output, "rb") as f:
+        assert f.read() == data
+    assert not os.path.exists(output + CHECKPOINT_SUFFIX)
+
+
+def test_resume_skips_checkpointed_units(image, tmp_path):
+    image_path, data = image
+    output = str(tmp_path / "out.raw")
+    with pytest.raises(_Interrupted):
+        _export(image_path, output, progress_callback=_interrupt_after(2))
+    done = _checkpointed_units(output)
+
+    # Units recorded in the checkpoint are not copied again
+    with open(output, "r+b") as f:
+        f.seek(done[0] * UNIT)
+        f.write(b"\xee" * UNIT)
+    _export(image_path, output)
+    with open(output, "rb") as f:
+        exported = f.read()
+    assert exported[done[0] * UNIT:(done[0] + 1) * UNIT] == b"\xee" * UNIT
+    assert [i for i in range(11) if exported[i * UNIT:(i + 1) * UNIT] != data[i * UNIT:(i + 1) * UNIT]] == [done[0]]
+
+
+def test_checkpoint_of_a_different_export_is_ignored(image, tmp_path):
+    image_path, data = image
+    output = str(tmp_path / "out.raw")
+    with pytest.raises(_Interrupted):
+        _export(image_path, output, progress_callback=_interrupt_after(2))
+    with open(output + CHECKPOINT_SUFFIX, "a") as f:
+        f.write('{"unit": 9, "dig')  # torn last line
+
+    # Other ranges: the old checkpoint does not apply and the export starts over
+    result = _export(image_path, output, ranges=[(UNIT, 2 * UNIT), (6 * UNIT, 500)], packed=True)
+    assert (result["units"], result["resumed_units"], result["bytes"]) == (3, 0, 2 * UNIT + 500)
+    with open(output, "rb") as f:
+        assert f.read() == data[UNIT:3 * UNIT] + data[6 * UNIT:6 * UNIT + 500]
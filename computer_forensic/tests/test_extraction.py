@@ -0,0 +1,86 @@
+import pytest
+
+pytsk3 = pytest.importorskip("pytsk3")
+np = pytest.importorskip("numpy")
+
+from extraction import mft_parser
+from extraction.fs_walker import walk_filesystem
+from tests.ntfs_image import NtfsImage
+
+COLUMNS = ("valid", "flags", "seq", "parent", "parent_seq", "size", "times", "names", "links", "unparsed")
+LONG_NAME = "".join(chr(ord("a") + i % 26) for i in range(200)) + ".txt"  # crosses the first sector's fixup
+
+
+@pytest.fixture(scope="module")
+def volume(tmp_path_factory):
+    image = NtfsImage()
+    docs = image.add_file("Docs", is_dir=True)
+    old = image.add_file("OldDir", is_dir=True, seq=3)
+    numbers = {
+        "plain": image.add_file("plain.txt", docs, size=10),
+        "long": image.add_file(LONG_NAME, docs, size=100),
+        "dos": image.add_file("Long File Name.docx", docs, size=11, dos_name="LONGFI~1.DOC"),
+        "linked": image.add_file("linked.txt", docs, size=12, links=[(mft_parser.ROOT_RECORD, "link2.txt")]),
+        "big": image.add_file("big.bin", docs, size=20000, resident=False),
+        "deleted": image.add_file("deleted.txt", docs, size=13, in_use=False),
+        "orphan": image.add_file("orphan.txt", old, parent_seq=2, size=14, in_use=False),
+        "split_name": image.add_file("splitname.txt", docs, size=15, split="name"),
+        "split_data": image.add_file("splitdata.bin", docs, size=30000, resident=False, split="data"),
+        "torn": image.add_file("torn.txt", docs, size=16, torn=True),
+    }
+    for i in range(40):
+        image.add_file(f"file{i:02d}.dat", old, size=i)
+    path = tmp_path_factory.mktemp("ntfs") / "volume.img"
+    image.build(str(path))
+    return pytsk3.FS_Info(pytsk3.Img_Info(str(path))), numbers
+
+
+def _key(record):
+    return record["path"], record["inode"]
+
+
+@pytest.mark.parametrize("batch_records", [mft_parser.BATCH_RECORDS, 7])
+def test_numpy_and_struct_parse_agree(volume, batch_records):
+    fs, numbers = volume
+    python = mft_parser.parse_mft(fs, batch_records, use_numpy=False)
+    vectorized = mft_parser.parse_mft(fs, batch_records, use_numpy=True)
+    for column in COLUMNS:
+        assert getattr(vectorized, column) == getattr(python, column), column
+    # Attribute lists and torn fixups are left to pytsk3
+    assert {numbers["split_name"], numbers["split_data"], numbers["torn"]} <= set(python.unparsed)
+    assert python.names[numbers["long"]] == LONG_NAME
+
+
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_mft_records_match_directory_walk(volume, use_numpy):
+    fs, numbers = volume
+    walk = {_key(r): r for r in walk_filesystem(fs)}
+    fast = {_key(r): r for r in mft_parser.iter_mft_records(fs, use_numpy=use_numpy)}
+
+    assert set(walk) - set(fast) == set()
+    # The $MFT also reaches deleted files whose parent was reused, which the walk never lists
+    assert {path for path, _ in set(fast) - set(walk)} == {"/$OrphanFiles/orphan.txt"}
+    for key, record in walk.items():
+        if record["allocated"]:
+            assert fast[key] == record, key
+    # For deleted entries the walk has no metadata left; the $MFT record still has it
+    deleted = fast[("/Docs/deleted.txt", numbers["deleted"])]
+    assert walk[("/Docs/deleted.txt", numbers["deleted"])]["size"] == 0
+    assert deleted["size"] == 13 and not deleted["allocated"] and deleted["mtime"] > 0
+
+
+def test_mft_records_names_and_sizes(volume):
+    fs, numbers = volume
+    records = list(mft_parser.iter_mft_records(fs))
+    by_path = {r["path"]: r for r in records}
+
+    assert by_path["/Docs/Long File Name.docx"]["inode"] == numbers["dos"]
+    assert not any(r["name"] == "LONGFI~1.DOC" for r in records)
+    assert by_path["/Docs/linked.txt"]["inode"] == by_path["/link2.txt"]["inode"] == numbers["linked"]
+    assert by_path["/Docs/big.bin"]["size"] == 20000
+    assert by_path[f"/Docs/{LONG_NAME}"]["size"] == 100
+    assert by_path["/Docs/splitname.txt"]["size"] == 15
+    assert by_path["/Docs/splitdata.bin"]["size"] == 30000
+    assert by_path["/Docs/torn.txt"]["inode"] == numbers["torn"]
+    assert by_path["/$OrphanFiles/orphan.txt"]["inode"] == numbers["orphan"]
+    assert len(by_path) == len(records)
@@ -0,0 +1,82 @@
+import pytest
+
+from extraction import file_table
+from extraction.file_table import FileTable
+
+
+def _records():
+    records = [{"path": "/docs", "inode": 5, "size": 0, "mtime": 1_600_000_000, "atime": 0, "ctime": 0,
+                "crtime": 0, "allocated": True, "is_dir": True, "extension": "", "partition_offset": 0}]
+    for i in range(40):
+        records.append({
+            "path": f"/docs/sub{i % 3}/file{i}.{('pdf', 'txt', '')[i % 3]}".rstrip("."),
+            "inode": 1000 + i,
+            "size": i * 977,
+            "mtime": 1_600_000_000 + i * 40_000,
+            "atime": 1_600_100_000,
+            "ctime": 0,
+            "crtime": 1_599_000_000 + i,
+            "allocated": i % 4 != 0,
+            "is_dir": False,
+            "extension": ("pdf", "txt", "")[i % 3],
+            "known": (None, True, False)[i % 3],
+            "partition_offset": 1_048_576 if i > 30 else 0,
+        })
+    records.append(dict(records[-1], path="/docs/café \udcff.bin", inode=99, extension="bin", known=None))
+    return records
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def numpy_mode(request, monkeypatch):
+    if request.param == "pure":
+        monkeypatch.setattr(file_table, "np", None)
+    elif file_table.np is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+
+def test_save_load_round_trip(tmp_path, numpy_mode):
+    table = FileTable()
+    table.extend(_records())
+    path = str(tmp_path / "files.ftable")
+    table.save(path)
+
+    loaded = FileTable.load(path)
+    assert len(loaded) == len(table)
+    assert list(loaded.iter_records()) == list(table.iter_records())
+    assert loaded.record(len(table) - 1)["path"] == "/docs/café \udcff.bin"
+    assert loaded.total_files == table.total_files == 41
+    assert loaded.allocated_bytes() == table.allocated_bytes()
+    assert loaded.known_counts() == table.known_counts() == {"known": 13, "unknown": 13}
+    assert loaded.type_counts() == table.type_counts()
+    assert loaded.size_histogram() == table.size_histogram()
+    assert loaded.time_buckets() == table.time_buckets()
+    assert loaded.recent(5) == table.recent(5)
+
+
+def test_loaded_table_is_read_only(tmp_path):
+    table = FileTable()
+    table.extend(_records()[:3])
+    path = str(tmp_path / "files.ftable")
+    table.save(path)
+
+    loaded = FileTable.load(path)
+    with pytest.raises(ValueError):
+        loaded.append(_records()[5])
+    assert len(loaded) == 3
+
+
+def test_empty_table_round_trips(tmp_path):
+    path = str(tmp_path / "empty.ftable")
+    FileTable().save(path)
+    loaded = FileTable.load(path)
+    assert len(loaded) == 0
+    assert loaded.type_counts() == {}
+    assert loaded.recent() == []
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "bogus.ftable"
+    path.write_bytes(b"NOTATABLE" + b"\0" * 32)
+    with pytest.raises(ValueError):
+        FileTable.load(str(path))
@@ -0,0 +1,119 @@
+import hashlib
+import io
+
+import pytest
+
+from utils.block_index import BlockIndex, BlockIndexWriter, build_block_index
+from utils.hashing import HashingWriter, MultiHasher, format_digests, hash_file, hash_stream
+
+BUFFER = 4096
+DATA = bytes((i * 17 + i // 331) % 256 for i in range(10 * BUFFER + 123))
+
+
+def _expected(data, algorithms=("md5", "sha1", "sha256")):
+    return {a: hashlib.new(a, data).hexdigest() for a in algorithms}
+
+
+class _TrickleReader(io.RawIOBase):
+    """Returns at most `step` bytes per readinto(), like a pipe or a network stream."""
+
+    def __init__(self, data, step):
+        super().__init__()
+        self._data = data
+        self._pos = 0
+        self._step = step
+
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        n = min(len(buf), self._step, len(self._data) - self._pos)
+        buf[:n] = self._data[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+class _EndlessReader(io.RawIOBase):
+    def readable(self):
+        return True
+
+    def readinto(self, buf):
+        buf[:64] = b"\0" * min(64, len(buf))
+        return min(64, len(buf))
+
+
+@pytest.mark.parametrize("size", [0, 1, BUFFER, 10 * BUFFER + 123])
+def test_hash_file_matches_hashlib(tmp_path, size):
+    path = tmp_path / "disk.dd"
+    path.write_bytes(DATA[:size])
+    progress = []
+
+    result = hash_file(str(path), ("md5", "sha1", "sha256"), progress_callback=lambda n, total: progress.append((n, total)),
+                       buffer_size=BUFFER, buffer_count=3)
+
+    assert result["digests"] == _expected(DATA[:size])
+    assert result["bytes"] == size
+    assert progress[-1] == (size, size)
+
+
+def test_short_reads_fill_whole_buffers():
+    result = hash_stream(_TrickleReader(DATA, 1000), ("sha256",), buffer_size=BUFFER, buffer_count=2)
+    assert result["digests"] == _expected(DATA, ("sha256",))
+    assert result["bytes"] == len(DATA)
+
+
+def test_update_and_submit_match_hashlib():
+    hasher = MultiHasher(("MD5", "sha256"), buffer_size=BUFFER, buffer_count=2).start()
+    hasher.update(DATA[:100])
+    hasher.update(DATA[100:3 * BUFFER + 7])  # spans several buffers
+    index, view = hasher.acquire()
+    rest = DATA[3 * BUFFER + 7:4 * BUFFER]
+    view[:len(rest)] = rest
+    hasher.submit(index, len(rest))
+    index, _ = hasher.acquire()
+    hasher.submit(index, 0)  # an empty submit just returns the buffer
+    hasher.update(DATA[4 * BUFFER:])
+
+    assert hasher.finish() == _expected(DATA, ("md5", "sha256"))
+    assert hasher.bytes_hashed == len(DATA)
+
+
+def test_block_index_built_in_the_same_pass(tmp_path):
+    path = tmp_path / "disk.dd"
+    path.write_bytes(DATA)
+    writer = BlockIndexWriter(str(tmp_path / "pass.blkidx"), block_size=1024)
+    hash_file(str(path), ("md5",), buffer_size=BUFFER, buffer_count=2, block_writer=writer)
+    writer.close()
+    reference = build_block_index(str(path), str(tmp_path / "ref.blkidx"), block_size=1024, workers=2)
+
+    with BlockIndex(writer.path) as streamed, BlockIndex(reference) as built:
+        assert (streamed.block_count, streamed.image_size) == (built.block_count, built.image_size)
+        assert all(streamed.digest(i) == built.digest(i) for i in range(built.block_count))
+
+
+def test_hashing_writer_digests_what_it_writes(tmp_path):
+    path = tmp_path / "upload.dd"
+    writer = HashingWriter(str(path), ("md5", "sha1"), buffer_size=BUFFER, buffer_count=2)
+    for start in range(0, len(DATA), 777):
+        writer.write(DATA[start:start + 777])
+    assert writer.tell() == len(DATA)
+
+    assert writer.finish() == _expected(DATA, ("md5", "sha1"))
+    assert path.read_bytes() == DATA
+
+
+def test_aborted_pass_stops_the_digest_threads():
+    def cancel(done, total):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        hash_stream(_EndlessReader(), ("md5",), progress_callback=cancel, progress_interval=0.001,
+                    buffer_size=BUFFER, buffer_count=2)
+
+
+def test_unsupported_algorithms_are_rejected():
+    with pytest.raises(ValueError):
+        MultiHasher(("md5", "crc32"))
+    with pytest.raises(ValueError):
+        MultiHasher(())
+    assert format_digests({"md5": "ab", "sha256": "cd"}) == "MD5: ab, SHA256: cd"
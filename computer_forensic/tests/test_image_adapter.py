@@ -0,0 +1,125 @@
+import io
+
+import pytest
+
+pytest.importorskip("pytsk3")
+
+from extraction.image_adapter import BlockCache, EWFMediaStream
+
+
+class _FakeEwfHandle:
+    """The part of a pyewf handle the adapters use, over in-memory media."""
+
+    def __init__(self, media):
+        self.media = media
+        self.closed = False
+
+    def get_media_size(self):
+        return len(self.media)
+
+    def read_buffer_at_offset(self, size, offset):
+        return self.media[offset:offset + size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_ewf_media_stream_reads_the_media():
+    media = bytes(range(256)) * 40
+    handle = _FakeEwfHandle(media)
+    stream = EWFMediaStream(handle)
+
+    assert stream.seek(0, io.SEEK_END) == len(media)
+    stream.seek(100)
+    assert stream.read(50) == media[100:150]
+    stream.seek(-10, io.SEEK_END)
+    assert stream.read(100) == media[-10:]
+    assert stream.read(1) == b""
+    stream.close()
+    assert handle.closed
+
+
+BLOCK = 512
+
+
+class _Media:
+    """read_at() over in-memory media that records every underlying read."""
+
+    def __init__(self, size):
+        self.data = bytes((i * 11 + i // 253) % 256 for i in range(size))
+        self.reads = []
+
+    def read_at(self, offset, size):
+        self.reads.append((offset, size))
+        return self.data[offset:offset + size]
+
+
+def _cache(media, **kwargs):
+    return BlockCache(media.read_at, len(media.data), block_size=BLOCK, **kwargs)
+
+
+def test_block_cache_reads_match_the_media():
+    media = _Media(40 * BLOCK + 100)  # partial last block
+    cache = _cache(media, max_bytes=3 * BLOCK, max_readahead=4)
+    requests = [(0, 10), (500, 30), (511, 2), (1024, 3 * BLOCK), (40 * BLOCK - 5, 500), (40 * BLOCK + 99, 1),
+                (len(media.data), 5), (7 * BLOCK + 3, 0)]
+    requests += [((i * 7919) % len(media.data), (i * 389) % 1500) for i in range(300)]
+    requests += [(i, 100) for i in range(0, len(media.data), 100)]  # sequential: readahead kicks in
+
+    for offset, size in requests:
+        assert cache.read(offset, size) == media.data[offset:offset + size]
+    stats = cache.stats()
+    assert stats["hits"] > 0 and stats["misses"] > 0
+    assert stats["cached_bytes"] <= 3 * BLOCK
+
+
+def test_block_cache_evicts_least_recently_used_blocks():
+    media = _Media(16 * BLOCK)
+    cache = _cache(media, max_bytes=3 * BLOCK, max_readahead=1)
+    for block in (0, 2, 4):
+        cache.read(block * BLOCK, 1)
+    cache.read(0, 1)          # hit: block 0 becomes most recently used
+    cache.read(6 * BLOCK, 1)  # evicts block 2, the least recently used
+    media.reads.clear()
+
+    cache.read(0, 1)
+    cache.read(4 * BLOCK, 1)
+    assert media.reads == []
+    cache.read(2 * BLOCK, 1)
+    assert media.reads == [(2 * BLOCK, BLOCK)]
+    assert cache.stats()["cached_bytes"] == 3 * BLOCK
+
+
+def test_block_cache_readahead_grows_on_sequential_misses():
+    media = _Media(64 * BLOCK + 10)
+    cache = _cache(media, max_readahead=8)
+    for offset in range(0, 30 * BLOCK, 100):
+        cache.read(offset, 100)
+    # Each miss continues where the last fetch ended, doubling the fetch up to the window
+    assert media.reads == [(0, BLOCK), (BLOCK, 2 * BLOCK), (3 * BLOCK, 4 * BLOCK), (7 * BLOCK, 8 * BLOCK),
+                           (15 * BLOCK, 8 * BLOCK), (23 * BLOCK, 8 * BLOCK)]
+
+    media.reads.clear()
+    cache.read(50 * BLOCK, 10)    # a jump starts over with a single block
+    cache.read(60 * BLOCK, 10)
+    cache.read(61 * BLOCK, 10)    # sequential again
+    cache.read(63 * BLOCK, 200)   # the fetch is cut at the end of the media
+    assert media.reads == [(50 * BLOCK, BLOCK), (60 * BLOCK, BLOCK), (61 * BLOCK, 2 * BLOCK),
+                           (63 * BLOCK, 2 * BLOCK)]
+    assert cache.read(64 * BLOCK, 100) == media.data[64 * BLOCK:]
+
+
+def test_block_cache_readahead_larger_than_the_cache():
+    media = _Media(32 * BLOCK)
+    cache = _cache(media, max_bytes=2 * BLOCK, max_readahead=8)
+    for offset in range(0, len(media.data), 300):
+        assert cache.read(offset, 300) == media.data[offset:offset + 300]
+    assert cache.stats()["cached_bytes"] <= 2 * BLOCK
+
+
+def test_block_cache_bulk_reads_bypass_the_cache():
+    media = _Media(64 * BLOCK)
+    cache = _cache(media, max_readahead=4)
+    assert cache.read(100, 10 * BLOCK) == media.data[100:100 + 10 * BLOCK]
+    assert media.reads == [(100, 10 * BLOCK)]
+    assert cache.stats()["cached_bytes"] == 0
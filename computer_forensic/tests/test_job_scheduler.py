@@ -0,0 +1,169 @@
+import threading
+import time
+
+import pytest
+
+from backend.job_scheduler import CANCELLED, FINISHED, PAUSED, QUEUED, RUNNING, JobCancelled, JobScheduler
+
+TIMEOUT = 5
+
+
+class _Recorder:
+    """on_state_change callback that keeps every transition and lets tests wait for one."""
+
+    def __init__(self):
+        self.transitions = []
+        self._cond = threading.Condition()
+
+    def __call__(self, job_id, state):
+        with self._cond:
+            self.transitions.append((job_id, state))
+            self._cond.notify_all()
+
+    def wait_for(self, job_id, state, count=1):
+        with self._cond:
+            assert self._cond.wait_for(lambda: self.transitions.count((job_id, state)) >= count, TIMEOUT), \
+                (job_id, state)
+
+    def states(self, job_id):
+        with self._cond:
+            return [s for j, s in self.transitions if j == job_id]
+
+
+@pytest.fixture
+def make_scheduler():
+    schedulers = []
+
+    def make(**kwargs):
+        scheduler = JobScheduler(**kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        if scheduler._threads:
+            scheduler.stop()
+
+
+def _run_in_order(scheduler, jobs):
+    """Submit (job_id, kwargs) pairs before starting one worker; returns the order they ran in."""
+    order = []
+    done = threading.Semaphore(0)
+
+    def job(job_id):
+        order.append(job_id)
+        done.release()
+
+    for job_id, kwargs in jobs:
+        scheduler.submit(job_id, job, job_id, **kwargs)
+    scheduler.start()
+    for _ in jobs:
+        assert done.acquire(timeout=TIMEOUT)
+    return order
+
+
+def test_higher_priority_runs_first(make_scheduler):
+    scheduler = make_scheduler(workers=1)
+    order = _run_in_order(scheduler, [("low", {"priority": 0}), ("high", {"priority": 5}),
+                                      ("mid", {"priority": 1}), ("low2", {"priority": 0})])
+
+    assert order == ["high", "mid", "low", "low2"]
+
+
+def test_examiners_take_turns(make_scheduler):
+    jobs = ([(f"alice{i}", {"examiner": "alice"}) for i in range(3)]
+            + [(f"bob{i}", {"examiner": "bob"}) for i in range(2)])
+    waiting = make_scheduler(workers=1)
+    for job_id, kwargs in jobs:
+        waiting.submit(job_id, lambda: None, **kwargs)
+    positions = {job_id: waiting.queue_position(job_id) for job_id, _ in jobs}
+
+    order = _run_in_order(make_scheduler(workers=1), jobs)
+
+    assert order == ["alice0", "bob0", "alice1", "bob1", "alice2"]
+    assert sorted(positions, key=positions.get) == order
+
+
+def test_one_job_per_device_at_a_time(make_scheduler):
+    recorder = _Recorder()
+    scheduler = make_scheduler(workers=3, on_state_change=recorder).start()
+    release = threading.Event()
+    scheduler.submit("a1", release.wait, device="disk-a")
+    scheduler.submit("a2", release.wait, device="disk-a")
+    scheduler.submit("b1", release.wait, device="disk-b")
+
+    recorder.wait_for("a1", RUNNING)
+    recorder.wait_for("b1", RUNNING)
+    time.sleep(0.05)
+    assert recorder.states("a2") == []
+    assert scheduler.stats()["busy_devices"] == 2
+    release.set()
+    recorder.wait_for("a2", FINISHED)
+
+
+def test_pause_resume_and_cancel_through_checkpoint(make_scheduler):
+    recorder = _Recorder()
+    scheduler = make_scheduler(workers=2, on_state_change=recorder).start()
+    stop = threading.Event()
+    outcome = {}
+
+    def job(job_id):
+        try:
+            while not stop.is_set():
+                scheduler.checkpoint(job_id)
+                time.sleep(0.005)
+        except JobCancelled:
+            outcome[job_id] = "cancelled"
+            raise
+
+    scheduler.submit("long", job, "long", device="disk")
+    recorder.wait_for("long", RUNNING)
+
+    assert scheduler.pause("long")
+    recorder.wait_for("long", PAUSED)
+    # The paused job gave its device back
+    other = threading.Event()
+    scheduler.submit("other", other.set, device="disk")
+    assert other.wait(TIMEOUT)
+
+    assert scheduler.resume("long")
+    recorder.wait_for("long", RUNNING, count=2)
+
+    assert scheduler.cancel("long")
+    recorder.wait_for("long", CANCELLED)
+    assert outcome == {"long": "cancelled"}
+    assert recorder.states("long") == [RUNNING, PAUSED, RUNNING, CANCELLED]
+    assert not scheduler.cancel("long")
+
+
+def test_queued_job_pause_resume_and_cancel(make_scheduler):
+    recorder = _Recorder()
+    scheduler = make_scheduler(workers=1, on_state_change=recorder)
+    scheduler.submit("job", lambda: None)
+
+    assert scheduler.pause("job")
+    assert scheduler.queue_position("job") is None
+    assert scheduler.resume("job")
+    assert scheduler.queue_position("job") == 1
+    assert scheduler.cancel("job")
+    assert recorder.states("job") == [PAUSED, QUEUED, CANCELLED]
+
+
+def test_state_callback_runs_outside_the_lock(make_scheduler):
+    answered = []
+
+    def on_state_change(job_id, state):
+        # Another thread needs the scheduler lock; it would wait forever if the lock were still held
+        t = threading.Thread(target=scheduler.stats, daemon=True)
+        t.start()
+        t.join(1)
+        answered.append((state, not t.is_alive()))
+
+    scheduler = make_scheduler(workers=1, on_state_change=on_state_change)
+    done = threading.Event()
+    scheduler.submit("job", done.set)
+    scheduler.start()
+    assert done.wait(TIMEOUT)
+    scheduler.stop()
+
+    assert answered == [(RUNNING, True), (FINISHED, True)]
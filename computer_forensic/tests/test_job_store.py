@@ -0,0 +1,137 @@
+import sqlite3
+
+import pytest
+
+from backend import job_store
+from backend.job_store import ExtractionJob, JobStore
+from backend.plot_cache import PlotCache
+
+
+class _Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(job_store, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+
+def _job(store, job_id, status, **params):
+    job = ExtractionJob(job_id, f"{job_id}.dd", params)
+    job.created = job_store.time.time()
+    store.add(job)
+    job.status = status
+    store.save(job)
+    return job
+
+
+def _row(db_path, job_id):
+    with sqlite3.connect(db_path) as db:
+        return db.execute("SELECT status, progress, message FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+
+
+def test_finished_jobs_expire_after_ttl(db_path, clock):
+    store = JobStore(db_path, ttl=100)
+    _job(store, "old", "completed")
+    store.save_features("old", {"total_files": 1})
+    _job(store, "running", "processing")
+    clock.now += 50
+    _job(store, "recent", "error")
+    clock.now += 60
+
+    assert store.evict_expired() == 1
+    assert store.get("old") is None
+    assert store.features("old") is None
+    assert store.get("recent").status == "error"
+    assert store.get("running").status == "processing"  # unfinished jobs never expire
+    store.close()
+    # The deletion is on disk, not just in memory
+    assert JobStore(db_path, ttl=10 ** 9).get("old") is None
+
+
+def test_eviction_drops_cached_plots(db_path, clock):
+    plots = PlotCache()
+    store = JobStore(db_path, ttl=100, on_evict=plots.discard)
+    for job_id in ("old", "new"):
+        _job(store, job_id, "completed")
+        plots.get(job_id, "pie", lambda: {"file_types": {"txt": 1}})
+        clock.now += 60
+
+    assert store.evict_expired() == 1
+    assert plots.peek("old", "pie") is None
+    assert plots.peek("new", "pie") is not None
+
+
+def test_expired_jobs_are_swept_when_a_store_opens(db_path, clock):
+    store = JobStore(db_path, ttl=100)
+    _job(store, "old", "cancelled")
+    store.close()
+    clock.now += 101
+
+    assert JobStore(db_path, ttl=100).get("old") is None
+
+
+def test_finished_jobs_are_demoted_to_a_bounded_lru(db_path, clock):
+    store = JobStore(db_path, hot_size=2)
+    jobs = [_job(store, f"job{i}", "completed") for i in range(3)]
+
+    assert list(store._active) == []
+    assert list(store._hot) == ["job1", "job2"]
+    # Dropped from memory, still loaded from disk by key
+    reloaded = store.get("job0")
+    assert reloaded is not jobs[0]
+    assert (reloaded.job_id, reloaded.status, reloaded.filename) == ("job0", "completed", "job0.dd")
+    assert list(store._hot) == ["job2", "job0"]
+    store.get("job2")
+    assert list(store._hot) == ["job0", "job2"]
+
+
+def test_recover_requeues_unfinished_jobs_oldest_first(db_path, clock):
+    store = JobStore(db_path)
+    _job(store, "done", "completed")
+    clock.now += 1
+    second = _job(store, "second", "processing", examiner="bob")
+    second.progress = 60
+    store.save(second, force=True)
+    clock.now -= 10
+    _job(store, "first", "queued", examiner="alice")
+    store.close()
+
+    store = JobStore(db_path)
+    recovered = store.recover()
+
+    assert [job.job_id for job in recovered] == ["first", "second"]
+    assert all(job.status == "queued" and job.progress == 0 for job in recovered)
+    assert recovered[1].params == {"examiner": "bob"}
+    assert _row(db_path, "second")[:2] == ("queued", 0)
+    assert store.get("second") is recovered[1]
+    assert store.recover() == []  # already active in this process
+
+
+def test_only_status_changes_are_persisted(db_path, clock):
+    store = JobStore(db_path)
+    job = _job(store, "job", "processing")
+    job.progress = 40
+    job.message = "Hashing..."
+    store.save(job)
+
+    assert _row(db_path, "job") == ("processing", 0, "Uploading file...")
+
+    job.status = "paused"
+    store.save(job)
+    assert _row(db_path, "job") == ("paused", 40, "Hashing...")
+
+    job.progress = 45
+    store.save(job, force=True)
+    assert _row(db_path, "job")[1] == 45
@@ -0,0 +1,69 @@
+import hashlib
+
+import pytest
+
+from utils import known_hashes
+from utils.known_hashes import KnownHashSet, build_known_hash_set
+
+
+def _md5(i):
+    return hashlib.md5(f"file-{i}".encode()).digest()
+
+
+@pytest.fixture(params=["numpy", "pure"])
+def known_set(request, tmp_path, monkeypatch):
+    if request.param == "pure":
+        monkeypatch.setattr(known_hashes, "np", None)
+    elif known_hashes.np is None:
+        pytest.skip("numpy is not installed")
+
+    nsrl = tmp_path / "NSRLFile.txt"
+    rows = ['"SHA-1","MD5","CRC32","FileName"']
+    rows += [f'"{"0" * 40}","{_md5(i).hex().upper()}","00000000","f{i}"' for i in range(300)]
+    rows.append('"short","abc","0","broken row"')
+    nsrl.write_text("\n".join(rows) + "\n")
+    plain = tmp_path / "extra.txt"
+    plain.write_text("".join(f"{_md5(i).hex()}  dup-or-new\n" for i in range(250, 400)) + "not-a-digest\n")
+
+    path = str(tmp_path / "known.khs")
+    # Small runs force the external merge across several spilled runs
+    count = build_known_hash_set([str(nsrl), str(plain)], path, run_entries=64)
+    assert count == 400
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["NSRLFile.txt", "extra.txt", "known.khs"]
+    with KnownHashSet(path) as known:
+        yield known
+
+
+def test_built_set_contains_every_digest(known_set):
+    assert (len(known_set), known_set.algorithm, known_set.digest_size) == (400, "md5", 16)
+    assert all(_md5(i) in known_set for i in range(400))
+    assert _md5(7).hex() in known_set
+    assert _md5(7).hex().upper() in known_set
+    assert _md5(400) not in known_set
+    assert b"\x00" * 20 not in known_set  # wrong digest length
+
+
+def test_bloom_miss_skips_the_search(known_set, monkeypatch):
+    unknown = [_md5(i) for i in range(1000, 2000)]
+    misses = [d for d in unknown if not known_set._bloom_check(d)]
+    # ~1% false positives: almost every unknown digest is rejected by the filter alone
+    assert len(misses) > 950
+
+    def search(digest):
+        raise AssertionError("binary search reached for a Bloom filter miss")
+
+    monkeypatch.setattr(known_set, "_search", search)
+    assert all(d not in known_set for d in misses)
+
+
+def test_bloom_false_positive_is_settled_by_the_search(known_set):
+    false_positives = [d for d in (_md5(i) for i in range(1000, 3000)) if known_set._bloom_check(d)]
+    assert false_positives
+    assert all(not known_set._search(d) and d not in known_set for d in false_positives)
+
+
+def test_non_set_file_is_rejected(tmp_path):
+    path = tmp_path / "bogus.khs"
+    path.write_bytes(b"NOTKNOWN" + b"\0" * 64)
+    with pytest.raises(ValueError):
+        KnownHashSet(str(path))
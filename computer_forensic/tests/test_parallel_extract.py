@@ -0,0 +1,33 @@
+import pytest
+
+pytsk3 = pytest.importorskip("pytsk3")
+
+from extraction.fs_walker import walk_filesystem
+from extraction.parallel_extract import iter_records_parallel
+from tests.ntfs_image import NtfsImage
+
+
+@pytest.fixture(scope="module")
+def image_path(tmp_path_factory):
+    image = NtfsImage()
+    docs = image.add_file("Docs", is_dir=True)
+    for i in range(20):
+        image.add_file(f"file{i:02d}.txt", docs, size=i)
+    path = tmp_path_factory.mktemp("parallel") / "volume.img"
+    image.build(str(path))
+    return str(path)
+
+
+def test_workers_return_every_record(image_path):
+    walk = {(r["path"], r["inode"]) for r in walk_filesystem(pytsk3.FS_Info(pytsk3.Img_Info(image_path)))}
+    records = list(iter_records_parallel(image_path, workers=2, batch_size=4))
+
+    assert {(r["path"], r["inode"]) for r in records} == walk
+    assert all(r["partition_offset"] == 0 for r in records)
+
+
+def test_worker_setup_failure_ends_the_stream(image_path, tmp_path, capsys):
+    missing = str(tmp_path / "missing.khs")
+
+    assert list(iter_records_parallel(image_path, workers=2, known_hashes=missing)) == []
+    assert "could not open" in capsys.readouterr().out
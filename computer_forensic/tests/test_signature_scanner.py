@@ -0,0 +1,51 @@
+import io
+import random
+
+import pytest
+
+from extraction.signature_scanner import SignatureScanner, scan_image
+
+SIGNATURES = {b"LONGSIGNATURE": "long", b"AT": "short"}  # "AT" also occurs inside the long one
+
+
+def test_hits_crossing_a_block_boundary_stay_in_offset_order():
+    data = bytearray(64)
+    data[6:19] = b"LONGSIGNATURE"  # starts in the first 16-byte block, ends in the second;
+    data[30:32] = b"AT"            # its "AT" (14-15) lies entirely in the first block
+    scanner = SignatureScanner(SIGNATURES, block_size=16)
+
+    hits = list(scanner.scan_file(io.BytesIO(bytes(data)), [(0, len(data))]))
+
+    assert hits == [(6, "long"), (14, "short"), (30, "short")]
+
+
+@pytest.mark.parametrize("block_size", [7, 16, 1000])
+def test_scan_finds_every_hit_once_in_order(tmp_path, block_size):
+    rng = random.Random(3)
+    data = bytearray(rng.randbytes(5000).replace(b"A", b"a"))
+    expected = []
+    for offset in sorted(rng.sample(range(0, 4980, 20), 60)):
+        sig = rng.choice(list(SIGNATURES))
+        data[offset:offset + len(sig)] = sig
+        expected.append((offset, SIGNATURES[sig]))
+        if sig == b"LONGSIGNATURE":
+            expected.append((offset + 8, "short"))
+    image = tmp_path / "image.dd"
+    image.write_bytes(bytes(data))
+
+    assert list(SignatureScanner(SIGNATURES, block_size).scan(str(image))) == expected
+
+
+def test_scan_image_splits_work_without_duplicates(tmp_path):
+    data = bytearray(4096)
+    for offset in (0, 1000, 2040, 2060, 4000):  # 2040: crosses the 2048 piece boundary
+        data[offset:offset + 13] = b"LONGSIGNATURE"
+    image = tmp_path / "image.dd"
+    image.write_bytes(bytes(data))
+    ranges = [(0, 2048), (2048, 4096)]
+
+    signatures = {b"LONGSIGNATURE": "long"}
+    serial = list(scan_image(str(image), ranges, signatures, block_size=64))
+    parallel = list(scan_image(str(image), ranges, signatures, block_size=64, workers=2))
+
+    assert serial == parallel == [(offset, "long") for offset in (0, 1000, 2040, 2060, 4000)]
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from extraction import split_raw
+from extraction.split_raw import SplitRawImage, image_size, open_raw, segment_paths
+
+SEGMENT_SIZES = [1000, 10, 1500, 700]
+
+
+@pytest.fixture
+def split_set(tmp_path):
+    data = bytes((i * 13 + i // 211) % 256 for i in range(sum(SEGMENT_SIZES)))
+    pos = 0
+    for number, size in enumerate(SEGMENT_SIZES, start=1):
+        (tmp_path / f"disk.{number:03d}").write_bytes(data[pos:pos + size])
+        pos += size
+    return str(tmp_path / "disk.001"), data
+
+
+def test_segments_are_found_in_order(split_set, tmp_path):
+    path, data = split_set
+    assert segment_paths(str(tmp_path / "disk.003")) == [str(tmp_path / f"disk.{n:03d}") for n in range(1, 5)]
+    assert image_size(path) == len(data)
+    with pytest.raises(FileNotFoundError):
+        segment_paths(str(tmp_path / "missing.001"))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_reads_cross_segment_boundaries(split_set, monkeypatch, workers):
+    path, data = split_set
+    monkeypatch.setattr(split_raw, "PARALLEL_MIN_PIECE", 64)  # let the pool split small reads
+
+    with SplitRawImage(path, workers=workers) as image:
+        assert len(image) == len(data)
+        for offset, size in [(0, 1000), (990, 30), (995, 1000), (1005, 3), (0, len(data)),
+                             (2500, 500), (len(data) - 5, 100), (len(data), 10)]:
+            assert image.read(offset, size) == data[offset:offset + size]
+            buf = bytearray(size)
+            n = image.readinto(offset, buf)
+            assert bytes(buf[:n]) == data[offset:offset + size]
+
+
+def test_stream_reads_the_whole_set(split_set):
+    path, data = split_set
+    with open_raw(path) as f:
+        assert f.read() == data
+        f.seek(-700, os.SEEK_END)
+        assert f.read(800) == data[-700:]
+        f.seek(995)
+        assert f.read(20) == data[995:1015]
+
+
+@pytest.mark.parametrize("preadv", [True, False])
+def test_short_positional_reads_are_completed(split_set, monkeypatch, preadv):
+    path, data = split_set
+    calls = []
+    if preadv:
+        real_preadv = os.preadv
+
+        def short_preadv(fd, buffers, offset):
+            calls.append(offset)
+            return real_preadv(fd, [buffers[0][:77]], offset)
+
+        monkeypatch.setattr(os, "preadv", short_preadv)
+    else:
+        monkeypatch.delattr(os, "preadv", raising=False)
+        real_pread = os.pread
+
+        def short_pread(fd, size, offset):
+            calls.append(offset)
+            return real_pread(fd, min(size, 77), offset)
+
+        monkeypatch.setattr(os, "pread", short_pread)
+
+    with SplitRawImage(path) as image:
+        buf = bytearray(2000)
+        assert image.readinto(500, buf) == 2000
+        assert bytes(buf) == data[500:2500]
+        # Near the end a short read is EOF, not an error
+        assert image.readinto(len(data) - 100, buf) == 100
+        assert bytes(buf[:100]) == data[-100:]
+    assert len(calls) > 2000 // 77
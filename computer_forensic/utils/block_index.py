@@ -0,0 +1,268 @@
+"""
+Piecewise block-hash index ("sidecar") for disk images.
+
+Layout of a .blkidx file (little endian):
+    header   magic "FBLKIDX1", version, digest size, block size, image size,
+             block count, algorithm name (16 bytes, NUL padded)
+    digests  block_count * digest_size bytes, block i at HEADER_SIZE + i * digest_size
+
+The digest array is fixed-width, so the file can be memory-mapped and any
+block's digest located without parsing.
+"""
+import hashlib
+import mmap
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+MAGIC = b"FBLKIDX1"
+VERSION = 1
+HEADER_FORMAT = "<8sHHIQQ16s"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+DEFAULT_BLOCK_SIZE = 1024 * 1024  # 1MB
+DEFAULT_BLOCK_ALGORITHM = "sha256"
+SIDECAR_SUFFIX = ".blkidx"
+
+
+def sidecar_path(image_path):
+    return image_path + SIDECAR_SUFFIX
+
+
+def _default_workers():
+    return os.cpu_count() or 1
+
+
+class BlockIndexWriter:
+    """Appends per-block digests to a sidecar file; the header is finalized on close()."""
+
+    def __init__(self, path, block_size=DEFAULT_BLOCK_SIZE, algorithm=DEFAULT_BLOCK_ALGORITHM):
+        self.path = path
+        self.block_size = block_size
+        self.algorithm = algorithm
+        self.digest_size = hashlib.new(algorithm).digest_size
+        self.block_count = 0
+        self.image_size = 0
+        self._file = open(path, "wb")
+        self._file.write(b"\0" * HEADER_SIZE)
+
+    def add_blocks(self, data):
+        """Hash `data` (a whole number of blocks, except for the final call) block by block."""
+        view = memoryview(data)
+        digests = bytearray()
+        for start in range(0, len(view), self.block_size):
+            block = view[start:start + self.block_size]
+            digests += hashlib.new(self.algorithm, block).digest()
+            self.block_count += 1
+            self.image_size += len(block)
+        self._file.write(digests)
+
+    def add_digests(self, digests, image_size):
+        """Write a precomputed digest array covering `image_size` bytes."""
+        self._file.write(digests)
+        self.block_count += len(digests) // self.digest_size
+        self.image_size += image_size
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(struct.pack(
+            HEADER_FORMAT, MAGIC, VERSION, self.digest_size, self.block_size,
+            self.image_size, self.block_count, self.algorithm.encode()
+        ))
+        self._file.close()
+
+
+class BlockIndex:
+    """Read-only, memory-mapped view of a sidecar file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise ValueError(f"Not a block index: {path}")
+            magic, version, self.digest_size, self.block_size, self.image_size, self.block_count, algorithm = \
+                struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a block index (or unsupported version): {path}")
+            self.algorithm = algorithm.rstrip(b"\0").decode()
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.block_count else None
+        if self._mmap is not None:
+            self._digests = memoryview(self._mmap)[HEADER_SIZE:HEADER_SIZE + self.block_count * self.digest_size]
+        else:
+            self._digests = memoryview(b"")
+
+    def __len__(self):
+        return self.block_count
+
+    def digest(self, block):
+        start = block * self.digest_size
+        return self._digests[start:start + self.digest_size]
+
+    def block_range(self, offset, length):
+        """Block numbers [first, last) covering the byte range."""
+        first = offset // self.block_size
+        last = min(self.block_count, -(-(offset + length) // self.block_size))
+        return first, last
+
+    def close(self):
+        self._digests.release()
+        if self._mmap is not None:
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _hash_block_range(fd, first, last, base, block_size, algorithm, out):
+    """Hash blocks [first, last) of an open file into `out`, block i at (i - base) * digest_size."""
+    digest_size = hashlib.new(algorithm).digest_size
+    for block in range(first, last):
+        data = os.pread(fd, block_size, block * block_size)
+        pos = (block - base) * digest_size
+        out[pos:pos + digest_size] = hashlib.new(algorithm, data).digest()
+
+
+def _split(first, last, parts):
+    """Split [first, last) into at most `parts` contiguous ranges."""
+    count = last - first
+    parts = max(1, min(parts, count))
+    step = -(-count // parts) if count else 0
+    return [(s, min(s + step, last)) for s in range(first, last, step)] if step else []
+
+
+def _hash_blocks_parallel(image_path, first, last, block_size, algorithm, workers):
+    """Return a bytearray of digests for blocks [first, last), hashed across `workers` threads."""
+    out = bytearray((last - first) * hashlib.new(algorithm).digest_size)
+    out_view = memoryview(out)
+    fd = os.open(image_path, os.O_RDONLY)
+    try:
+        # hashlib releases the GIL, so threads hash disjoint block ranges in parallel
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_hash_block_range, fd, start, end, first, block_size, algorithm, out_view)
+                       for start, end in _split(first, last, workers * 4)]
+            for future in futures:
+                future.result()
+    finally:
+        os.close(fd)
+    return out
+
+
+def build_block_index(image_path, index_path=None, block_size=DEFAULT_BLOCK_SIZE,
+                      algorithm=DEFAULT_BLOCK_ALGORITHM, workers=None):
+    """
+    Hash every block of an image in parallel and write the sidecar.
+
+    Returns the path of the sidecar file.
+    """
+    index_path = index_path or sidecar_path(image_path)
+    size = os.path.getsize(image_path)
+    block_count = -(-size // block_size)
+    digests = _hash_blocks_parallel(image_path, 0, block_count, block_size, algorithm,
+                                    workers or _default_workers())
+
+    writer = BlockIndexWriter(index_path, block_size, algorithm)
+    writer.add_digests(digests, size)
+    writer.close()
+    return index_path
+
+
+def is_current(image_path, index_path=None, image_size=None):
+    """
+    True if the sidecar exists, matches the image size and is newer than the image.
+    `image_size` overrides the file size (e.g. the total size of a split raw set).
+    """
+    index_path = index_path or sidecar_path(image_path)
+    if not os.path.exists(index_path):
+        return False
+    try:
+        with BlockIndex(index_path) as index:
+            if index.image_size != (os.path.getsize(image_path) if image_size is None else image_size):
+                return False
+    except ValueError:
+        return False
+    return os.path.getmtime(index_path) >= os.path.getmtime(image_path)
+
+
+def _coalesce(blocks, block_size, limit):
+    """Turn sorted block numbers into [(offset, length)] byte regions, clipped to `limit`."""
+    regions = []
+    for block in blocks:
+        offset = block * block_size
+        length = min(block_size, limit - offset)
+        if regions and regions[-1][0] + regions[-1][1] == offset:
+            regions[-1] = (regions[-1][0], regions[-1][1] + length)
+        else:
+            regions.append((offset, length))
+    return regions
+
+
+def _merge(regions):
+    """Union of (offset, length) regions, sorted, with overlapping or touching ones joined."""
+    merged = []
+    for offset, length in sorted(r for r in regions if r[1] > 0):
+        if merged and offset <= merged[-1][0] + merged[-1][1]:
+            end = max(merged[-1][0] + merged[-1][1], offset + length)
+            merged[-1] = (merged[-1][0], end - merged[-1][0])
+        else:
+            merged.append((offset, length))
+    return merged
+
+
+def verify_range(image_path, offset=0, length=None, index_path=None, workers=None):
+    """
+    Re-hash the blocks covering [offset, offset + length) and compare with the sidecar.
+
+    Returns a list of (offset, length) regions whose contents no longer match.
+    """
+    index_path = index_path or sidecar_path(image_path)
+    with BlockIndex(index_path) as index:
+        if length is None:
+            length = index.image_size - offset
+        first, last = index.block_range(offset, length)
+        digests = _hash_blocks_parallel(image_path, first, last, index.block_size, index.algorithm,
+                                        workers or _default_workers())
+        size = index.digest_size
+        bad = [first + i for i in range(last - first)
+               if digests[i * size:(i + 1) * size] != index.digest(first + i)]
+        regions = _coalesce(bad, index.block_size, index.image_size)
+
+        # Bytes the image gained or lost since it was indexed; the partial last block
+        # is usually reported by its digest as well, so the regions are merged
+        current_size = os.path.getsize(image_path)
+        changed_from = min(current_size, index.image_size)
+        if current_size != index.image_size and offset + length > changed_from:
+            regions.append((changed_from, abs(current_size - index.image_size)))
+        return _merge(regions)
+
+
+def diff_indexes(index_path_a, index_path_b):
+    """
+    Compare two sidecars (e.g. two acquisitions of the same drive).
+
+    Returns a list of (offset, length) regions that differ, including any
+    size difference at the end.
+    """
+    with BlockIndex(index_path_a) as a, BlockIndex(index_path_b) as b:
+        if a.block_size != b.block_size or a.algorithm != b.algorithm:
+            raise ValueError("Block indexes use different block sizes or algorithms")
+        common = min(a.block_count, b.block_count)
+        size = a.digest_size
+        # Compare in large slices first and only drill into slices that differ
+        step = 4096
+        bad = []
+        for start in range(0, common, step):
+            end = min(start + step, common)
+            if a._digests[start * size:end * size] == b._digests[start * size:end * size]:
+                continue
+            bad.extend(i for i in range(start, end) if a.digest(i) != b.digest(i))
+        limit = min(a.image_size, b.image_size)
+        regions = _coalesce(bad, a.block_size, limit)
+        if a.image_size != b.image_size:
+            regions.append((limit, abs(a.image_size - b.image_size)))
+        return _merge(regions)
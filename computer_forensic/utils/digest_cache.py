@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.environ.get("FORENSIC_DIGEST_CACHE", os.path.join("cache", "digest_cache.sqlite"))
+DEFAULT_MAX_ENTRIES = 10000
+
+# Sampled-block fingerprint: a few small reads spread over the file catch
+# in-place modifications that keep the size and mtime unchanged
+SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_BLOCKS = 16
+
+
+def sample_fingerprint(path, size=None, block_size=SAMPLE_BLOCK_SIZE, blocks=SAMPLE_BLOCKS):
+    """SHA256 over the file size and `blocks` evenly spaced blocks (first and last included)."""
+    if size is None:
+        size = os.path.getsize(path)
+    h = hashlib.sha256(str(size).encode())
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if size <= block_size * blocks:
+            offsets = range(0, size, block_size)
+        else:
+            # The last block ends exactly at the end of the file
+            offsets = [(size - block_size) * i // (blocks - 1) for i in range(blocks)]
+        for offset in offsets:
+            h.update(os.pread(fd, block_size, offset))
+    finally:
+        os.close(fd)
+    return h.hexdigest()
+
+
+def file_identity(path, sample=True):
+    """Return the cache key (device, inode, size, mtime_ns, fingerprint) of a file."""
+    st = os.stat(path)
+    fingerprint = sample_fingerprint(path, st.st_size) if sample else ""
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, fingerprint)
+
+
+def set_identity(paths, sample=True):
+    """
+    Cache key for a multi-file image (split raw segments): the first segment's
+    device and inode, the total size, the newest mtime, and a fingerprint over
+    every segment's identity.
+    """
+    identities = [file_identity(p, sample=False) for p in paths]
+    h = hashlib.sha256()
+    for dev, ino, size, mtime_ns, _ in identities:
+        h.update(f"{dev}:{ino}:{size}:{mtime_ns};".encode())
+    if sample:
+        # Sample the first and last segments; the rest are covered by size and mtime
+        for p in {paths[0], paths[-1]}:
+            h.update(sample_fingerprint(p).encode())
+    dev, ino = identities[0][:2]
+    return (dev, ino, sum(i[2] for i in identities), max(i[3] for i in identities), h.hexdigest())
+
+
+class DigestCache:
+    """
+    On-disk cache of whole-file digests keyed by file identity.
+
+    Entries are evicted least-recently-used once more than `max_entries`
+    files are cached. Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS digests (
+                    dev INTEGER,
+                    ino INTEGER,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    fingerprint TEXT,
+                    digests TEXT,
+                    last_used REAL,
+                    PRIMARY KEY (dev, ino, size, mtime_ns, fingerprint)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, identity, algorithms):
+        """Return {algorithm: hexdigest} if every algorithm is cached for this identity, else None."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT digests FROM digests WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND fingerprint=?",
+                identity
+            ).fetchone()
+            if row is None:
+                return None
+            cached = json.loads(row[0])
+            if not all(a in cached for a in algorithms):
+                return None
+            conn.execute(
+                "UPDATE digests SET last_used=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND fingerprint=?",
+                (time.time(),) + tuple(identity)
+            )
+            conn.commit()
+            return {a: cached[a] for a in algorithms}
+
+    def put(self, identity, digests):
+        """Store digests for this identity, merged with any algorithms already cached."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT digests FROM digests WHERE dev=? AND ino=? AND size=? AND mtime_ns=? AND fingerprint=?",
+                identity
+            ).fetchone()
+            merged = json.loads(row[0]) if row else {}
+            merged.update(digests)
+            conn.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                tuple(identity) + (json.dumps(merged), time.time())
+            )
+            conn.execute(
+                "DELETE FROM digests WHERE rowid IN "
+                "(SELECT rowid FROM digests ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            conn.commit()
+
+    def invalidate(self, path):
+        """Drop every cached entry for the file at `path` (any mtime/size)."""
+        st = os.stat(path)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM digests WHERE dev=? AND ino=?", (st.st_dev, st.st_ino))
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Process-wide cache at DEFAULT_CACHE_PATH, created on first use."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DigestCache()
+    return _default_cache
@@ -0,0 +1,298 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+
+from utils.helper import read_full
+
+SUPPORTED_ALGORITHMS = ("md5", "sha1", "sha256")
+DEFAULT_ALGORITHMS = ("md5", "sha256")
+
+DEFAULT_BUFFER_SIZE = 8 * 1024 * 1024  # 8MB per buffer
+DEFAULT_BUFFER_COUNT = 4               # buffers in flight between reader and digests
+DEFAULT_PROGRESS_INTERVAL = 0.5        # seconds between progress callbacks
+
+_STOP = None
+
+
+class MultiHasher:
+    """
+    Computes several digests over one byte stream in a single pass.
+
+    A fixed pool of preallocated buffers is shared between the producer
+    (whoever fills them) and one digest thread per algorithm. hashlib releases
+    the GIL on large updates, so the digests run in parallel with each other
+    and with the producer's I/O.
+
+    Usage:
+        hasher = MultiHasher(("md5", "sha256"))
+        hasher.start()
+        index, view = hasher.acquire()
+        n = f.readinto(view)
+        hasher.submit(index, n)
+        ...
+        digests = hasher.finish()
+    """
+
+    def __init__(self, algorithms=DEFAULT_ALGORITHMS, buffer_size=DEFAULT_BUFFER_SIZE,
+                 buffer_count=DEFAULT_BUFFER_COUNT, block_writer=None):
+        algorithms = tuple(a.lower() for a in algorithms)
+        unsupported = [a for a in algorithms if a not in SUPPORTED_ALGORITHMS]
+        if unsupported:
+            raise ValueError(f"Unsupported hash algorithm(s): {', '.join(unsupported)}")
+        if not algorithms:
+            raise ValueError("At least one hash algorithm is required")
+        if block_writer is not None and buffer_size % block_writer.block_size:
+            raise ValueError("Buffer size must be a multiple of the block index block size")
+
+        self.algorithms = algorithms
+        self.buffer_size = buffer_size
+        self.bytes_hashed = 0
+
+        self._buffers = [bytearray(buffer_size) for _ in range(buffer_count)]
+        self._views = [memoryview(b) for b in self._buffers]
+        self._free = queue.Queue()
+        for i in range(buffer_count):
+            self._free.put(i)
+
+        self._pending = [0] * buffer_count
+        self._lock = threading.Lock()
+        self._hashes = {a: hashlib.new(a) for a in algorithms}
+        self._block_writer = block_writer
+        # One consumer thread per digest, plus one for the per-block index if requested
+        self._consumers = algorithms + (("blocks",) if block_writer is not None else ())
+        self._queues = {c: queue.Queue() for c in self._consumers}
+        self._threads = []
+        self._error = None
+
+    def start(self):
+        for consumer in self._consumers:
+            t = threading.Thread(target=self._digest_worker, args=(consumer,), daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def acquire(self):
+        """Block until a buffer is free and return (index, writable memoryview)."""
+        index = self._free.get()
+        return index, self._views[index]
+
+    def release(self, index):
+        """Return a buffer that was acquired but not submitted."""
+        self._free.put(index)
+
+    def submit(self, index, length):
+        """Hand the first `length` bytes of buffer `index` to every digest thread."""
+        if length <= 0:
+            self.release(index)
+            return
+        self._pending[index] = len(self._consumers)
+        for q in self._queues.values():
+            q.put((index, length))
+        self.bytes_hashed += length
+
+    def update(self, data):
+        """Copy `data` into pooled buffers and hash it (for callers that don't own a buffer)."""
+        view = memoryview(data)
+        while view:
+            index, buf = self.acquire()
+            n = min(len(view), self.buffer_size)
+            buf[:n] = view[:n]
+            self.submit(index, n)
+            view = view[n:]
+
+    def finish(self):
+        """Wait for all submitted data to be hashed and return {algorithm: hexdigest}."""
+        for q in self._queues.values():
+            q.put(_STOP)
+        for t in self._threads:
+            t.join()
+        if self._error is not None:
+            raise self._error
+        return {a: h.hexdigest() for a, h in self._hashes.items()}
+
+    def _digest_worker(self, consumer):
+        update = self._block_writer.add_blocks if consumer == "blocks" else self._hashes[consumer].update
+        q = self._queues[consumer]
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+            index, length = item
+            try:
+                update(self._views[index][:length])
+            except Exception as e:
+                self._error = e
+            with self._lock:
+                self._pending[index] -= 1
+                done = self._pending[index] == 0
+            if done:
+                self._free.put(index)
+
+
+class HashingWriter:
+    """
+    Writable file object that stores data on disk and digests it as it arrives.
+
+    Small writes (e.g. from a multipart parser) are coalesced into the hasher's
+    large buffers; each full buffer is written to disk and handed to the digest
+    threads, so the data never has to be read back to be hashed.
+
+    If the file is closed without being moved away from `path`, it is removed.
+    """
+
+    def __init__(self, path, algorithms=DEFAULT_ALGORITHMS, buffer_size=DEFAULT_BUFFER_SIZE,
+                 buffer_count=DEFAULT_BUFFER_COUNT):
+        self.path = path
+        self.digests = None
+        self._file = open(path, "wb")
+        self._hasher = MultiHasher(algorithms, buffer_size, buffer_count).start()
+        self._index, self._view = self._hasher.acquire()
+        self._fill = 0
+
+    @property
+    def bytes_written(self):
+        return self._hasher.bytes_hashed + self._fill
+
+    def write(self, data):
+        view = memoryview(data).cast("B")
+        written = len(view)
+        while view:
+            n = min(len(view), len(self._view) - self._fill)
+            self._view[self._fill:self._fill + n] = view[:n]
+            self._fill += n
+            view = view[n:]
+            if self._fill == len(self._view):
+                self._flush_block()
+        return written
+
+    def _flush_block(self):
+        if not self._fill:
+            return
+        self._file.write(self._view[:self._fill])
+        self._hasher.submit(self._index, self._fill)
+        self._index, self._view = self._hasher.acquire()
+        self._fill = 0
+
+    def flush(self):
+        self._flush_block()
+        self._file.flush()
+
+    def seek(self, offset, whence=0):
+        # The form parser rewinds the container once the part is complete
+        self.flush()
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self.bytes_written
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return False
+
+    def writable(self):
+        return self.digests is None
+
+    def finish(self):
+        """Flush remaining data, close the file and return {algorithm: hexdigest}."""
+        if self.digests is None:
+            self._flush_block()
+            self._hasher.release(self._index)
+            self._file.close()
+            self.digests = self._hasher.finish()
+        return self.digests
+
+    def close(self):
+        self.finish()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+
+def hash_stream(f, algorithms=DEFAULT_ALGORITHMS, total_size=None, progress_callback=None,
+                progress_interval=DEFAULT_PROGRESS_INTERVAL, buffer_size=DEFAULT_BUFFER_SIZE,
+                buffer_count=DEFAULT_BUFFER_COUNT, block_writer=None):
+    """
+    Hash a binary file object with a reader thread running ahead of the digest threads.
+
+    Args:
+        f: File object opened in binary mode supporting readinto()
+        algorithms: Iterable of algorithm names from SUPPORTED_ALGORITHMS
+        total_size: Expected size in bytes (only used for progress reporting)
+        progress_callback: Optional callback(bytes_hashed, total_size), called at most
+            once per `progress_interval` seconds and once at the end
+        block_writer: Optional BlockIndexWriter that receives the same buffers and
+            records a digest per fixed-size block in the same pass
+
+    Returns:
+        dict with "digests" ({algorithm: hexdigest}), "bytes", "seconds" and "mb_per_s"
+    """
+    hasher = MultiHasher(algorithms, buffer_size, buffer_count, block_writer).start()
+    reader_error = []
+    stop = threading.Event()
+
+    def reader():
+        try:
+            while not stop.is_set():
+                index, view = hasher.acquire()
+                n = read_full(f, view)
+                if not n:
+                    hasher.release(index)
+                    break
+                hasher.submit(index, n)
+                if n < len(view):
+                    break
+        except Exception as e:
+            reader_error.append(e)
+
+    start = time.perf_counter()
+    t = threading.Thread(target=reader, daemon=True)
+    t.start()
+
+    # Progress is reported from the calling thread on a time-based throttle
+    try:
+        while t.is_alive():
+            t.join(progress_interval)
+            if progress_callback and t.is_alive():
+                progress_callback(hasher.bytes_hashed, total_size)
+    except BaseException:
+        # The callback aborted the pass (e.g. a cancelled job): stop reading and let the threads exit
+        stop.set()
+        t.join()
+        hasher.finish()
+        raise
+
+    digests = hasher.finish()
+    if reader_error:
+        raise reader_error[0]
+
+    elapsed = time.perf_counter() - start
+    if progress_callback:
+        progress_callback(hasher.bytes_hashed, total_size)
+
+    return {
+        "digests": digests,
+        "bytes": hasher.bytes_hashed,
+        "seconds": elapsed,
+        "mb_per_s": (hasher.bytes_hashed / 1024 / 1024) / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def hash_file(path, algorithms=DEFAULT_ALGORITHMS, progress_callback=None, **kwargs):
+    """Hash a file on disk in one pass. See hash_stream() for arguments and result."""
+    # Unbuffered: readinto() goes straight from the OS into our buffers
+    with open(path, "rb", buffering=0) as f:
+        size = f.seek(0, 2)
+        f.seek(0)
+        return hash_stream(f, algorithms, total_size=size, progress_callback=progress_callback, **kwargs)
+
+
+def format_digests(digests):
+    """Format digests the way they are stored in features["hash"], e.g. "MD5: ..., SHA256: ..."."""
+    return ", ".join(f"{a.upper()}: {d}" for a, d in digests.items())
@@ -0,0 +1,30 @@
+"""Shared I/O helpers."""
+import os
+
+
+def read_full(f, view):
+    """readinto() until the view is full or EOF; returns the number of bytes read."""
+    total = 0
+    size = len(view)
+    while total < size:
+        n = f.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
+
+def pread_full(fd, view, offset):
+    """Fill `view` from `fd` at `offset`; returns the number of bytes read (short only at EOF)."""
+    total = 0
+    while total < len(view):
+        if hasattr(os, "preadv"):
+            n = os.preadv(fd, [view[total:]], offset + total)
+        else:
+            data = os.pread(fd, len(view) - total, offset + total)
+            n = len(data)
+            view[total:total + n] = data
+        if not n:
+            break
+        total += n
+    return total
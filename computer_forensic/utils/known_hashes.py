@@ -0,0 +1,310 @@
+"""
+Known-file hash sets (NSRL-style) in a compact, memory-mappable format.
+
+Layout of a .khs file (little endian):
+    header   magic "KNOWNHS1", version, digest size, Bloom hash count,
+             algorithm name (16 bytes, NUL padded), entry count, Bloom size in bits
+    bloom    Bloom filter bitmap, padded to a multiple of 8 bytes
+    digests  entry_count * digest_size bytes, sorted and de-duplicated
+
+Opening a set only maps the file, so it is ready in milliseconds regardless
+of size. A lookup checks the Bloom filter first (a few bit tests, which
+reject almost every unknown digest), then binary-searches the fixed-width
+digest array.
+
+Usage:
+    python -m utils.known_hashes build NSRLFile.txt known.khs [--algorithm sha1]
+    python -m utils.known_hashes lookup known.khs <hexdigest> ...
+"""
+import argparse
+import csv
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MAGIC = b"KNOWNHS1"
+VERSION = 1
+HEADER_FORMAT = "<8sHHI16sQQ"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+DEFAULT_ALGORITHM = "md5"
+DEFAULT_KNOWN_SET_PATH = os.environ.get("FORENSIC_KNOWN_HASHES", "")
+BLOOM_BITS_PER_ENTRY = 10      # ~1% false positives with 7 hash functions
+BLOOM_HASHES = 7
+SORT_RUN_ENTRIES = 4_000_000   # digests sorted in memory per run during a build
+
+# Column names used by NSRL RDS text exports (NSRLFile.txt) and similar lists
+NSRL_COLUMNS = {"md5": ("MD5", "md5"), "sha1": ("SHA-1", "SHA1", "sha1"), "sha256": ("SHA-256", "SHA256", "sha256")}
+
+
+def _bloom_positions(digest, bits, hashes):
+    """Bit positions for a digest by double hashing; digests are already uniformly distributed."""
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:16], "little") | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+
+def iter_hash_list(path, algorithm=DEFAULT_ALGORITHM):
+    """
+    Yield raw digests from a hash list.
+
+    Accepts NSRL-style CSV files with a header row (the column for
+    `algorithm` is picked by name) and plain lists with one hex digest per
+    line. Lines without a valid digest are skipped.
+    """
+    hex_length = hashlib.new(algorithm).digest_size * 2
+    with open(path, "r", encoding="utf-8", errors="replace", newline="") as f:
+        first = f.readline()
+        column = None
+        if "," in first:
+            header = next(csv.reader([first]))
+            for i, name in enumerate(header):
+                if name.strip() in NSRL_COLUMNS[algorithm]:
+                    column = i
+                    break
+            if column is None:
+                raise ValueError(f"No {algorithm} column in {path}")
+            rows = (row[column] if len(row) > column else "" for row in csv.reader(f))
+        else:
+            rows = (line.split(None, 1)[0] if line.strip() else "" for line in _chain_line(first, f))
+
+        for value in rows:
+            value = value.strip().strip('"')
+            if len(value) != hex_length:
+                continue
+            try:
+                yield bytes.fromhex(value)
+            except ValueError:
+                continue
+
+
+def _chain_line(first, f):
+    yield first
+    yield from f
+
+
+def _sorted_run(digests, digest_size):
+    """Sort and de-duplicate one in-memory run of concatenated digests."""
+    if np is not None:
+        values = np.unique(np.frombuffer(digests, dtype=f"S{digest_size}"))
+        return values.tobytes()
+    view = memoryview(digests)
+    unique = sorted({bytes(view[i:i + digest_size]) for i in range(0, len(digests), digest_size)})
+    return b"".join(unique)
+
+
+def _iter_run(path, digest_size, read_size=1024 * 1024):
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(read_size - read_size % digest_size)
+            if not data:
+                break
+            for i in range(0, len(data), digest_size):
+                yield data[i:i + digest_size]
+
+
+def build_known_hash_set(sources, output_path, algorithm=DEFAULT_ALGORITHM, run_entries=SORT_RUN_ENTRIES):
+    """
+    Build a .khs file from one or more hash lists.
+
+    Digests are sorted externally: runs of `run_entries` are sorted in
+    memory and spilled to temporary files, then merged (dropping duplicates)
+    into the output. Memory use is bounded by one run and the Bloom filter.
+    Returns the number of distinct digests.
+    """
+    digest_size = hashlib.new(algorithm).digest_size
+    if digest_size < 16:
+        raise ValueError(f"Digest too short for the Bloom filter: {algorithm}")
+    if isinstance(sources, (str, os.PathLike)):
+        sources = [sources]
+
+    directory = os.path.dirname(os.path.abspath(output_path))
+    runs = []
+    try:
+        pending = bytearray()
+        for source in sources:
+            for digest in iter_hash_list(source, algorithm):
+                pending += digest
+                if len(pending) >= run_entries * digest_size:
+                    runs.append(_spill(_sorted_run(pending, digest_size), directory))
+                    pending = bytearray()
+        if pending or not runs:
+            runs.append(_spill(_sorted_run(pending, digest_size), directory))
+
+        # Merge runs into a temporary digest file, counting distinct entries
+        merged_path = _spill(b"", directory)
+        runs.append(merged_path)
+        count = 0
+        last = None
+        with open(merged_path, "wb") as merged:
+            buffered = bytearray()
+            for digest in heapq.merge(*(_iter_run(path, digest_size) for path in runs[:-1])):
+                if digest == last:
+                    continue
+                last = digest
+                buffered += digest
+                count += 1
+                if len(buffered) >= 1024 * 1024:
+                    merged.write(buffered)
+                    buffered = bytearray()
+            merged.write(buffered)
+
+        bloom_bits = max(64, count * BLOOM_BITS_PER_ENTRY)
+        bloom = _build_bloom(merged_path, digest_size, bloom_bits)
+
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "wb") as out, open(merged_path, "rb") as merged:
+            out.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, digest_size, BLOOM_HASHES,
+                                  algorithm.encode(), count, bloom_bits))
+            out.write(bloom)
+            while True:
+                data = merged.read(8 * 1024 * 1024)
+                if not data:
+                    break
+                out.write(data)
+        os.replace(tmp_path, output_path)
+    finally:
+        for path in runs:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return count
+
+
+def _spill(data, directory):
+    fd, path = tempfile.mkstemp(suffix=".khsrun", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+def _bloom_bytes(bits):
+    return -(-bits // 64) * 8
+
+
+def _build_bloom(digest_path, digest_size, bits):
+    bloom = bytearray(_bloom_bytes(bits))
+    with open(digest_path, "rb") as f:
+        while True:
+            data = f.read(digest_size * 262144)
+            if not data:
+                break
+            if np is not None:
+                # All positions for a whole chunk at once; reducing mod bits first keeps uint64 from overflowing
+                rows = np.frombuffer(data, dtype=np.uint8).reshape(-1, digest_size)
+                h1 = rows[:, :8].copy().view("<u8").reshape(-1)
+                h2 = rows[:, 8:16].copy().view("<u8").reshape(-1) | np.uint64(1)
+                bits64 = np.uint64(bits)
+                target = np.frombuffer(bloom, dtype=np.uint8)
+                for i in range(BLOOM_HASHES):
+                    pos = (h1 % bits64 + (np.uint64(i) * (h2 % bits64)) % bits64) % bits64
+                    np.bitwise_or.at(target, (pos >> np.uint64(3)).astype(np.intp),
+                                     (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8)))
+            else:
+                for i in range(0, len(data), digest_size):
+                    for pos in _bloom_positions(data[i:i + digest_size], bits, BLOOM_HASHES):
+                        bloom[pos >> 3] |= 1 << (pos & 7)
+    return bloom
+
+
+class KnownHashSet:
+    """Read-only, memory-mapped known-hash set."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+            if len(header) < HEADER_SIZE:
+                raise ValueError(f"Not a known-hash set: {path}")
+            magic, version, self.digest_size, self.bloom_hashes, algorithm, self.count, self.bloom_bits = \
+                struct.unpack(HEADER_FORMAT, header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"Not a known-hash set (or unsupported version): {path}")
+            self.algorithm = algorithm.rstrip(b"\0").decode()
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._bloom_start = HEADER_SIZE
+        self._digests_start = HEADER_SIZE + _bloom_bytes(self.bloom_bits)
+
+    def __len__(self):
+        return self.count
+
+    def _bloom_check(self, digest):
+        m = self._mmap
+        start = self._bloom_start
+        for pos in _bloom_positions(digest, self.bloom_bits, self.bloom_hashes):
+            if not m[start + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def _search(self, digest):
+        m = self._mmap
+        size = self.digest_size
+        base = self._digests_start
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = base + mid * size
+            value = m[start:start + size]
+            if value < digest:
+                lo = mid + 1
+            elif value > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __contains__(self, digest):
+        """Membership for a raw digest or a hex string."""
+        if isinstance(digest, str):
+            digest = bytes.fromhex(digest)
+        if len(digest) != self.digest_size:
+            return False
+        return self._bloom_check(digest) and self._search(digest)
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_default_known_set():
+    """The set named by FORENSIC_KNOWN_HASHES, or None if it is not configured or missing."""
+    if not DEFAULT_KNOWN_SET_PATH or not os.path.exists(DEFAULT_KNOWN_SET_PATH):
+        return None
+    return KnownHashSet(DEFAULT_KNOWN_SET_PATH)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query a known-file hash set")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build a .khs file from hash lists")
+    build.add_argument("sources", nargs="+")
+    build.add_argument("output")
+    build.add_argument("--algorithm", default=DEFAULT_ALGORITHM, choices=sorted(NSRL_COLUMNS))
+    lookup = commands.add_parser("lookup", help="Check digests against a .khs file")
+    lookup.add_argument("known_set")
+    lookup.add_argument("digests", nargs="+")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+        count = build_known_hash_set(args.sources, args.output, args.algorithm)
+        print(f"✅ Wrote {count} {args.algorithm} digests to {args.output} in {time.perf_counter() - start:.1f}s")
+    else:
+        with KnownHashSet(args.known_set) as known:
+            for digest in args.digests:
+                print(f"{digest}: {'known' if digest in known else 'unknown'}")
@@ -1,20 +1,11 @@
 import binascii
 import os
 
+from extraction.signatures import SIGNATURES
+
 # File to read
 RAW_FILE = "sample_raw.bin"
 
-# Known file signatures (magic numbers)
-SIGNATURES = {
-    b"\xFF\xD8\xFF": "JPEG image",
-    b"\x89PNG": "PNG image",
-    b"%PDF": "PDF document",
-    b"PK\x03\x04": "ZIP / DOCX / JAR",
-    b"GIF89a": "GIF image",
-    b"BM": "Bitmap image",
-    b"\x7FELF": "Linux Executable",
-}
-
 def detect_file_signature(data):
     for sig, desc in SIGNATURES.items():
         if data.startswith(sig):